@@ -0,0 +1,72 @@
+"""Benchmark of transparent decompression against piping through zcat.
+
+Writes a gzip-compressed file with synthetic lines, then measures the throughput of reading
+it with ``FileUrlIterStringParamType('r', decompress=True)`` against ``zcat file | cli -``,
+each in a fresh interpreter.
+
+Usage:
+    python -m benchmarks.bench_decompression [--lines N] [--repeat R]
+"""
+import argparse
+import gzip
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def consume(source, decompress):
+    from click_tools import FileUrlIterStringParamType
+
+    count = 0
+    for _ in FileUrlIterStringParamType("r", decompress=decompress).convert(source, None, None):
+        count += 1
+    return count
+
+
+def run(command, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, shell=True, check=True, stdout=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=2_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--consume", help=argparse.SUPPRESS)
+    parser.add_argument("--decompress", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.consume:
+        print(consume(args.consume, args.decompress))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "data.txt.gz")
+        with gzip.open(path, "wt") as f:
+            for i in range(args.lines):
+                f.write("%d,item-%d,%f\n" % (i, i, i / 7))
+        with gzip.open(path, "rb") as f:
+            size = sum(len(block) for block in iter(lambda: f.read(1024 * 1024), b""))
+
+        cli = "%s -m benchmarks.bench_decompression --consume" % shlex.quote(sys.executable)
+        cases = {"decompress=True": "%s %s --decompress" % (cli, shlex.quote(path))}
+        if shutil.which("zcat"):
+            cases["zcat | stdin"] = "zcat %s | %s -" % (shlex.quote(path), cli)
+
+        print("%d lines, %.1f MB uncompressed" % (args.lines, size / 1e6))
+        for name, command in cases.items():
+            elapsed = run(command, args.repeat)
+            print(f"{name:<20} {elapsed:6.2f} s {size / 1e6 / elapsed:8.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
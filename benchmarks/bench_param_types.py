@@ -0,0 +1,188 @@
+"""End-to-end throughput benchmark of the file and URL param types.
+
+Writes synthetic line-oriented files of the requested sizes and serves them from a local
+threaded ``http.server``, then reads every file (and URL, for URL-capable types) with
+``FileUrlIterStringParamType``, ``FileOrUrlParamType``, ``FileIterStringParamType`` and
+``StringOrFileParamType``. Each case runs in a fresh interpreter, so peak RSS is measured
+per case.
+
+Reports lines/s, MB/s, time to first line and peak RSS, as a table on stderr and as JSON on
+stdout (or in --output), to compare releases.
+
+Usage:
+    python -m benchmarks.bench_param_types [--sizes 1MB,100MB,5GB] [--repeat R] [--output results.json]
+"""
+import argparse
+import functools
+import http.server
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+UNITS = {"KB": 10**3, "MB": 10**6, "GB": 10**9}
+
+# name: (param type, keyword arguments, reads URLs)
+CASES = {
+    "FileUrlIterStringParamType": ("FileUrlIterStringParamType", {}, True),
+    "FileUrlIterStringParamType(stream=True)": ("FileUrlIterStringParamType", {"stream": True}, True),
+    "FileOrUrlParamType": ("FileOrUrlParamType", {}, True),
+    "FileIterStringParamType": ("FileIterStringParamType", {}, False),
+    "FileIterStringParamType(type=len)": ("FileIterStringParamType", {"type": len}, False),
+    "StringOrFileParamType": ("StringOrFileParamType", {}, False),
+}
+
+
+def parse_size(size):
+    size = size.strip().upper()
+    for unit, factor in UNITS.items():
+        if size.endswith(unit):
+            return int(float(size[: -len(unit)]) * factor)
+    return int(size)
+
+
+def write_synthetic_file(path, size):
+    """Write about size bytes of CSV-like lines, a block at a time."""
+    block = "".join("%d,item-%d,%f\n" % (i, i, i / 7) for i in range(20000)).encode()
+    with open(path, "wb") as f:
+        written = 0
+        while written < size:
+            chunk = block[: size - written]
+            f.write(chunk)
+            written += len(chunk)
+
+
+def peak_rss():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, in kilobytes elsewhere
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def consume(case, source):
+    """Read source with the param type of case and return the measurements."""
+    import click
+
+    import click_tools
+
+    class_name, kwargs, _ = CASES[case]
+    param_type = getattr(click_tools, class_name)("r", **kwargs)
+    lines = 0
+    first_line = None
+    start = time.perf_counter()
+    with click.Context(click.Command("bench")) as ctx:
+        for _ in param_type.convert(source, None, ctx):
+            if first_line is None:
+                first_line = time.perf_counter() - start
+            lines += 1
+    return {"lines": lines, "seconds": time.perf_counter() - start, "time_to_first_line": first_line, "peak_rss": peak_rss()}
+
+
+def run(case, source, repeat):
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_param_types", "--consume", case, source],
+            check=True,
+            stdout=subprocess.PIPE,
+        ).stdout
+        result = json.loads(output)
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+    return best
+
+
+def serve(directory):
+    handler = functools.partial(QuietHandler, directory=directory)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def version():
+    try:
+        from importlib.metadata import version
+
+        return version("click-tools")
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1MB,100MB", help="comma-separated file sizes, e.g. 1MB,100MB,5GB")
+    parser.add_argument("--cases", default=",".join(CASES), help="comma-separated case names")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    parser.add_argument("--consume", help=argparse.SUPPRESS)
+    parser.add_argument("source", nargs="?", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.consume:
+        print(json.dumps(consume(args.consume, args.source)))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        server = serve(directory)
+        try:
+            for size_name in args.sizes.split(","):
+                size = parse_size(size_name)
+                name = "data-%d.csv" % size
+                path = os.path.join(directory, name)
+                write_synthetic_file(path, size)
+                url = "http://127.0.0.1:%d/%s" % (server.server_address[1], name)
+
+                for case in args.cases.split(","):
+                    sources = {"file": path, "url": url} if CASES[case][2] else {"file": path}
+                    for source_kind, source in sources.items():
+                        result = run(case, source, args.repeat)
+                        result.update(
+                            case=case,
+                            source=source_kind,
+                            size=size,
+                            lines_per_second=result["lines"] / result["seconds"],
+                            mb_per_second=size / 1e6 / result["seconds"],
+                        )
+                        results.append(result)
+                        print(
+                            f"{case:<42} {source_kind:<4} {size_name:>6} {result['lines_per_second']:12.0f} lines/s "
+                            f"{result['mb_per_second']:8.1f} MB/s {result['time_to_first_line'] or 0:8.4f} s to first line "
+                            f"{(result['peak_rss'] or 0) / 1e6:8.1f} MB peak RSS",
+                            file=sys.stderr,
+                        )
+                os.unlink(path)
+        finally:
+            server.shutdown()
+
+    report = {
+        "version": version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Micro-benchmark of the per-item cost of TypeConvertingIterator.
+
+Compares iterating a TypeConvertingIterator against a plain generator expression and
+``map`` over the same data, with and without a conversion function. The batched case
+reports the cost per element, not per batch.
+
+Usage:
+    python -m benchmarks.bench_type_converting_iterator [--items N] [--repeat R]
+"""
+import argparse
+import timeit
+
+from click_tools import TypeConvertingIterator
+
+
+def consume(iterator):
+    for _ in iterator:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    data = [str(i) for i in range(args.items)]
+    cases = {
+        "generator, int": lambda: consume(int(x) for x in data),
+        "map, int": lambda: consume(map(int, data)),
+        "TypeConvertingIterator, int": lambda: consume(TypeConvertingIterator(iter(data), int)),
+        "TypeConvertingIterator, batched int": lambda: consume(
+            TypeConvertingIterator(iter(data), batch_conversion_function=lambda batch: list(map(int, batch))).batches()
+        ),
+        "generator, no conversion": lambda: consume(x for x in data),
+        "TypeConvertingIterator, no conversion": lambda: consume(TypeConvertingIterator(iter(data))),
+    }
+
+    for name, case in cases.items():
+        best = min(timeit.repeat(case, number=1, repeat=args.repeat))
+        print(f"{name:<40} {best * 1e9 / args.items:8.1f} ns/item")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Memory and throughput benchmark of the unique= modes of the iterator param types.
+
+Adds synthetic distinct lines to a plain ``set`` of strings (the baseline), ``DigestSet``
+("exact"), ``BloomFilter`` ("bloom") and ``DiskSet`` ("disk"). Each mode runs in a fresh
+interpreter, so the peak RSS increase is measured per mode.
+
+Reports the peak RSS increase per million items and items/s, as a table on stderr and as JSON
+on stdout (or in --output), to compare releases.
+
+Usage:
+    python -m benchmarks.bench_unique [--items 1000000,10000000] [--modes set,exact,bloom,disk] [--output results.json]
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+from benchmarks.bench_param_types import peak_rss
+from benchmarks.bench_param_types import version
+
+MODES = ("set", "exact", "bloom", "disk")
+
+
+def make_set(mode, items):
+    import click_tools
+
+    if mode == "set":
+        return set()
+    if mode == "exact":
+        return click_tools.DigestSet()
+    if mode == "bloom":
+        return click_tools.BloomFilter(capacity=items)
+    return click_tools.DiskSet()
+
+
+def consume(mode, items):
+    """Add items distinct lines to the set of mode and return the measurements."""
+    import click_tools.cli  # noqa: F401 - not counted in the RSS increase
+
+    baseline = peak_rss()
+    seen = make_set(mode, items)
+    add = seen.add
+    start = time.perf_counter()
+    if mode == "set":
+        # set.add returns None: counts membership like the other modes
+        for i in range(items):
+            line = "%d,item-%d\n" % (i, i)
+            if line not in seen:
+                add(line)
+    else:
+        for i in range(items):
+            add("%d,item-%d\n" % (i, i))
+    seconds = time.perf_counter() - start
+    if mode == "disk":
+        seen.close()
+    peak = peak_rss()
+    return {"items": items, "seconds": seconds, "rss_increase": None if peak is None else peak - baseline}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", default="1000000,10000000", help="comma-separated numbers of distinct items")
+    parser.add_argument("--modes", default=",".join(MODES), help="comma-separated modes")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    parser.add_argument("--consume", help=argparse.SUPPRESS)
+    parser.add_argument("count", nargs="?", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.consume:
+        print(json.dumps(consume(args.consume, args.count)))
+        return
+
+    results = []
+    for items in map(int, args.items.split(",")):
+        for mode in args.modes.split(","):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_unique", "--consume", mode, str(items)],
+                check=True,
+                stdout=subprocess.PIPE,
+            ).stdout
+            result = json.loads(output)
+            result.update(
+                mode=mode,
+                items_per_second=items / result["seconds"],
+                mb_per_million_items=(result["rss_increase"] or 0) / 1e6 / (items / 1e6),
+            )
+            results.append(result)
+            print(
+                f"{mode:<6} {items:>11} items {result['items_per_second']:12.0f} items/s "
+                f"{result['mb_per_million_items']:8.1f} MB per million items",
+                file=sys.stderr,
+            )
+
+    report = {
+        "version": version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,42 @@
-from .cli import (
-    TypeConvertingIterator,
-    ChoiceCommaSeparated,
-    ListCommaSeparated,
-    StringsListOrStdinParamType,
-    FileUrlIterStringParamType,
-    FileIterStringParamType,
-    FileOrUrlParamType,
-    StringOrFileParamType,
-    UrlOrListFromFileStdinParamType,
-)
+import importlib
+
+# Public names are resolved lazily (PEP 562), so importing click_tools doesn't import
+# click_tools.cli until one of them is actually used.
+_LAZY_ATTRIBUTES = {
+    'TypeConvertingIterator': 'click_tools.cli',
+    'ReadAheadIterator': 'click_tools.cli',
+    'ChoiceCommaSeparated': 'click_tools.cli',
+    'ListCommaSeparated': 'click_tools.cli',
+    'StringsListOrStdinParamType': 'click_tools.cli',
+    'FileUrlIterStringParamType': 'click_tools.cli',
+    'FileIterStringParamType': 'click_tools.cli',
+    'FileOrUrlParamType': 'click_tools.cli',
+    'StringOrFileParamType': 'click_tools.cli',
+    'UrlOrListFromFileStdinParamType': 'click_tools.cli',
+    'PrefetchArgument': 'click_tools.cli',
+    'PrefetchOption': 'click_tools.cli',
+    'HttpCache': 'click_tools.cli',
+    'ShardParamType': 'click_tools.cli',
+    'LineIndex': 'click_tools.cli',
+    'Checkpoint': 'click_tools.cli',
+    'CheckpointIterator': 'click_tools.cli',
+    'DigestSet': 'click_tools.cli',
+    'BloomFilter': 'click_tools.cli',
+    'DiskSet': 'click_tools.cli',
+    'configure_session': 'click_tools.cli',
+    'get_session': 'click_tools.cli',
+    'set_session': 'click_tools.cli',
+    'ConversionStats': 'click_tools.cli',
+    'enable_instrumentation': 'click_tools.cli',
+    'get_conversion_stats': 'click_tools.cli',
+    'format_conversion_summary': 'click_tools.cli',
+    'print_conversion_summary': 'click_tools.cli',
+    'instrumentation_option': 'click_tools.cli',
+}
 
 __all__ = [
     'TypeConvertingIterator',
+    'ReadAheadIterator',
     'ChoiceCommaSeparated',
     'ListCommaSeparated',
     'StringsListOrStdinParamType',
@@ -20,5 +45,37 @@ __all__ = [
     'FileOrUrlParamType',
     'StringOrFileParamType',
     'UrlOrListFromFileStdinParamType',
+    'PrefetchArgument',
+    'PrefetchOption',
+    'HttpCache',
+    'ShardParamType',
+    'LineIndex',
+    'Checkpoint',
+    'CheckpointIterator',
+    'DigestSet',
+    'BloomFilter',
+    'DiskSet',
+    'configure_session',
+    'get_session',
+    'set_session',
+    'ConversionStats',
+    'enable_instrumentation',
+    'get_conversion_stats',
+    'format_conversion_summary',
+    'print_conversion_summary',
+    'instrumentation_option',
 ]
 
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+    # Cache the resolved attribute so __getattr__ is not called again for it
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,62 +1,2289 @@
+import array
+import bz2
+import codecs
+import collections
+import contextlib
+import functools
+import gzip
+import heapq
+import io
 import itertools
+import lzma
+import math
+import mmap
+import os
+import queue
+import random
+import select
+import shutil
+import stat
+import struct
+import sys
 import tempfile
+import threading
+import time
+import types
 from os.path import exists
 
 import click
-import requests
-import validators
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+# requests and validators are imported lazily, when a URL value is actually converted, to keep
+# the import time of CLIs that don't deal with URLs (and of --help and shell completion) low.
+
+# Default size, in bytes, of the blocks read from a streamed HTTP response
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# Default number of elements converted at a time by batched conversions
+DEFAULT_BATCH_SIZE = 1024
+
+# Default size, in bytes, of the blocks read when parsing numeric inputs into NumPy arrays
+DEFAULT_ARRAY_BLOCK_SIZE = 1024 * 1024
+
+# Default number of lines per batch, and of batches queued, when reading ahead in a background thread
+DEFAULT_READ_AHEAD_BATCH_SIZE = 1024
+DEFAULT_READ_AHEAD_BATCHES = 16
+
+# Default sizing of the sets used to drop duplicate lines
+DEFAULT_UNIQUE_CAPACITY = 1 << 16
+DEFAULT_BLOOM_CAPACITY = 10_000_000
+DEFAULT_BLOOM_ERROR_RATE = 0.001
+DEFAULT_DISK_SET_CACHE_SIZE = 64 * 1024 * 1024
+
+# Default number of lines sorted in memory at a time, and maximum number of spill files merged at once
+DEFAULT_SORT_CHUNK_SIZE = 1_000_000
+DEFAULT_SORT_MERGE_FAN_IN = 256
+
+# Number of lines per block of a spill file, read at a time from each file being merged
+DEFAULT_SPILL_BLOCK_SIZE = 1024
+
+# Default maximum number of seconds between two checks for new lines when following a file
+DEFAULT_POLL_INTERVAL = 1.0
+
+# Default number of lines consumed between two saves of a checkpoint
+DEFAULT_CHECKPOINT_EVERY = 10000
+
+# Default number of lines per offset recorded by LineIndex
+DEFAULT_LINE_INDEX_STRIDE = 64
+
+# Marks arguments left to their default, when None is a meaningful value
+_DEFAULT = object()
+
+# Compression formats recognized from file extensions, when magic bytes are inconclusive
+COMPRESSION_EXTENSIONS = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz", ".lzma": "xz", ".zst": "zstd"}
+
+# Default maximum number of URLs fetched concurrently when prefetching
+DEFAULT_MAX_WORKERS = 8
+
+# Process-wide HTTP session shared by all URL-capable param types, created on first use
+_session = None
+_session_lock = threading.Lock()
+_session_config = {}
+
+
+def configure_session(pool_connections=10, pool_maxsize=10, pool_block=False, max_retries=0, keep_alive=True):
+    """Configure the HTTP session shared by all URL-capable param types.
+
+    The current shared session, if any, is closed and a new one is created with these settings
+    the next time a URL is fetched.
+
+    Args:
+        pool_connections: Number of per-host connection pools to keep. Defaults to 10.
+        pool_maxsize: Maximum number of connections kept alive per host. Defaults to 10.
+        pool_block: If True, limit the number of concurrent connections per host to
+            ``pool_maxsize`` instead of opening extra, non-pooled ones. Defaults to False.
+        max_retries: Number of retries on connection errors, or a ``urllib3.Retry`` instance.
+            Defaults to 0.
+        keep_alive: If False, connections are closed after every request. Defaults to True.
+
+    Example:
+        >>> configure_session(pool_maxsize=32, pool_block=True)
+    """
+    global _session, _session_config
+
+    with _session_lock:
+        _session_config = {
+            "pool_connections": pool_connections,
+            "pool_maxsize": pool_maxsize,
+            "pool_block": pool_block,
+            "max_retries": max_retries,
+            "keep_alive": keep_alive,
+        }
+        previous, _session = _session, None
+
+    if previous is not None:
+        previous.close()
+
+
+def set_session(session):
+    """Replace the HTTP session shared by all URL-capable param types.
+
+    Useful to inject a custom or instrumented ``requests.Session``, e.g. in tests.
+
+    Args:
+        session: A ``requests.Session``-like object, or None to go back to the default
+            session built from the ``configure_session`` settings
+    """
+    global _session
+
+    with _session_lock:
+        _session = session
+
+
+def get_session():
+    """Return the HTTP session shared by all URL-capable param types, creating it if needed.
+
+    Returns:
+        A ``requests.Session`` whose connection pools are reused across URL arguments
+    """
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _create_session(**_session_config)
+    return _session
+
+
+def _create_session(pool_connections=10, pool_maxsize=10, pool_block=False, max_retries=0, keep_alive=True):
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=max_retries, pool_block=pool_block)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+    return session
+
+
+def iter_response_lines(response, chunk_size=DEFAULT_CHUNK_SIZE, encoding="utf-8"):
+    """Lazily yield decoded lines from a streamed ``requests`` response.
+
+    The body is read in blocks of ``chunk_size`` bytes and decoded incrementally, so memory
+    usage is bounded by one block plus the longest line instead of the whole body. Lines are
+    split the same way as ``str.splitlines()`` and returned without their line endings.
+
+    The response is closed once the body is exhausted or the generator is closed.
+
+    Args:
+        response: A ``requests.Response`` obtained with ``stream=True``
+        chunk_size: Number of bytes to read from the socket at a time
+        encoding: Encoding used to decode the body
+
+    Example:
+        >>> r = requests.get('http://example.com/data', stream=True)
+        >>> for line in iter_response_lines(r):
+        ...     print(line)
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="strict")
+    # Pieces of the last line, kept until it is complete, so a long line is only scanned once.
+    # A line ending with "\r" is also kept, since "\n" may start the next chunk.
+    pending = []
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            text = decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+            if not text:
+                continue
+            if pending and pending[-1].endswith("\r"):
+                yield "".join(pending)[:-1]
+                pending = []
+                if text.startswith("\n"):
+                    text = text[1:]
+                    if not text:
+                        continue
+            lines = text.splitlines(keepends=True)
+            last = lines.pop()
+            if lines:
+                pending.append(lines[0])
+                lines[0] = "".join(pending)
+                pending = []
+                for line in lines:
+                    yield _strip_line_break(line)
+            pending.append(last)
+            if last[-1] in _LINE_BREAKS and last[-1] != "\r":
+                yield _strip_line_break("".join(pending))
+                pending = []
+        pending.append(decoder.decode(b"", final=True))
+        yield from "".join(pending).splitlines()
+    finally:
+        response.close()
+
+
+# Characters str.splitlines() splits on
+_LINE_BREAKS = frozenset("\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029")
+
+
+def _strip_line_break(line):
+    # line ends with exactly one line break, as returned by str.splitlines(keepends=True)
+    return line[:-2] if line.endswith("\r\n") else line[:-1]
+
+
+def iter_mmap_lines(path, binary=False, encoding="utf-8", errors="strict"):
+    """Lazily yield the lines of a local file through a memory map.
+
+    Newlines are found with ``mmap.find`` directly on the mapped file, skipping the io stack.
+    In text mode each line is decoded only when it is yielded, and ``\r\n`` endings are
+    translated to ``\n`` like in universal newlines mode. In binary mode lines are zero-copy
+    ``memoryview`` slices of the mapping. Lines keep their line endings, like when iterating
+    over a file object.
+
+    Files that can't be mapped (pipes, character devices, empty files) are read through a
+    regular buffered file object instead. The file is closed once the lines are exhausted or
+    the generator is closed.
+
+    Args:
+        path: Path of the file to read
+        binary: If True, yield memoryview slices instead of decoded strings
+        encoding: Encoding used to decode lines in text mode. Must be ASCII-compatible.
+        errors: Error handling scheme used when decoding
+
+    Example:
+        >>> for line in iter_mmap_lines('huge.log'):
+        ...     print(line, end='')
+    """
+    with open(path, "rb") as f:
+        info = os.fstat(f.fileno())
+        if not stat.S_ISREG(info.st_mode) or info.st_size == 0:
+            yield from (f if binary else io.TextIOWrapper(f, encoding=encoding, errors=errors))
+            return
+
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped) if binary else None
+        try:
+            find = mapped.find
+            size = len(mapped)
+            start = 0
+            while start < size:
+                end = find(b"\n", start)
+                end = size if end < 0 else end + 1
+                if binary:
+                    yield view[start:end]
+                else:
+                    line = mapped[start:end].decode(encoding, errors)
+                    yield line[:-2] + "\n" if line.endswith("\r\n") else line
+                start = end
+        finally:
+            # Slices still held by the caller keep the mapping alive until they are released
+            with contextlib.suppress(BufferError):
+                if view is not None:
+                    view.release()
+                mapped.close()
+
+
+def iter_shard_lines(path, index, count, binary=False, encoding="utf-8", errors="strict"):
+    """Lazily yield the lines of one byte-range shard of a local file.
+
+    The file is split into ``count`` byte ranges of (almost) equal size. A line belongs to the
+    shard its first byte falls in, so this seeks to the start of the range, skips the end of a
+    line that started in the previous shard, and stops after the last line starting before the
+    end of the range. Every line is read by exactly one of the ``count`` shards, with no overlap
+    or gaps, and each shard only reads its share of the file.
+
+    Lines keep their line endings; in text mode ``\r\n`` endings are translated to ``\n``.
+
+    Args:
+        path: Path of the file to read
+        index: Index of the shard, between 0 and count - 1
+        count: Total number of shards
+        binary: If True, yield bytes instead of decoded strings
+        encoding: Encoding used to decode lines in text mode. Must be ASCII-compatible.
+        errors: Error handling scheme used when decoding
+
+    Raises:
+        ValueError: If index is not between 0 and count - 1
+
+    Example:
+        >>> # in worker i of n
+        >>> for line in iter_shard_lines('huge.csv', i, n):
+        ...     process(line)
+    """
+    if not 0 <= index < count:
+        raise ValueError("shard index must be between 0 and %d, got %d" % (count - 1, index))
+
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        start = size * index // count
+        end = size * (index + 1) // count
+        if start > 0:
+            # Skip the rest of the line the previous shard started, or just its newline
+            f.seek(start - 1)
+            f.readline()
+
+        position = f.tell()
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            if binary:
+                yield line
+            else:
+                yield _decode_line(line, encoding, errors)
+
+
+class LineIndex:
+    """A sidecar index of line offsets in a local file, for random access by line number.
+
+    The byte offset of every ``stride``-th line is recorded, so reading from line N seeks to
+    the closest recorded line before it and skips at most ``stride - 1`` lines, instead of
+    reading the whole file up to N. The index is built incrementally: only as much of the file
+    as needed is scanned (all of it for ``len()`` and ``sample()``), and the result is saved to
+    ``index_path`` so later runs start where the previous one stopped. An index is discarded
+    and rebuilt when the size or modification time of the file changes.
+
+    Line numbers are 0-based, like Python indices. Lines keep their line endings; in text mode
+    ``\r\n`` endings are translated to ``\n``.
+
+    Args:
+        path: Path of the indexed file
+        index_path: Path of the sidecar index file, or None to keep the index in memory only.
+            Defaults to ``path + ".idx"``.
+        stride: Record the offset of one line out of stride. Defaults to DEFAULT_LINE_INDEX_STRIDE.
+
+    Example:
+        >>> index = LineIndex('huge.csv')
+        >>> for line in index.iter_lines(80_000_000):
+        ...     process(line)
+        >>> index.sample(100, seed=0)
+    """
+
+    _MAGIC = b"CTLIDX1\n"
+    # size, mtime_ns, stride, next line, next offset, complete
+    _HEADER = struct.Struct("<8sQQQQQQ")
+
+    def __init__(self, path, index_path=_DEFAULT, stride=DEFAULT_LINE_INDEX_STRIDE):
+        self.path = path
+        self.index_path = path + ".idx" if index_path is _DEFAULT else index_path
+        self.stride = stride
+        st = os.stat(path)
+        self._size = st.st_size
+        self._mtime_ns = st.st_mtime_ns
+        if not self._load():
+            self._reset()
+
+    def __len__(self):
+        self._scan()
+        return self._next_line + (1 if self._next_offset < self._size else 0)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.path!r})"
+
+    def iter_lines(self, start=0, stop=None, binary=False, encoding="utf-8", errors="strict"):
+        """Lazily yield the lines from start (included) to stop (excluded).
+
+        Args:
+            start: Number of the first line
+            stop: Number of the line to stop at, or None to read until the end of the file
+            binary: If True, yield bytes instead of decoded strings
+            encoding: Encoding used to decode lines in text mode. Must be ASCII-compatible.
+            errors: Error handling scheme used when decoding
+        """
+        with open(self.path, "rb") as f:
+            self._seek_line(f, start)
+            lines = iter(f.readline, b"")
+            if stop is not None:
+                lines = itertools.islice(lines, max(stop - start, 0))
+            for line in lines:
+                yield line if binary else _decode_line(line, encoding, errors)
+
+    def read_line(self, number, binary=False, encoding="utf-8", errors="strict"):
+        """Return line number, or raise IndexError if the file has fewer lines."""
+        for line in self.iter_lines(number, number + 1, binary=binary, encoding=encoding, errors=errors):
+            return line
+        raise IndexError("line %d is out of range" % number)
+
+    def sample(self, k, seed=None, binary=False, encoding="utf-8", errors="strict"):
+        """Return k distinct lines picked at random, in file order.
+
+        Args:
+            k: Number of lines, at most the number of lines of the file
+            seed: Optional seed of the random generator, for reproducible samples
+        """
+        numbers = sorted(random.Random(seed).sample(range(len(self)), k))
+        return [self.read_line(number, binary=binary, encoding=encoding, errors=errors) for number in numbers]
+
+    def _seek_line(self, f, number):
+        if number < 0:
+            raise ValueError("line number must be positive, got %d" % number)
+        if number > self._next_line:
+            self._scan(stop_line=number)
+        checkpoint = min(number // self.stride, len(self._offsets) - 1)
+        f.seek(self._offsets[checkpoint])
+        for _ in range(number - checkpoint * self.stride):
+            if not f.readline():
+                break
+
+    def _reset(self):
+        self._offsets = array.array("Q", [0])
+        self._next_line = 0
+        self._next_offset = 0
+        self._complete = self._size == 0
+
+    def _scan(self, stop_line=None):
+        """Index the file from where the last scan stopped, until stop_line or the end of the file."""
+        if self._complete:
+            return
+        stride = self.stride
+        offsets = self._offsets
+        line = self._next_line
+        offset = self._next_offset
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            position = offset
+            while stop_line is None or line < stop_line:
+                block = f.read(DEFAULT_ARRAY_BLOCK_SIZE)
+                if not block:
+                    self._complete = True
+                    break
+                # Offsets, relative to the block, of the line starting after each newline in it
+                starts = list(itertools.accumulate(map((1).__add__, map(len, block.split(b"\n")[:-1]))))
+                if starts:
+                    first = (stride - (line + 1) % stride) % stride
+                    offsets.extend(position + start for start in starts[first::stride])
+                    line += len(starts)
+                    offset = position + starts[-1]
+                position += len(block)
+                if position >= self._size:
+                    self._complete = True
+                    break
+        self._next_line = line
+        self._next_offset = offset
+        self._save()
+
+    def _load(self):
+        if self.index_path is None:
+            return False
+        try:
+            with open(self.index_path, "rb") as f:
+                magic, size, mtime_ns, stride, next_line, next_offset, complete = self._HEADER.unpack(f.read(self._HEADER.size))
+                if magic != self._MAGIC or (size, mtime_ns, stride) != (self._size, self._mtime_ns, self.stride):
+                    # Stale index of a file that has changed since
+                    return False
+                offsets = array.array("Q")
+                offsets.frombytes(f.read())
+        except (OSError, struct.error, ValueError):
+            return False
+        if not offsets or len(offsets) <= next_line // stride:
+            return False
+        self._offsets = offsets
+        self._next_line = next_line
+        self._next_offset = next_offset
+        self._complete = bool(complete)
+        return True
+
+    def _save(self):
+        if self.index_path is None:
+            return
+        header = self._HEADER.pack(self._MAGIC, self._size, self._mtime_ns, self.stride, self._next_line, self._next_offset, self._complete)
+        # Write to a temporary file and rename it, so concurrent readers never see a partial index
+        directory = os.path.dirname(os.path.abspath(self.index_path))
+        try:
+            with tempfile.NamedTemporaryFile("wb", dir=directory, delete=False) as f:
+                f.write(header)
+                f.write(self._offsets.tobytes())
+            os.replace(f.name, self.index_path)
+        except OSError:
+            # e.g. a read-only directory: the index is only kept in memory
+            with contextlib.suppress(OSError, NameError):
+                os.unlink(f.name)
+
+
+def _decode_line(line, encoding, errors):
+    line = line.decode(encoding, errors)
+    return line[:-2] + "\n" if line.endswith("\r\n") else line
+
+
+def iter_follow_lines(path, poll_interval=DEFAULT_POLL_INTERVAL, binary=False, encoding="utf-8", errors="strict", inotify=True):
+    """Yield the lines of a local file, then keep yielding lines as they are appended, like ``tail -F``.
+
+    At the end of the file, this waits for the file's directory to change, using inotify on
+    Linux, or checks again every ``poll_interval`` seconds otherwise, so new lines are yielded
+    at most poll_interval seconds after they're written. A truncated file is read again from
+    its start. When the file is rotated (the path now names another file, e.g. after
+    ``mv app.log app.log.1``), the rest of the old file is read, then the new file is followed
+    from its start; if the path doesn't exist for a while, this waits for it to reappear.
+
+    A line is only yielded once its newline has been written, except the last line of a
+    rotated file. The generator never ends on its own: stop iterating, or close it.
+
+    Args:
+        path: Path of the file to follow
+        poll_interval: Maximum number of seconds between checks for new data. Defaults to
+            DEFAULT_POLL_INTERVAL.
+        binary: If True, yield bytes instead of decoded strings
+        encoding: Encoding used to decode lines in text mode
+        errors: Error handling scheme used when decoding
+        inotify: If False, always poll, e.g. for network filesystems inotify doesn't see
+            changes on. Defaults to True.
+
+    Example:
+        >>> for line in iter_follow_lines('/var/log/app.log'):
+        ...     process(line)
+    """
+    watch = _inotify_watch(os.path.dirname(os.path.abspath(path))) if inotify else None
+    f = open(path, "rb")
+    partial = b""
+    try:
+        while True:
+            line = f.readline()
+            if line.endswith(b"\n"):
+                line, partial = partial + line, b""
+                yield line if binary else _decode_line(line, encoding, errors)
+                continue
+            # Keep an incomplete last line until the rest of it is written
+            partial += line
+
+            current = os.fstat(f.fileno())
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                st = None
+
+            if st is not None and (st.st_ino, st.st_dev) != (current.st_ino, current.st_dev):
+                # Rotated: the old file has been read to its end, continue with the new one
+                try:
+                    rotated = open(path, "rb")
+                except FileNotFoundError:
+                    _wait_for_change(watch, poll_interval)
+                    continue
+                f.close()
+                f = rotated
+                if partial:
+                    line, partial = partial, b""
+                    yield line if binary else _decode_line(line, encoding, errors)
+            elif current.st_size < f.tell():
+                # Truncated: start over
+                partial = b""
+                f.seek(0)
+            else:
+                _wait_for_change(watch, poll_interval)
+    finally:
+        f.close()
+        if watch is not None:
+            os.close(watch)
+
+
+# inotify events signaling that a file in the watched directory was written, replaced or removed
+_INOTIFY_MASK = 0x2 | 0x4 | 0x8 | 0x40 | 0x80 | 0x100 | 0x200
+
+
+def _inotify_watch(directory):
+    # Returns a non-blocking inotify file descriptor watching directory, or None if inotify
+    # isn't available
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    if libc.inotify_add_watch(fd, os.fsencode(directory), _INOTIFY_MASK) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _wait_for_change(watch, timeout):
+    if watch is None:
+        time.sleep(timeout)
+        return
+    # Also wake up after timeout, in case a change wasn't reported
+    if select.select([watch], [], [], timeout)[0]:
+        # Discard the pending events, only the fact that something changed matters
+        with contextlib.suppress(BlockingIOError):
+            while os.read(watch, 64 * 1024):
+                pass
+
+
+def detect_compression(header, name=None):
+    """Detect the compression format of a stream from its first bytes or its name.
+
+    Args:
+        header: The first (at least 6) bytes of the stream
+        name: Optional file name or URL, whose extension is used when the header is too short
+            to be conclusive
+
+    Returns:
+        One of "gzip", "bz2", "xz" or "zstd", or None if the stream doesn't look compressed
+    """
+    if header.startswith(b"\x1f\x8b"):
+        return "gzip"
+    if header.startswith(b"BZh") and header[3:4].isdigit():
+        return "bz2"
+    if header.startswith(b"\xfd7zXZ\x00"):
+        return "xz"
+    if header.startswith(b"\x28\xb5\x2f\xfd"):
+        return "zstd"
+    if name and len(header) < 6:
+        return COMPRESSION_EXTENSIONS.get(os.path.splitext(name.split("?", 1)[0])[1].lower())
+    return None
+
+
+def open_decompressed(stream, name=None):
+    """Wrap a binary stream so that compressed data is decompressed incrementally.
+
+    gzip, bz2 and xz are supported out of the box, Zstandard requires the zstd extra. Streams
+    that don't look compressed are returned as they are (wrapped in a buffered reader if they
+    can't be peeked at).
+
+    Args:
+        stream: A readable binary file-like object, e.g. a file, stdin or an HTTP response body
+        name: Optional file name or URL used to detect the format (see ``detect_compression``)
+
+    Closing the returned decompressor doesn't close stream.
+
+    Returns:
+        A readable binary file-like object with the decompressed data
+
+    Raises:
+        ImportError: If the stream is Zstandard-compressed and zstandard is not installed
+    """
+    if not hasattr(stream, "peek"):
+        stream = io.BufferedReader(stream)
+
+    compression = detect_compression(stream.peek(6)[:6], name)
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=stream, mode="rb")
+    elif compression == "bz2":
+        return bz2.BZ2File(stream, mode="rb")
+    elif compression == "xz":
+        return lzma.LZMAFile(stream, mode="rb")
+    elif compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstandard is required to read Zstandard-compressed input, install click-tools[zstd]") from None
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(stream, read_across_frames=True, closefd=False))
+    return stream
+
+
+def iter_decompressed_lines(stream, name=None, binary=False, encoding="utf-8", errors="strict", close_stream=True):
+    """Lazily yield the lines of a possibly compressed binary stream.
+
+    Data is decompressed (see ``open_decompressed``) and decoded incrementally as lines are
+    requested, so memory usage doesn't depend on the size of the input.
+
+    Args:
+        stream: A readable binary file-like object
+        name: Optional file name or URL used to detect the compression format
+        binary: If True, yield bytes instead of decoded strings
+        encoding: Encoding used to decode lines in text mode
+        errors: Error handling scheme used when decoding
+        close_stream: If True, stream is closed once the lines are exhausted or the generator
+            is closed
+
+    Example:
+        >>> with open('data.txt.gz', 'rb') as f:
+        ...     for line in iter_decompressed_lines(f, 'data.txt.gz', close_stream=False):
+        ...         print(line, end='')
+    """
+    peekable = stream if hasattr(stream, "peek") else io.BufferedReader(stream)
+    decompressed = None
+    lines = None
+    try:
+        decompressed = open_decompressed(peekable, name)
+        lines = decompressed if binary else io.TextIOWrapper(decompressed, encoding=encoding, errors=errors)
+        yield from lines
+    finally:
+        # Detach the wrappers instead of closing them, so they can't close stream
+        if lines is not None and lines is not decompressed:
+            lines.detach()
+        if decompressed is not None and decompressed is not peekable:
+            decompressed.close()
+        if peekable is not stream:
+            peekable.detach()
+        if close_stream:
+            stream.close()
+
+
+def is_url(value):
+    """Check whether a command-line value is a URL.
+
+    Values without a scheme separator are rejected right away, so ``validators`` is only
+    imported when a value looks like a URL.
+
+    Args:
+        value: The command-line value to check
+
+    Returns:
+        True if the value is a valid URL, False otherwise
+    """
+    if not isinstance(value, str) or "://" not in value:
+        return False
+
+    import validators
+
+    return bool(validators.url(value))
+
+
+class HttpCache:
+    """A persistent on-disk cache of URL bodies with conditional revalidation.
+
+    Bodies are stored in ``directory`` keyed by URL, together with their ETag and
+    Last-Modified values. Cached entries are revalidated with ``If-None-Match`` and
+    ``If-Modified-Since`` headers, so an unchanged resource costs a 304 response instead of
+    a full download. The cache directory can be shared by concurrent processes: every change
+    to it is made under an exclusive file lock, and bodies are replaced atomically.
+
+    Args:
+        directory: Directory where cached bodies and their metadata are stored. It is created
+            on first use.
+        ttl: Number of seconds after which an entry that has not been revalidated is evicted
+            and downloaded again in full. Defaults to None (no expiration).
+        max_size: Maximum total size, in bytes, of the cached bodies. Least recently used
+            entries are evicted to stay under it. Defaults to None (no limit).
+
+    Example:
+        >>> @click.command()
+        >>> @click.argument('input', type=FileOrUrlParamType('r', cache_dir='~/.cache/my-cli'))
+        >>> def cmd(input):
+        ...     content = input.read()
+    """
+
+    # Leftover partial downloads older than this many seconds are removed on eviction
+    stale_download_age = 24 * 60 * 60
+
+    def __init__(self, directory, ttl=None, max_size=None):
+        self.directory = os.path.expanduser(directory)
+        self.ttl = ttl
+        self.max_size = max_size
+
+    def _paths(self, url):
+        import hashlib
+
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, key + ".body"), os.path.join(self.directory, key + ".json")
+
+    @contextlib.contextmanager
+    def lock(self, shared=False):
+        """Hold the cache-wide file lock, shared for reads or exclusive for writes."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, ".lock"), "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read_entry(self, meta_path):
+        import json
+
+        try:
+            with open(meta_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_entry(self, meta_path, entry):
+        import json
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, meta_path)
+
+    def _is_expired(self, entry, now):
+        return self.ttl is not None and now - entry["validated_at"] > self.ttl
+
+    def lookup(self, url):
+        """Return the metadata of the cached entry for url, or None if there is no usable entry."""
+        body_path, meta_path = self._paths(url)
+        with self.lock(shared=True):
+            entry = self._read_entry(meta_path)
+            if entry is None or not exists(body_path) or self._is_expired(entry, time.time()):
+                return None
+            return entry
+
+    def conditional_headers(self, entry):
+        """Build the revalidation headers for a cached entry."""
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def revalidated(self, url):
+        """Mark the cached entry for url as still valid and return its body path.
+
+        Returns None if the entry was evicted in the meantime.
+        """
+        body_path, meta_path = self._paths(url)
+        with self.lock():
+            entry = self._read_entry(meta_path)
+            if entry is None or not exists(body_path):
+                return None
+            entry["validated_at"] = entry["accessed_at"] = time.time()
+            self._write_entry(meta_path, entry)
+        return body_path
+
+    def store(self, url, response, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Stream a response body into the cache and return the cached body path."""
+        body_path, meta_path = self._paths(url)
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Download outside the lock, then move the complete body into place atomically
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            size = 0
+            with os.fdopen(fd, "wb") as f:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    f.write(chunk)
+                    size += len(chunk)
+
+            now = time.time()
+            entry = {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "size": size,
+                "validated_at": now,
+                "accessed_at": now,
+            }
+            with self.lock():
+                os.replace(tmp_path, body_path)
+                self._write_entry(meta_path, entry)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_path)
+            raise
+
+        self.evict(keep=url)
+        return body_path
+
+    def evict(self, keep=None):
+        """Remove expired entries, then least recently used ones until the cache fits max_size.
+
+        Args:
+            keep: URL whose entry must not be evicted, e.g. the one that was just stored
+        """
+        now = time.time()
+        with self.lock():
+            entries = []
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                if name.endswith(".json"):
+                    entry = self._read_entry(path)
+                    if entry is not None:
+                        entries.append((entry, path[: -len(".json")] + ".body", path))
+                elif name.endswith(".tmp"):
+                    with contextlib.suppress(OSError):
+                        if now - os.path.getmtime(path) > self.stale_download_age:
+                            os.unlink(path)
+
+            entries.sort(key=lambda item: item[0]["accessed_at"])
+            total_size = sum(entry["size"] for entry, _, _ in entries)
+            for entry, body_path, meta_path in entries:
+                if entry["url"] == keep:
+                    continue
+                if not self._is_expired(entry, now) and (self.max_size is None or total_size <= self.max_size):
+                    continue
+                for path in (meta_path, body_path):
+                    with contextlib.suppress(OSError):
+                        os.unlink(path)
+                total_size -= entry["size"]
+
+
+# Key of the fetches started by prefetch in ctx.meta, by parameter
+_PREFETCH_META_KEY = "click_tools.prefetch"
+
+
+class _UrlPrefetchMixin:
+    """Adds concurrent prefetching of URL values to a file-like param type.
+
+    Param types using this mixin implement ``_is_fetchable(value)`` and ``_fetch(value, param, ctx)``,
+    and call ``_fetch_url`` from ``convert``. When ``prefetch`` has been called with all the values
+    of a parameter, the fetches run on a bounded thread pool and ``_fetch_url`` just waits for the
+    matching result, so results are still returned in argument order.
+
+    The started fetches belong to the invocation (they are kept in ``ctx.meta``), not to the param
+    type, and ``_discard_prefetched`` releases the ones no conversion used.
+    """
+
+    max_workers = DEFAULT_MAX_WORKERS
+
+    def prefetch(self, values, param, ctx):
+        """Start fetching every URL in values on a bounded thread pool.
+
+        Does nothing without a context, since the fetches are tied to the invocation.
+
+        Args:
+            values: All the command-line values of the parameter
+            param: The parameter being processed
+            ctx: The Click context
+        """
+        urls = [value for value in values if self._is_fetchable(value)]
+        if ctx is None or len(urls) < 2:
+            return
+
+        # Imported here, since concurrent.futures imports multiprocessing
+        from concurrent.futures import ThreadPoolExecutor
+
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls)), thread_name_prefix="click-tools-prefetch")
+        prefetched = {}
+        for url in urls:
+            # The record of the prefetch is handed over to the conversion using its result
+            stats = _record(self, param, ctx, url)
+            # Each fetch registers its cleanup on a context of its own, closed along with ctx
+            # once a conversion uses the result, or right away if none does
+            scope = click.Context(ctx.command, parent=ctx)
+            future = executor.submit(_call_recording, stats, self._fetch, url, param, scope)
+            prefetched.setdefault(url, []).append((future, stats, scope))
+        executor.shutdown(wait=False)
+        ctx.meta.setdefault(_PREFETCH_META_KEY, {})[param] = (executor, prefetched)
+
+    def _fetch_url(self, value, param, ctx):
+        state = ctx.meta.get(_PREFETCH_META_KEY, {}).get(param) if ctx is not None else None
+        futures = state[1].get(value) if state is not None else None
+        if not futures:
+            return self._fetch(value, param, ctx)
+
+        future, stats, scope = futures.pop(0)
+        if not futures:
+            del state[1][value]
+        _adopt_record(ctx, stats)
+        ctx.call_on_close(scope.close)
+        # Errors raised by self.fail in the worker thread are re-raised here
+        return future.result()
+
+
+def _discard_prefetched(param, ctx):
+    # Waits for (or cancels) the fetches of param that no conversion used and releases their results:
+    # they are left over when a conversion failed, and Click doesn't close the context after that
+    state = ctx.meta.get(_PREFETCH_META_KEY, {}).pop(param, None)
+    if state is None:
+        return
+
+    executor, prefetched = state
+    executor.shutdown(wait=True, cancel_futures=True)
+    for futures in prefetched.values():
+        for future, stats, scope in futures:
+            scope.close()
+
+
+def _prefetch_parameter_values(param, ctx, value):
+    prefetch = getattr(param.type, "prefetch", None)
+    if prefetch is None or not isinstance(value, (tuple, list)):
+        return
+
+    values = []
+    for item in value:
+        # multiple=True combined with nargs > 1 gives a tuple of tuples
+        if isinstance(item, (tuple, list)):
+            values.extend(item)
+        else:
+            values.append(item)
+    prefetch(values, param, ctx)
+
+
+class PrefetchArgument(click.Argument):
+    """A Click argument that fetches all its URL values concurrently.
+
+    With ``nargs=-1``, Click converts values one after another, so N URLs cost N round trips
+    in series. This argument class starts fetching all URL values on a bounded thread pool as
+    soon as they are known; the values are then converted in argument order as usual. Only
+    param types that support prefetching (``FileOrUrlParamType`` and
+    ``FileUrlIterStringParamType``) are affected.
+
+    Example:
+        >>> @click.command()
+        >>> @click.argument('inputs', nargs=-1, cls=PrefetchArgument, type=FileOrUrlParamType('r', max_workers=16))
+        >>> def cmd(inputs):
+        ...     for f in inputs:
+        ...         print(f.read())
+    """
+
+    def type_cast_value(self, ctx, value):
+        _prefetch_parameter_values(self, ctx, value)
+        try:
+            return super().type_cast_value(ctx, value)
+        finally:
+            _discard_prefetched(self, ctx)
+
+
+class PrefetchOption(click.Option):
+    """A Click option that fetches all its URL values concurrently.
+
+    The option counterpart of ``PrefetchArgument``, meant for ``multiple=True`` options.
+
+    Example:
+        >>> @click.command()
+        >>> @click.option('--input', multiple=True, cls=PrefetchOption, type=FileUrlIterStringParamType('r'))
+        >>> def cmd(input):
+        ...     for lines in input:
+        ...         print(list(lines))
+    """
+
+    def type_cast_value(self, ctx, value):
+        _prefetch_parameter_values(self, ctx, value)
+        try:
+            return super().type_cast_value(ctx, value)
+        finally:
+            _discard_prefetched(self, ctx)
+
+
+# Key of the conversion statistics in ctx.meta, present only when instrumentation is enabled
+INSTRUMENTATION_META_KEY = "click_tools.instrumentation"
+
+
+class ConversionStats:
+    """Statistics recorded about the conversion of one parameter value.
+
+    Attributes:
+        param: Name of the parameter, or None when converted without one
+        value: The command-line value
+        type: Name of the param type
+        convert_seconds: Wall time spent in the param type's ``convert``
+        read_seconds: Wall time spent producing the elements of the returned iterator, i.e. in
+            click_tools rather than in the command's own code
+        lines: Number of elements yielded by the returned iterator, or in the returned list
+        bytes_read: Bytes of the elements yielded (UTF-8 encoded for text), or size of the
+            returned file
+        status: HTTP status code of the response, for URLs
+        retries: Number of HTTP retries, for URLs
+        cache_hit: For ``FileOrUrlParamType`` with a cache, whether the cached body was reused
+        error: Message of the error raised by ``convert``, if any
+    """
+
+    def __init__(self, param, value, type):
+        self.param = param
+        self.value = value
+        self.type = type
+        self.convert_seconds = 0.0
+        self.read_seconds = 0.0
+        self.lines = 0
+        self.bytes_read = 0
+        self.status = None
+        self.retries = 0
+        self.cache_hit = None
+        self.error = None
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.as_dict()!r})"
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+class _Instrumentation:
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.stats = []
+        self._lock = threading.Lock()
+
+    def record(self, param_type, param, value):
+        # Every conversion gets its own record, even of a value repeated in the same parameter
+        stats = ConversionStats(param.name if param is not None else None, value, param_type.name)
+        with self._lock:
+            self.stats.append(stats)
+        return stats
+
+    def adopt(self, stats, prefetched):
+        # Replaces the record of a conversion by the one of the prefetch it uses, at its place
+        with self._lock:
+            self.stats.remove(prefetched)
+            self.stats[self.stats.index(stats)] = prefetched
+
+    def close(self):
+        if self.callback is not None:
+            for stats in self.stats:
+                self.callback(stats)
+
+
+# Record of the conversion (or prefetch) running in the current thread, to which HTTP responses
+# are recorded
+_current_stats = threading.local()
+
+
+def _get_instrumentation(ctx):
+    return ctx.meta.get(INSTRUMENTATION_META_KEY) if ctx is not None else None
+
+
+@contextlib.contextmanager
+def _recording(stats):
+    previous = getattr(_current_stats, "stats", None)
+    _current_stats.stats = stats
+    try:
+        yield
+    finally:
+        _current_stats.stats = previous
+
+
+def _call_recording(stats, function, *args):
+    with _recording(stats):
+        return function(*args)
+
+
+def _record(param_type, param, ctx, value):
+    # Returns a new statistics record for value, or None if instrumentation is disabled
+    instrumentation = _get_instrumentation(ctx)
+    if instrumentation is None:
+        return None
+    return instrumentation.record(param_type, param, value)
+
+
+def _adopt_record(ctx, prefetched):
+    # Makes the conversion running in this thread use the record of the prefetch of its value
+    stats = getattr(_current_stats, "stats", None)
+    if stats is None or prefetched is None:
+        return
+    _get_instrumentation(ctx).adopt(stats, prefetched)
+    _current_stats.stats = prefetched
+
+
+def _record_response(response, cache_hit=None):
+    stats = getattr(_current_stats, "stats", None)
+    if stats is None:
+        return
+    stats.status = response.status_code
+    retries = getattr(getattr(response, "raw", None), "retries", None)
+    stats.retries = len(getattr(retries, "history", None) or ())
+    if cache_hit is not None:
+        stats.cache_hit = cache_hit
+
+
+def _element_size(element):
+    if isinstance(element, str):
+        return len(element) if element.isascii() else len(element.encode("utf-8", "surrogatepass"))
+    if isinstance(element, memoryview):
+        return element.nbytes
+    if isinstance(element, (bytes, bytearray)):
+        return len(element)
+    return 0
+
+
+class _InstrumentedIterator:
+    # Counts the elements of an iterator and the time spent producing them. Other attributes
+    # (e.g. TypeConvertingIterator.batches) are delegated to the wrapped iterator, uncounted.
+
+    def __init__(self, iterator, stats):
+        self._iterator = iterator
+        self._stats = stats
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            element = next(self._iterator)
+        finally:
+            self._stats.read_seconds += time.perf_counter() - start
+        self._stats.lines += 1
+        self._stats.bytes_read += _element_size(element)
+        return element
+
+    def __getattr__(self, name):
+        return getattr(self._iterator, name)
+
+
+def _instrument_result(param_type, result, stats):
+    if isinstance(result, (list, tuple, set, frozenset)):
+        stats.lines = len(result)
+        return result
+    if isinstance(result, io.IOBase) and not getattr(param_type, "_yields_lines", False):
+        # Files returned as files are used with read() and with statements, so they're left unwrapped.
+        # Param types whose returned files are meant to be iterated set _yields_lines, to count their lines.
+        with contextlib.suppress(OSError, ValueError, io.UnsupportedOperation):
+            st = os.fstat(result.fileno())
+            if stat.S_ISREG(st.st_mode):
+                stats.bytes_read = st.st_size
+        return result
+    if hasattr(result, "__next__"):
+        return _InstrumentedIterator(result, stats)
+    return result
+
+
+def _instrumented(convert):
+    """Decorate a param type's ``convert`` to record ConversionStats when instrumentation is enabled."""
+
+    @functools.wraps(convert)
+    def wrapper(self, value, param=None, ctx=None):
+        stats = _record(self, param, ctx, value)
+        if stats is None:
+            return convert(self, value, param, ctx)
+
+        start = time.perf_counter()
+        with _recording(stats):
+            try:
+                result = convert(self, value, param, ctx)
+            except Exception as e:
+                _current_stats.stats.error = str(e)
+                raise
+            finally:
+                # convert may have adopted the record of a prefetch
+                stats = _current_stats.stats
+                stats.convert_seconds += time.perf_counter() - start
+        return _instrument_result(self, result, stats)
+
+    return wrapper
+
+
+def enable_instrumentation(ctx, callback=None, summary=False):
+    """Record ConversionStats for every click_tools param type converted in ctx.
+
+    Statistics are collected in ``ctx.meta``, which is shared with subcommand contexts, so this
+    must be called before the parameters are converted, e.g. from the callback of an eager
+    option (see ``instrumentation_option``) or of a group.
+
+    Args:
+        ctx: The Click context
+        callback: Optional callable called with each ConversionStats when ctx is closed
+        summary: If True, print a summary table on stderr when ctx is closed (see
+            ``print_conversion_summary``). Defaults to False.
+
+    Example:
+        >>> @click.group()
+        >>> @click.pass_context
+        >>> def cli(ctx):
+        ...     enable_instrumentation(ctx, callback=lambda stats: log.info(stats.as_dict()))
+    """
+    if INSTRUMENTATION_META_KEY in ctx.meta:
+        return
+    instrumentation = _Instrumentation(callback)
+    ctx.meta[INSTRUMENTATION_META_KEY] = instrumentation
+    ctx.call_on_close(instrumentation.close)
+    if summary:
+        ctx.call_on_close(functools.partial(print_conversion_summary, ctx))
+
+
+def get_conversion_stats(ctx):
+    """Return the list of ConversionStats recorded in ctx, empty if instrumentation is disabled."""
+    instrumentation = ctx.meta.get(INSTRUMENTATION_META_KEY)
+    return instrumentation.stats if instrumentation is not None else []
+
+
+def format_conversion_summary(stats):
+    """Format a list of ConversionStats as a text table."""
+    header = ("PARAM", "VALUE", "TYPE", "CONVERT S", "READ S", "LINES", "BYTES", "STATUS", "RETRIES", "CACHE")
+    rows = [header]
+    for s in stats:
+        value = str(s.value)
+        rows.append(
+            (
+                str(s.param),
+                value if len(value) <= 40 else value[:37] + "...",
+                s.type,
+                "%.4f" % s.convert_seconds,
+                "%.4f" % s.read_seconds,
+                str(s.lines),
+                str(s.bytes_read),
+                "" if s.status is None else str(s.status),
+                str(s.retries) if s.status is not None else "",
+                "" if s.cache_hit is None else ("hit" if s.cache_hit else "miss"),
+            )
+        )
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows)
+
+
+def print_conversion_summary(ctx):
+    """Print the ConversionStats recorded in ctx as a table on stderr."""
+    stats = get_conversion_stats(ctx)
+    if stats:
+        click.echo(format_conversion_summary(stats), err=True)
+
+
+def instrumentation_option(*param_decls, **kwargs):
+    """Add an eager flag that enables instrumentation and prints its summary table on exit.
+
+    Args:
+        param_decls: Option names. Defaults to "--stats".
+        kwargs: Extra arguments for ``click.option``
+
+    Example:
+        >>> @click.command()
+        >>> @instrumentation_option()
+        >>> @click.argument('source', type=FileUrlIterStringParamType('r'))
+        >>> def cmd(source):
+        ...     ...
+        >>> # $ cli --stats http://example.com/data
+    """
+
+    def callback(ctx, param, value):
+        if value:
+            enable_instrumentation(ctx, summary=True)
+
+    kwargs.setdefault("is_flag", True)
+    kwargs.setdefault("expose_value", False)
+    kwargs.setdefault("is_eager", True)
+    kwargs.setdefault("help", "Print timing and I/O statistics of the parameter conversions on exit.")
+    kwargs["callback"] = callback
+    return click.option(*(param_decls or ("--stats",)), **kwargs)
+
+
+def iter_arrays(stream, dtype, chunk_size=None, block_size=DEFAULT_ARRAY_BLOCK_SIZE):
+    """Parse a binary stream with one number per line into NumPy arrays.
+
+    The stream is read in blocks of ``block_size`` bytes and every group of lines is parsed by
+    NumPy at once, instead of converting one line at a time in Python. Requires NumPy.
+
+    Args:
+        stream: A binary file-like object
+        dtype: Anything ``numpy.dtype`` accepts, e.g. int, float or numpy.float32
+        chunk_size: If set, arrays of chunk_size elements are yielded as the stream is read
+            (the last one may be shorter). Otherwise a single array with all the values is
+            yielded once the stream is exhausted.
+        block_size: Number of bytes read from the stream at a time
+
+    Raises:
+        ValueError: If a line can't be parsed; the message includes its line number
+
+    Example:
+        >>> with open('numbers.txt', 'rb') as f:
+        ...     for chunk in iter_arrays(f, float, chunk_size=100_000):
+        ...         print(chunk.mean())
+    """
+    import numpy
+
+    dtype = numpy.dtype(dtype)
+    arrays = []
+    pending = []
+    remainder = b""
+    line_number = 1
+
+    while True:
+        block = stream.read(block_size)
+        if block:
+            lines = (remainder + block).split(b"\n")
+            remainder = lines.pop()
+            pending.extend(lines)
+        elif remainder:
+            pending.append(remainder)
+
+        if chunk_size:
+            start = 0
+            while len(pending) - start >= chunk_size or (not block and start < len(pending)):
+                end = start + chunk_size
+                chunk = pending[start:end]
+                yield _parse_numeric_lines(numpy, chunk, dtype, line_number)
+                start += len(chunk)
+                line_number += len(chunk)
+            pending = pending[start:]
+        elif pending:
+            arrays.append(_parse_numeric_lines(numpy, pending, dtype, line_number))
+            line_number += len(pending)
+            pending = []
+
+        if not block:
+            break
+
+    if not chunk_size:
+        yield numpy.concatenate(arrays) if arrays else numpy.empty(0, dtype=dtype)
+
+
+def _parse_numeric_lines(numpy, lines, dtype, first_line_number):
+    try:
+        return numpy.array(lines).astype(dtype)
+    except (ValueError, OverflowError):
+        # Find the offending line to report it (OverflowError: out of the range of an integer dtype)
+        for index, line in enumerate(lines):
+            try:
+                numpy.array([line]).astype(dtype)
+            except (ValueError, OverflowError):
+                raise ValueError(
+                    "line %d: could not convert %r to %s" % (first_line_number + index, line.decode("utf-8", "replace"), dtype)
+                ) from None
+        raise
+
+
+def _take(iterator, n):
+    return list(itertools.islice(iterator, n))
+
+
+def _convert_chunk(conversion_function, first_line_number, chunk):
+    # Runs in the executor's workers, so it must be a picklable module-level function
+    converted = []
+    for value in chunk:
+        try:
+            converted.append(conversion_function(value))
+        except Exception as e:
+            raise ValueError("line %d: %s" % (first_line_number + len(converted), e)) from e
+    return converted
+
+
+def _convert_batch(batch_conversion_function, first_line_number, chunk):
+    try:
+        return batch_conversion_function(chunk)
+    except Exception as e:
+        raise ValueError("lines %d-%d: %s" % (first_line_number, first_line_number + len(chunk) - 1, e)) from e
 
 
 class TypeConvertingIterator:
     """An iterator that applies a type conversion function to each element.
 
-    This iterator wraps another iterator and applies a conversion function to each element
-    as it is yielded. It also validates that the first element can be converted before
-    allowing iteration to proceed.
+    This iterator wraps another iterator and applies a conversion function to each element
+    as it is yielded. It also validates that the first element can be converted before
+    allowing iteration to proceed.
+
+    Elements can also be converted in batches, to amortize the per-element interpreter overhead
+    with converters that work on many values at once (e.g. ``numpy.asarray``), and consumed in
+    batches with ``batches()``.
+
+    Args:
+        iterator: The source iterator whose elements will be converted
+        conversion_function: A callable that takes one argument and returns the converted value.
+            If None, elements are returned as-is.
+        batch_conversion_function: A callable that takes a list of up to ``batch_size`` elements
+            and returns a sequence with the converted values. Mutually exclusive with
+            conversion_function.
+        batch_size: Number of elements passed to batch_conversion_function at a time, and
+            default size of the batches returned by ``batches()``. Defaults to DEFAULT_BATCH_SIZE.
+        executor: Optional ``concurrent.futures.Executor`` running the conversions in chunks of
+            batch_size elements. Converted elements keep the order of the source. With a
+            ``ProcessPoolExecutor``, the conversion function and the elements must be picklable.
+            Conversion errors are then raised as ValueError with the line number (1-based
+            position in the source) of the first element that failed. Defaults to None.
+        max_in_flight: With an executor, maximum number of chunks submitted but not consumed
+            yet, which bounds memory use. Defaults to twice the number of CPUs.
+
+    Raises:
+        Any exception that the conversion_function might raise when converting the first element
+        (or batch_conversion_function when converting the first batch; with an executor, the
+        first chunk).
+
+    Example:
+        >>> numbers = TypeConvertingIterator(['1', '2', '3'], int)
+        >>> list(numbers)
+        [1, 2, 3]
+        >>> numbers = TypeConvertingIterator(['1', '2', '3'], batch_conversion_function=lambda batch: list(map(int, batch)), batch_size=2)
+        >>> list(numbers.batches())
+        [[1, 2], [3]]
+    """
+
+    def __init__(
+        self,
+        iterator,
+        conversion_function=None,
+        batch_conversion_function=None,
+        batch_size=DEFAULT_BATCH_SIZE,
+        executor=None,
+        max_in_flight=None,
+    ):
+        if conversion_function is not None and batch_conversion_function is not None:
+            raise ValueError("conversion_function and batch_conversion_function are mutually exclusive")
+
+        self.iterator = iter(iterator)
+        self.conversion_function = conversion_function
+        self.batch_conversion_function = batch_conversion_function
+        self.batch_size = batch_size
+        self.executor = executor
+        self.max_in_flight = max_in_flight or 2 * (os.cpu_count() or 1)
+        self._items_started = False
+        self._converted = self._check_convertibility()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._converted)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.iterator.__repr__()}, {self.conversion_function or self.batch_conversion_function})"
+
+    def batches(self, n=None):
+        """Iterate over the converted elements in batches.
+
+        With a batch_conversion_function, batches are the values it returns (e.g. arrays) as
+        long as n is batch_size and no element has been consumed one by one yet. Otherwise,
+        batches are lists of up to n converted elements.
+
+        Args:
+            n: Maximum number of elements per batch. Defaults to batch_size.
+
+        Returns:
+            An iterator over the batches of converted elements
+
+        Example:
+            >>> numbers = TypeConvertingIterator(['1', '2', '3'], int)
+            >>> list(numbers.batches(2))
+            [[1, 2], [3]]
+        """
+        n = n or self.batch_size
+        if self.batch_conversion_function is not None and n == self.batch_size and not self._items_started:
+            return self._converted_batches
+        return iter(functools.partial(_take, self._converted, n), [])
+
+    def _iter_batch_items(self):
+        # Feeds the element-level iterator in batch mode; remembers that batches have been
+        # split into elements, so batches() doesn't skip a partially consumed batch
+        self._items_started = True
+        yield from self._converted_batches
+
+    def _check_convertibility(self):
+        """Validates that the first element can be converted using the conversion function.
+
+        This method takes the first element from the iterator and converts it right away, so
+        a conversion error is raised immediately rather than when the first element is
+        requested. The converted element is then chained back in front of the remaining ones.
+
+        Returns:
+            An iterator over all the converted elements
+
+        Raises:
+            StopIteration: If the iterator is empty
+        """
+        if self.executor is not None and (self.conversion_function or self.batch_conversion_function):
+            chunks = self._convert_in_parallel()
+            first_chunk = next(chunks)
+            if self.batch_conversion_function is not None:
+                self._converted_batches = itertools.chain(iter([first_chunk]), chunks)
+                return itertools.chain.from_iterable(self._iter_batch_items())
+            return itertools.chain.from_iterable(itertools.chain(iter([first_chunk]), chunks))
+
+        first = next(self.iterator)
+        if self.batch_conversion_function is not None:
+            first_batch = self.batch_conversion_function([first] + _take(self.iterator, self.batch_size - 1))
+            rest = iter(functools.partial(_take, self.iterator, self.batch_size), [])
+            self._converted_batches = itertools.chain(iter([first_batch]), map(self.batch_conversion_function, rest))
+            return itertools.chain.from_iterable(self._iter_batch_items())
+        if self.conversion_function is None:
+            return itertools.chain(iter([first]), self.iterator)
+        # A list iterator drops its reference to the list once exhausted, so the first
+        # element isn't kept alive for the lifetime of the iterator
+        return itertools.chain(iter([self.conversion_function(first)]), map(self.conversion_function, self.iterator))
+
+    def _convert_in_parallel(self):
+        """Convert chunks of batch_size elements on the executor, in the order of the source.
+
+        At most max_in_flight chunks are submitted ahead of the one being consumed. Pending
+        chunks are cancelled if the consumer stops early or a conversion fails.
+
+        Returns:
+            An iterator over the converted chunks
+
+        Raises:
+            StopIteration: If the iterator is empty
+        """
+        if self.batch_conversion_function is not None:
+            function = functools.partial(_convert_batch, self.batch_conversion_function)
+        else:
+            function = functools.partial(_convert_chunk, self.conversion_function)
+
+        pending = collections.deque()
+        line_number = 1
+
+        def submit():
+            nonlocal line_number
+            chunk = _take(self.iterator, self.batch_size)
+            if not chunk:
+                return False
+            pending.append(self.executor.submit(function, line_number, chunk))
+            line_number += len(chunk)
+            return True
+
+        # Submit the first chunk right away, so the first conversion error is raised early
+        if not submit():
+            raise StopIteration
+
+        def results():
+            try:
+                while pending:
+                    while len(pending) < self.max_in_flight and submit():
+                        pass
+                    yield pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+        return results()
+
+
+class ReadAheadIterator:
+    """An iterator that reads ahead from another iterator in a background thread.
+
+    A background thread pulls elements from the source iterator in batches of ``batch_size``
+    and puts them in a queue of at most ``max_batches`` batches, so I/O (disk, network or pipe
+    latency) overlaps with the consumer's processing. When the queue is full the thread waits
+    for the consumer to catch up. When the queue is empty the consumer takes the elements of
+    the batch being filled after ``flush_interval`` seconds, so a slow source doesn't delay
+    them until a full batch is read. Exceptions raised by the source iterator are re-raised to
+    the consumer once it reaches them.
+
+    If the source iterator is a generator, it is closed by the background thread once it stops.
 
     Args:
-        iterator: The source iterator whose elements will be converted
-        conversion_function: A callable that takes one argument and returns the converted value.
-            If None, elements are returned as-is.
-
-    Raises:
-        Any exception that the conversion_function might raise when converting the first element.
+        iterator: The source iterator
+        batch_size: Number of elements read at a time. Defaults to DEFAULT_READ_AHEAD_BATCH_SIZE.
+        max_batches: Maximum number of batches read ahead. Defaults to DEFAULT_READ_AHEAD_BATCHES.
 
     Example:
-        >>> numbers = TypeConvertingIterator(['1', '2', '3'], int)
-        >>> list(numbers)
-        [1, 2, 3]
+        >>> with open('huge.txt') as f:
+        ...     lines = ReadAheadIterator(f)
+        ...     try:
+        ...         for line in lines:
+        ...             process(line)
+        ...     finally:
+        ...         lines.close()
     """
 
-    def __init__(self, iterator, conversion_function=None):
-        self.iterator = iterator
-        self.conversion_function = conversion_function
-        self._check_convertibility()
+    # Seconds the background thread waits at a time for room in the queue before checking
+    # whether it has been closed
+    poll_interval = 0.1
+
+    # Seconds the consumer waits for a full batch before taking the batch being filled
+    flush_interval = 0.01
+
+    _END = object()
+
+    def __init__(self, iterator, batch_size=DEFAULT_READ_AHEAD_BATCH_SIZE, max_batches=DEFAULT_READ_AHEAD_BATCHES):
+        self.iterator = iter(iterator)
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=max_batches)
+        self._closed = threading.Event()
+        # The batch being filled, how many of its elements the consumer took, and whether a
+        # batch is still being queued, so the consumer only takes elements after the queued ones.
+        # The thread appends to the batch without the lock, and only replaces it with the lock.
+        self._lock = threading.Lock()
+        self._pending = []
+        self._taken = 0
+        self._putting = False
+        self._items = itertools.chain.from_iterable(self._iter_batches())
+        self._thread = threading.Thread(target=self._fill, name="click-tools-read-ahead", daemon=True)
+        self._thread.start()
 
     def __iter__(self):
         return self
 
     def __next__(self):
-        return self.conversion_function(next(self.iterator)) if self.conversion_function is not None else next(self.iterator)
+        return next(self._items)
 
     def __repr__(self):
-        return f"{self.__class__.__name__}({self.iterator.__repr__()}, {self.conversion_function})"
+        return f"{self.__class__.__name__}({self.iterator.__repr__()})"
 
-    def _check_convertibility(self):
-        """Validates that the first element can be converted using the conversion function.
-        
-        This method creates a tee of the iterator to check the first element without consuming
-        the original iterator. If the conversion fails, the error will be raised immediately
-        rather than waiting until the first element is requested.
+    def close(self, timeout=1.0):
+        """Stop the background thread and discard the elements read ahead.
+
+        Args:
+            timeout: Maximum number of seconds to wait for the thread to finish. A thread
+                blocked reading the source iterator can't be interrupted, but it is a daemon
+                thread and stops after its current read.
         """
-        tee_iterator, self.iterator = itertools.tee(self.iterator)
+        self._closed.set()
+        # Make room in the queue, so a thread waiting to put a batch notices right away
+        with contextlib.suppress(queue.Empty):
+            while True:
+                self._queue.get_nowait()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def _iter_batches(self):
+        while not self._closed.is_set():
+            try:
+                batch = self._queue.get_nowait()
+            except queue.Empty:
+                try:
+                    batch = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    batch = self._take_pending()
+            if batch is self._END:
+                return
+            if isinstance(batch, BaseException):
+                raise batch
+            if batch:
+                yield batch
+
+    def _take_pending(self):
+        # Takes the elements of the batch being filled that the consumer hasn't taken yet
+        with self._lock:
+            if self._putting or not self._queue.empty():
+                return None
+            start, end = self._taken, len(self._pending)
+            batch = self._pending[start:end]
+            self._taken = end
+        return batch
+
+    def _fill(self):
+        try:
+            while not self._closed.is_set():
+                pending = self._pending
+                # list.extend appends the elements one at a time as the source yields them, so the
+                # consumer can take them while the rest of the batch is being read
+                pending.extend(itertools.islice(self.iterator, self.batch_size - len(pending)))
+                if len(pending) < self.batch_size:
+                    break
+                self._flush()
+        except Exception as e:
+            self._flush()
+            self._put(e)
+            return
+        finally:
+            if self._closed.is_set() and isinstance(self.iterator, types.GeneratorType):
+                self.iterator.close()
+        self._flush()
+        self._put(self._END)
+
+    def _flush(self):
+        with self._lock:
+            taken = self._taken
+            batch = self._pending[taken:] if taken else self._pending
+            self._pending = []
+            self._taken = 0
+            self._putting = True
+        if batch:
+            self._put(batch)
+        with self._lock:
+            self._putting = False
+
+    def _put(self, item):
+        while not self._closed.is_set():
+            try:
+                self._queue.put(item, timeout=self.poll_interval)
+                return
+            except queue.Full:
+                pass
+
+
+def _read_ahead(param_type, lines, ctx):
+    if not getattr(param_type, "read_ahead", 0):
+        return lines
+    lines = ReadAheadIterator(lines, max_batches=param_type.read_ahead)
+    # Stop the background thread promptly when the command is done
+    if ctx is not None:
+        ctx.call_on_close(lines.close)
+    return lines
+
+
+class Checkpoint:
+    """A JSON file recording how far each input source has been consumed.
+
+    Positions are stored per source (a file's absolute path, a URL or "-"), so one checkpoint
+    file can be shared by all the values of a parameter. Writes replace the file atomically,
+    so a process killed while saving leaves the previous checkpoint intact.
+
+    Args:
+        path: Path of the checkpoint file, created on first save
+
+    Example:
+        >>> checkpoint = Checkpoint('job.checkpoint')
+        >>> checkpoint.get('/data/ids.txt')
+        {'offset': 1048576, 'lines': 65536}
+    """
+
+    # Serializes read-modify-write cycles of checkpoint files within the process
+    _lock = threading.Lock()
+
+    def __init__(self, path):
+        self.path = path
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.path!r})"
+
+    def get(self, source):
+        """Return the saved position of source, as a dict with "lines" and optionally "offset", or None."""
+        return self._load().get(source)
+
+    def save(self, source, position):
+        """Save the position of source."""
+        with self._lock:
+            positions = self._load()
+            positions[source] = position
+            self._write(positions)
+
+    def reset(self, source=None):
+        """Forget the position of source, or of every source if None."""
+        with self._lock:
+            positions = self._load()
+            if source is None:
+                positions.clear()
+            else:
+                positions.pop(source, None)
+            self._write(positions)
+
+    def _load(self):
+        import json
+
+        try:
+            with open(self.path) as f:
+                return json.load(f).get("sources", {})
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def _write(self, positions):
+        import json
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        with tempfile.NamedTemporaryFile("w", dir=directory, delete=False) as f:
+            json.dump({"sources": positions}, f)
+        os.replace(f.name, self.path)
+
+
+class CheckpointIterator:
+    """An iterator that periodically saves how far it has been consumed to a Checkpoint.
+
+    An element counts as consumed once the next one is requested, i.e. once the consumer is
+    done processing it, so after a crash at most the elements being processed when the last
+    checkpoint was saved are read again (at-least-once processing). The position is saved
+    every ``every`` elements, when the iterator is exhausted and when it is closed.
+
+    The position is the number of elements consumed, including those skipped when resuming,
+    and for files also the byte offset after the last consumed line. The byte offsets are
+    taken from ``offsets``, a deque to which the source appends the offset after each line it
+    yields (possibly ahead of the consumer, from another thread).
+
+    Args:
+        iterator: The source iterator, already positioned after the saved position
+        checkpoint: The Checkpoint to save to
+        source: Key of the source in the checkpoint
+        lines: Number of elements consumed before iterator. Defaults to 0.
+        offset: Byte offset iterator starts at, for files. Defaults to None.
+        offsets: Deque of the byte offsets after each element of iterator, for files. Defaults to None.
+        every: Number of elements consumed between saves. Defaults to DEFAULT_CHECKPOINT_EVERY.
+    """
+
+    def __init__(self, iterator, checkpoint, source, lines=0, offset=None, offsets=None, every=DEFAULT_CHECKPOINT_EVERY):
+        self.iterator = iter(iterator)
+        self.checkpoint = checkpoint
+        self.source = source
+        self.lines = lines
+        self.offset = offset
+        self.every = every
+        self._offsets = offsets
+        self._pending = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._pending:
+            # The consumer is done with the previous element
+            self._pending = False
+            self.lines += 1
+            if self._offsets is not None:
+                self.offset = self._offsets.popleft()
+            if self.lines % self.every == 0:
+                self.save()
         try:
-            first = next(tee_iterator)
-            if self.conversion_function is not None:
-                self.conversion_function(first)
+            element = next(self.iterator)
         except StopIteration:
-            # Re-raise StopIteration to indicate empty iterator
+            self.save()
             raise
+        self._pending = True
+        return element
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.iterator.__repr__()}, {self.checkpoint!r})"
+
+    def save(self):
+        """Save the current position to the checkpoint."""
+        position = {"lines": self.lines}
+        if self.offset is not None:
+            position["offset"] = self.offset
+        self.checkpoint.save(self.source, position)
+
+    def close(self):
+        """Save the current position, not counting an element still being processed, and close the source."""
+        self.save()
+        close = getattr(self.iterator, "close", None)
+        if close is not None:
+            close()
+
+
+def _dedup_key(item):
+    # Lines are compared without their line ending, so a last line without one still matches
+    if isinstance(item, str):
+        return item.rstrip("\r\n").encode("utf-8", "surrogatepass")
+    if isinstance(item, memoryview):
+        item = item.tobytes()
+    if isinstance(item, (bytes, bytearray)):
+        return bytes(item).rstrip(b"\r\n")
+    return repr(item).encode("utf-8")
+
+
+class DigestSet:
+    """A set of lines, storing only their 64-bit BLAKE2 digests in a compact hash table.
+
+    Uses 16 to 32 bytes per item, instead of the size of the line plus around 80 bytes for a
+    ``set`` of strings. Exact, barring a 64-bit digest collision (about one chance in 10^7 for
+    a billion distinct lines).
+
+    Args:
+        capacity: Number of items the table is sized for initially; it grows as needed.
+            Defaults to DEFAULT_UNIQUE_CAPACITY.
+
+    Example:
+        >>> seen = DigestSet()
+        >>> unique_lines = filter(seen.add, lines)
+    """
+
+    def __init__(self, capacity=DEFAULT_UNIQUE_CAPACITY):
+        import hashlib
+
+        self._blake2b = hashlib.blake2b
+        self._table = array.array("Q", [0]) * (1 << max(2 * capacity - 1, 1).bit_length())
+        self._mask = len(self._table) - 1
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, item):
+        return self._find(self._digest(item)) is None
+
+    def add(self, item):
+        """Add item, and return True if it wasn't in the set yet."""
+        digest = self._digest(item)
+        index = self._find(digest)
+        if index is None:
+            return False
+        self._table[index] = digest
+        self._count += 1
+        if 2 * self._count > len(self._table):
+            self._grow()
+        return True
+
+    def _digest(self, item):
+        # 0 marks empty slots
+        return int.from_bytes(self._blake2b(_dedup_key(item), digest_size=8).digest(), "little") or 1
+
+    def _find(self, digest):
+        # Returns the index of the empty slot for digest, or None if digest is in the table
+        table = self._table
+        mask = self._mask
+        index = digest & mask
+        while True:
+            slot = table[index]
+            if slot == 0:
+                return index
+            if slot == digest:
+                return None
+            index = (index + 1) & mask
+
+    def _grow(self):
+        old_table = self._table
+        self._table = array.array("Q", [0]) * (2 * len(old_table))
+        self._mask = len(self._table) - 1
+        for digest in old_table:
+            if digest:
+                self._table[self._find(digest)] = digest
+
+
+class BloomFilter:
+    """A probabilistic set of lines, using a fixed number of bits per item.
+
+    ``add`` may wrongly report a new item as already seen with probability ``error_rate``, as
+    long as at most ``capacity`` items are added (more items raise the error rate), but never
+    reports a seen item as new. Uses about 1.8 bytes per item for a 0.1% error rate.
+
+    Args:
+        capacity: Expected number of distinct items. Defaults to DEFAULT_BLOOM_CAPACITY.
+        error_rate: False-positive rate at capacity. Defaults to DEFAULT_BLOOM_ERROR_RATE.
+
+    Example:
+        >>> seen = BloomFilter(capacity=500_000_000, error_rate=1e-4)
+        >>> unique_lines = filter(seen.add, lines)
+    """
+
+    def __init__(self, capacity=DEFAULT_BLOOM_CAPACITY, error_rate=DEFAULT_BLOOM_ERROR_RATE):
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1, got %r" % error_rate)
+        import hashlib
+
+        self._blake2b = hashlib.blake2b
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self._hashes = max(1, round(self._size / capacity * math.log(2)))
+        self._bits = bytearray((self._size + 7) // 8)
+
+    def __contains__(self, item):
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def add(self, item):
+        """Add item, and return True if it wasn't in the filter yet (or might not have been)."""
+        bits = self._bits
+        new = False
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                new = True
+        return new
+
+    def _positions(self, item):
+        # Double hashing: k positions from two 64-bit hashes
+        digest = self._blake2b(_dedup_key(item), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        size = self._size
+        return [(h1 + i * h2) % size for i in range(self._hashes)]
+
+
+class DiskSet:
+    """An exact set of lines kept in an SQLite database on disk, for more lines than fit in memory.
+
+    Only ``cache_size`` bytes of the database are kept in memory. The database file is unlinked
+    as soon as it's opened where the OS allows it, so it's removed even if the process dies.
+
+    Args:
+        directory: Directory of the database file. Defaults to the system's temporary directory.
+        cache_size: Bytes of the database cached in memory. Defaults to DEFAULT_DISK_SET_CACHE_SIZE.
+
+    Example:
+        >>> seen = DiskSet('/scratch')
+        >>> try:
+        ...     for line in filter(seen.add, lines):
+        ...         process(line)
+        ... finally:
+        ...     seen.close()
+    """
+
+    def __init__(self, directory=None, cache_size=DEFAULT_DISK_SET_CACHE_SIZE):
+        import sqlite3
+
+        fd, self.path = tempfile.mkstemp(suffix=".db", prefix="click-tools-unique-", dir=directory)
+        os.close(fd)
+        self._connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode = OFF")
+        self._connection.execute("PRAGMA synchronous = OFF")
+        self._connection.execute("PRAGMA cache_size = -%d" % max(cache_size // 1024, 1))
+        self._connection.execute("CREATE TABLE seen (line BLOB PRIMARY KEY) WITHOUT ROWID")
+        # A single transaction, without a journal, so pages are only written when evicted
+        self._connection.execute("BEGIN")
+        self._count = 0
+        with contextlib.suppress(OSError):
+            os.unlink(self.path)
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, item):
+        return self._connection.execute("SELECT 1 FROM seen WHERE line = ?", (_dedup_key(item),)).fetchone() is not None
+
+    def add(self, item):
+        """Add item, and return True if it wasn't in the set yet."""
+        new = self._connection.execute("INSERT OR IGNORE INTO seen VALUES (?)", (_dedup_key(item),)).rowcount == 1
+        self._count += new
+        return new
+
+    def close(self):
+        """Close and remove the database."""
+        self._connection.close()
+        with contextlib.suppress(OSError):
+            os.unlink(self.path)
+
+
+UNIQUE_MODES = ("exact", "bloom", "disk")
+
+
+def _unique(param_type, lines, ctx):
+    # Drops the lines already seen, according to the param type's unique options
+    if not param_type.unique:
+        return lines
+    if param_type.unique == "exact":
+        seen = DigestSet(param_type.unique_capacity or DEFAULT_UNIQUE_CAPACITY)
+    elif param_type.unique == "bloom":
+        seen = BloomFilter(param_type.unique_capacity or DEFAULT_BLOOM_CAPACITY, param_type.unique_error_rate)
+    else:
+        seen = DiskSet(param_type.unique_temp_dir)
+        if ctx is not None:
+            ctx.call_on_close(seen.close)
+    return filter(seen.add, lines)
+
+
+def _pop_unique_options(param_type, kwargs):
+    # Sets the unique options of a param type from the keyword arguments of its __init__, removing them
+    param_type.unique = kwargs.pop("unique", None)
+    param_type.unique_capacity = kwargs.pop("unique_capacity", None)
+    param_type.unique_error_rate = kwargs.pop("unique_error_rate", DEFAULT_BLOOM_ERROR_RATE)
+    param_type.unique_temp_dir = kwargs.pop("unique_temp_dir", None)
+    if param_type.unique and param_type.unique not in UNIQUE_MODES:
+        raise ValueError("unique must be one of %s, got %r" % (", ".join(UNIQUE_MODES), param_type.unique))
+
+
+def _create_executor(executor, workers, ctx):
+    # Returns the given executor, or a pool of workers shut down when ctx closes, or None
+    if executor is not None and not isinstance(executor, str):
+        return executor
+    if not workers:
+        return None
+    # Imported here, since concurrent.futures imports multiprocessing
+    if executor == "thread":
+        from concurrent.futures import ThreadPoolExecutor as pool_class
+    else:
+        from concurrent.futures import ProcessPoolExecutor as pool_class
+    pool = pool_class(max_workers=workers)
+    if ctx is not None:
+        ctx.call_on_close(functools.partial(pool.shutdown, cancel_futures=True))
+    return pool
+
+
+def _write_spill(lines, directory):
+    # Spill files hold pickled blocks of lines: written and read back in C, and restored exactly
+    import pickle
+
+    fd, path = tempfile.mkstemp(suffix=".spill", prefix="click-tools-sort-", dir=directory)
+    lines = iter(lines)
+    with open(fd, "wb") as f:
+        for block in iter(functools.partial(_take, lines, DEFAULT_SPILL_BLOCK_SIZE), []):
+            pickle.dump(block, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def _iter_spill(path):
+    import pickle
+
+    with open(path, "rb") as f:
+        while True:
+            try:
+                block = pickle.load(f)
+            except EOFError:
+                return
+            yield from block
+
+
+def _strip_line_ending(line):
+    # Sort key of sort_unique without sort_key: lines sort and compare without their line endings
+    return line.rstrip("\r\n") if isinstance(line, str) else line.rstrip(b"\r\n")
+
+
+def _drop_adjacent_duplicates(lines, key):
+    return (next(group) for _, group in itertools.groupby(lines, key))
+
+
+def _sort_chunk(chunk, key, reverse, unique, directory):
+    # Runs in worker processes with sort_workers, so only the spill file's path is sent back
+    chunk.sort(key=key, reverse=reverse)
+    return _write_spill(_drop_adjacent_duplicates(chunk, key) if unique else chunk, directory)
+
+
+def iter_sorted_lines(
+    lines,
+    key=None,
+    reverse=False,
+    unique=False,
+    chunk_size=DEFAULT_SORT_CHUNK_SIZE,
+    temp_dir=None,
+    executor=None,
+    max_in_flight=None,
+):
+    """Sort lines with an external merge sort, and yield them lazily in order.
+
+    Lines are read in chunks of chunk_size, each sorted in memory and spilled to a temporary
+    file, then the files are merged (in several passes if there are more than
+    DEFAULT_SORT_MERGE_FAN_IN). An input of less than chunk_size lines is sorted in memory. The
+    sort is stable, and runs when the first line is requested. Spill files are removed when the
+    iterator is exhausted or closed.
+
+    Args:
+        lines: Iterable of str or bytes lines (memoryview lines are copied to bytes)
+        key: Function of a line to sort by, as with ``sorted``. It must be picklable (e.g. a
+            module-level function, not a lambda) with a process pool executor. Defaults to None.
+        reverse: If True, sort in descending order. Defaults to False.
+        unique: If True, only the first of lines with equal keys is yielded, like ``sort -u``.
+            Without key, lines are then sorted and compared without their line endings.
+            Defaults to False.
+        chunk_size: Number of lines sorted in memory at a time. Defaults to DEFAULT_SORT_CHUNK_SIZE.
+        temp_dir: Directory of the spill files. Defaults to the system's temporary directory.
+        executor: ``concurrent.futures.Executor`` sorting and spilling chunks in parallel while
+            the next ones are read. Defaults to None, sorting in the calling thread.
+        max_in_flight: With executor, maximum number of chunks being sorted at a time. Defaults
+            to twice the number of CPUs.
+
+    Yields:
+        The lines in sorted order
+    """
+    lines = iter(lines)
+    if max_in_flight is None:
+        max_in_flight = 2 * (os.cpu_count() or 1)
+    if unique and key is None:
+        # Duplicates must sort next to each other, like "a" and "a\n"
+        key = _strip_line_ending
+
+    chunk = _take(lines, chunk_size)
+    if chunk and isinstance(chunk[0], memoryview):
+        lines = map(bytes, itertools.chain(chunk, lines))
+        chunk = _take(lines, chunk_size)
+    if len(chunk) < chunk_size:
+        # Everything fits in memory
+        chunk.sort(key=key, reverse=reverse)
+        yield from _drop_adjacent_duplicates(chunk, key) if unique else chunk
+        return
+
+    directory = tempfile.mkdtemp(prefix="click-tools-sort-", dir=temp_dir)
+    spills = []
+    try:
+        paths = []
+        pending = collections.deque()
+        try:
+            while chunk:
+                if executor is None:
+                    paths.append(_sort_chunk(chunk, key, reverse, unique, directory))
+                else:
+                    if len(pending) >= max_in_flight:
+                        paths.append(pending.popleft().result())
+                    pending.append(executor.submit(_sort_chunk, chunk, key, reverse, unique, directory))
+                chunk = _take(lines, chunk_size)
+            paths.extend(future.result() for future in pending)
+        finally:
+            for future in pending:
+                future.cancel()
+
+        while len(paths) > DEFAULT_SORT_MERGE_FAN_IN:
+            merged = []
+            fan_in = DEFAULT_SORT_MERGE_FAN_IN
+            for start in range(0, len(paths), fan_in):
+                end = start + fan_in
+                group = paths[start:end]
+                spills = [_iter_spill(path) for path in group]
+                merged.append(_write_spill(heapq.merge(*spills, key=key, reverse=reverse), directory))
+                for path in group:
+                    os.unlink(path)
+            paths = merged
+
+        spills = [_iter_spill(path) for path in paths]
+        sorted_lines = heapq.merge(*spills, key=key, reverse=reverse)
+        yield from _drop_adjacent_duplicates(sorted_lines, key) if unique else sorted_lines
+    finally:
+        for spill in spills:
+            spill.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _pop_sort_options(param_type, kwargs):
+    # Sets the sort options of a param type from the keyword arguments of its __init__, removing them
+    param_type.sort = kwargs.pop("sort", False)
+    param_type.sort_key = kwargs.pop("sort_key", None)
+    param_type.sort_reverse = kwargs.pop("sort_reverse", False)
+    param_type.sort_unique = kwargs.pop("sort_unique", False)
+    param_type.sort_chunk_size = kwargs.pop("sort_chunk_size", DEFAULT_SORT_CHUNK_SIZE)
+    param_type.sort_temp_dir = kwargs.pop("sort_temp_dir", None)
+    param_type.sort_workers = kwargs.pop("sort_workers", 0)
+    param_type.sort_executor = kwargs.pop("sort_executor", "process")
+
+
+def _sort(param_type, lines, ctx):
+    # Sorts lines according to the param type's sort options
+    if not param_type.sort:
+        return lines
+    sorted_lines = iter_sorted_lines(
+        lines,
+        key=param_type.sort_key,
+        reverse=param_type.sort_reverse,
+        unique=param_type.sort_unique,
+        chunk_size=param_type.sort_chunk_size,
+        temp_dir=param_type.sort_temp_dir,
+        executor=_create_executor(param_type.sort_executor, param_type.sort_workers, ctx),
+        max_in_flight=2 * param_type.sort_workers if param_type.sort_workers else None,
+    )
+    if ctx is not None:
+        # Remove the spill files even if the lines aren't all consumed
+        ctx.call_on_close(sorted_lines.close)
+    return sorted_lines
 
 
 class ChoiceCommaSeparated(click.ParamType):
@@ -67,7 +2294,8 @@ class ChoiceCommaSeparated(click.ParamType):
     configured for case sensitivity.
 
     Args:
-        choices: List of valid choices to validate against
+        choices: List of valid choices to validate against. The list is copied: reassign
+            ``choices`` to change them.
         allow_wildcard: If True, allows '*' or 'all' to select all choices. Defaults to True.
         case_sensitive: If True, validates choices with case sensitivity. Defaults to True.
 
@@ -95,6 +2323,27 @@ class ChoiceCommaSeparated(click.ParamType):
 
         super().__init__(*args, **kwargs)
 
+    @property
+    def choices(self):
+        return self._choices
+
+    @choices.setter
+    def choices(self, choices):
+        # Choices are copied and indexed on first use: changing the list passed in has no
+        # effect, reassign choices instead
+        self._choices = tuple(choices)
+        self._indexes = {}
+
+    def _get_index(self, lowered):
+        """Return a dict mapping each choice, lowercased if lowered, to its canonical spelling."""
+        index = self._indexes.get(lowered)
+        if index is None:
+            index = self._indexes[lowered] = {}
+            for choice in self._choices:
+                index.setdefault(choice.lower() if lowered else choice, choice)
+        return index
+
+    @_instrumented
     def convert(self, value, param, ctx):
         """Convert and validate the command-line value.
 
@@ -117,15 +2366,23 @@ class ChoiceCommaSeparated(click.ParamType):
 
         if self.allow_wildcard:
             if any(val in ("*", "all") for val in value):
-                return self.choices
+                return list(self.choices)
+
+        if self.case_sensitive:
+            # values are matched ignoring case, and replaced by their canonical spelling
+            index = self._get_index(lowered=True)
+            converted = []
+            for val in value:
+                choice = index.get(val.lower())
+                if choice is None:
+                    self.fail("Value {} is not a valid choice.".format(val))
+                converted.append(choice)
+            return converted
 
+        index = self._get_index(lowered=False)
         for val in value:
-            if self.case_sensitive:
-                if val.lower() not in [cc.lower() for cc in self.choices]:
-                    self.fail("Value {} is not a valid choice.".format(val))
-            else:
-                if val not in self.choices:
-                    self.fail("Value {} is not a valid choice.".format(val))
+            if val not in index:
+                self.fail("Value {} is not a valid choice.".format(val))
 
         return value
 
@@ -137,14 +2394,17 @@ class ListCommaSeparated(click.ParamType):
     of the resulting values.
 
     Args:
-        unique: If True, removes duplicates from the resulting list. Defaults to True.
+        unique: If True, removes duplicates from the resulting list, keeping the first
+            occurrence of each value in input order. Defaults to True.
+        as_frozenset: If True, return a frozenset of the values instead of a list, for callers
+            that only need membership tests. Defaults to False.
 
     Example:
         >>> @click.command()
         >>> @click.option('--tags', type=ListCommaSeparated())
         >>> def cmd(tags):
         ...     print(tags)
-        >>> # Input: --tags "a,b,c"
+        >>> # Input: --tags "a,b,c,a"
         >>> # Output: ['a', 'b', 'c']
     """
 
@@ -152,8 +2412,15 @@ class ListCommaSeparated(click.ParamType):
 
     def __init__(self, *args, **kwargs):
         self.unique = kwargs.get("unique", True)
+        self.as_frozenset = kwargs.get("as_frozenset", False)
+
+        for option in ("unique", "as_frozenset"):
+            if option in kwargs:
+                del kwargs[option]
+
         super().__init__(*args, **kwargs)
 
+    @_instrumented
     def convert(self, value, *args):
         """Convert the command-line value into a list.
 
@@ -161,20 +2428,24 @@ class ListCommaSeparated(click.ParamType):
             value: The command-line value to convert
 
         Returns:
-            List of strings, optionally deduplicated
+            List of strings, optionally deduplicated, or a frozenset with as_frozenset
         """
         if not value:
-            return []
+            return frozenset() if self.as_frozenset else []
 
         if not isinstance(value, list):
-            lista = [ss.strip() for ss in value.split(",")]
+            values = map(str.strip, value.split(","))
         else:
-            lista = value
+            values = value
+
+        if self.as_frozenset:
+            return frozenset(values)
 
         if self.unique:
-            lista = list(set(lista))
+            # dicts keep insertion order, so this dedups in one pass without reordering
+            return list(dict.fromkeys(values))
 
-        return lista
+        return list(values)
 
 
 class StringsListOrStdinParamType(click.ParamType):
@@ -183,6 +2454,22 @@ class StringsListOrStdinParamType(click.ParamType):
     This parameter type allows flexibility in input sources, accepting either a direct
     string value or reading from standard input when '-' is provided.
 
+    Args:
+        read_ahead: Number of batches of DEFAULT_READ_AHEAD_BATCH_SIZE stdin lines read ahead in a
+            background thread (see ``ReadAheadIterator``), or 0 to read lines on demand.
+            Defaults to 0.
+        unique: Drop stdin lines already seen, comparing them without their line endings,
+            in a ``DigestSet`` ("exact"), a ``BloomFilter`` ("bloom", which may drop a few new
+            lines) or a ``DiskSet`` ("disk"). unique_capacity, unique_error_rate and
+            unique_temp_dir are passed on as their capacity, error_rate and directory. Defaults
+            to None.
+        sort: If True, stdin lines are sorted with ``iter_sorted_lines``, an external merge sort
+            for inputs larger than memory. sort_key, sort_reverse, sort_unique, sort_chunk_size and
+            sort_temp_dir are passed on as its key, reverse, unique, chunk_size and temp_dir, and
+            chunks are sorted by sort_workers workers (0 to sort in the calling thread) of
+            sort_executor: "process" (which requires a picklable sort_key), "thread" or a
+            ``concurrent.futures.Executor``. The returned iterator is still lazy. Defaults to False.
+
     Example:
         >>> @click.command()
         >>> @click.argument('input', type=StringsListOrStdinParamType())
@@ -196,6 +2483,19 @@ class StringsListOrStdinParamType(click.ParamType):
 
     name = "strings-list-or-stdin"
 
+    _yields_lines = True
+
+    def __init__(self, *args, **kwargs):
+        self.read_ahead = kwargs.get("read_ahead", 0)
+        _pop_unique_options(self, kwargs)
+        _pop_sort_options(self, kwargs)
+
+        if "read_ahead" in kwargs:
+            del kwargs["read_ahead"]
+
+        super().__init__(*args, **kwargs)
+
+    @_instrumented
     def convert(self, value, param, ctx):
         """Convert the input value to either a stream or a list.
 
@@ -205,10 +2505,11 @@ class StringsListOrStdinParamType(click.ParamType):
             ctx: The Click context
 
         Returns:
-            Either a text stream (if value is '-') or a single-item list
+            Either a text stream (if value is '-'), or an iterator over its lines with
+            read_ahead, sort or unique, or a single-item list
         """
         if value == "-":
-            return click.get_text_stream("stdin")
+            return _unique(self, _sort(self, _read_ahead(self, click.get_text_stream("stdin"), ctx), ctx), ctx)
         else:
             if isinstance(value, str):
                 return [value]
@@ -216,7 +2517,255 @@ class StringsListOrStdinParamType(click.ParamType):
                 return value
 
 
-class FileUrlIterStringParamType(click.File):
+class ShardParamType(click.ParamType):
+    """A Click parameter type for shard specifications such as ``2/8``.
+
+    Converts "i/n" into an ``(i, n)`` tuple, where i is the 0-based index of the shard and n
+    the number of shards. Used together with the ``shard`` option of the file-backed param
+    types, which can be given the name of this parameter.
+
+    Example:
+        >>> @click.command()
+        >>> @click.option('--shard', type=ShardParamType(), is_eager=True)
+        >>> @click.argument('lines', type=FileIterStringParamType('r', shard='shard'))
+        >>> def cmd(shard, lines):
+        ...     for line in lines:
+        ...         print(line)
+        >>> # Valid inputs:
+        >>> # --shard 0/4 huge.txt
+    """
+
+    name = "shard"
+
+    @_instrumented
+    def convert(self, value, param, ctx):
+        """Convert the command-line value into an (index, count) tuple.
+
+        Args:
+            value: The command-line value to convert
+            param: The parameter being processed
+            ctx: The Click context
+
+        Returns:
+            Tuple with the shard index and the number of shards
+
+        Raises:
+            click.BadParameter: If the value is not a valid shard specification
+        """
+        if isinstance(value, tuple):
+            return value
+
+        try:
+            index, count = (int(part) for part in value.split("/"))
+        except ValueError:
+            self.fail("Shard %s is not of the form i/n" % value, param, ctx)
+        if not 0 <= index < count:
+            self.fail("Shard index must be between 0 and %d, got %d" % (count - 1, index), param, ctx)
+        return index, count
+
+
+def _close_lines(lines):
+    # A ReadAheadIterator thread still reading the generator closes it once it stops instead
+    with contextlib.suppress(ValueError):
+        lines.close()
+
+
+def _start_lines(param_type, lines, value, param, ctx):
+    try:
+        # Read the first line right away, so errors opening, decompressing or decoding the
+        # input are reported as bad parameters
+        first = next(lines, None)
+    except Exception as e:
+        param_type.fail("Error while reading %s: %s" % (value, e), param, ctx)
+    if ctx is not None:
+        ctx.call_on_close(functools.partial(_close_lines, lines))
+    return itertools.chain(iter([first] if first is not None else []), lines)
+
+
+def _open_follow_lines(param_type, value, param, ctx):
+    lines = iter_follow_lines(
+        value,
+        poll_interval=param_type.poll_interval,
+        binary="b" in param_type.mode,
+        encoding=param_type.encoding or "utf-8",
+        errors=param_type.errors,
+    )
+    if ctx is not None:
+        ctx.call_on_close(functools.partial(_close_lines, lines))
+    return lines
+
+
+def _open_mmap_lines(param_type, value, param, ctx):
+    lines = iter_mmap_lines(value, binary="b" in param_type.mode, encoding=param_type.encoding or "utf-8", errors=param_type.errors)
+    return _start_lines(param_type, lines, value, param, ctx)
+
+
+def _open_decompressed_lines(param_type, value, param, ctx):
+    binary = "b" in param_type.mode
+    encoding = param_type.encoding or "utf-8"
+    if value == "-":
+        stream = click.get_binary_stream("stdin")
+        lines = iter_decompressed_lines(stream, binary=binary, encoding=encoding, errors=param_type.errors, close_stream=False)
+    else:
+        try:
+            stream = open(value, "rb")
+        except OSError as e:
+            param_type.fail("Error while reading %s: %s" % (value, e), param, ctx)
+        lines = iter_decompressed_lines(stream, value, binary=binary, encoding=encoding, errors=param_type.errors)
+    return _start_lines(param_type, lines, value, param, ctx)
+
+
+def _resolve_shard(param_type, param, ctx):
+    shard = param_type.shard
+    if isinstance(shard, str):
+        # name of another parameter, e.g. a --shard option using ShardParamType; it may not
+        # have been given (or processed yet)
+        shard = ctx.params.get(shard) if ctx is not None else None
+        if not isinstance(shard, (tuple, list)):
+            return None
+    return shard
+
+
+def _resolve_line_range(param_type, ctx):
+    # Returns the 0-based (start, stop) range of the from_line and to_line options, or None
+    numbers = []
+    for number in (param_type.from_line, param_type.to_line):
+        if isinstance(number, str):
+            # name of another parameter, e.g. a --from-line option
+            number = ctx.params.get(number) if ctx is not None else None
+        numbers.append(number if isinstance(number, int) else None)
+    from_line, to_line = numbers
+    if from_line is None and to_line is None:
+        return None
+    return (max(from_line - 1, 0) if from_line is not None else 0, to_line)
+
+
+def _open_indexed_lines(param_type, value, line_range, param, ctx):
+    index_path = param_type.line_index
+    if index_path is True:
+        index_path = value + ".idx"
+    elif index_path is False:
+        index_path = None
+    start, stop = line_range
+    try:
+        index = LineIndex(value, index_path=index_path)
+    except OSError as e:
+        param_type.fail("Error while reading %s: %s" % (value, e), param, ctx)
+    lines = index.iter_lines(start, stop, binary="b" in param_type.mode, encoding=param_type.encoding or "utf-8", errors=param_type.errors)
+    return _start_lines(param_type, lines, value, param, ctx)
+
+
+def _iter_lines_with_offsets(path, offset, offsets, binary=False, encoding="utf-8", errors="strict"):
+    # Yields the lines of a file from offset, appending the offset after each line to offsets
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for line in iter(f.readline, b""):
+            offset += len(line)
+            offsets.append(offset)
+            yield line if binary else _decode_line(line, encoding, errors)
+
+
+def _open_checkpointed_lines(param_type, value, param, ctx, open_lines):
+    """Resume reading value from its saved position, and return a CheckpointIterator.
+
+    Plain local files are resumed from their saved byte offset; other sources are opened with
+    open_lines() and skip the lines consumed before.
+    """
+    checkpoint = Checkpoint(param_type.checkpoint)
+    is_file = value != "-" and exists(value)
+    source = os.path.abspath(value) if is_file else value
+
+    reset = param_type.checkpoint_reset
+    if isinstance(reset, str):
+        # name of another parameter, e.g. a --reset flag
+        reset = ctx.params.get(reset) if ctx is not None else False
+    if reset is True:
+        checkpoint.reset(source)
+    position = checkpoint.get(source) or {}
+
+    sharded = getattr(param_type, "shard", None) is not None and _resolve_shard(param_type, param, ctx) is not None
+    followed = getattr(param_type, "follow", False)
+    if is_file and not getattr(param_type, "decompress", False) and not sharded and not followed:
+        offset = position.get("offset", 0)
+        if offset > os.path.getsize(value):
+            # The file has been replaced by a shorter one since, start over
+            offset = 0
+            position = {}
+        offsets = collections.deque()
+        lines = _iter_lines_with_offsets(
+            value, offset, offsets, binary="b" in param_type.mode, encoding=param_type.encoding or "utf-8", errors=param_type.errors
+        )
+        lines = _start_lines(param_type, lines, value, param, ctx)
+    else:
+        offset = offsets = None
+        lines = itertools.islice(open_lines(), position.get("lines", 0), None)
+
+    lines = CheckpointIterator(
+        _read_ahead(param_type, lines, ctx),
+        checkpoint,
+        source,
+        lines=position.get("lines", 0),
+        offset=offset,
+        offsets=offsets,
+        every=param_type.checkpoint_every,
+    )
+    if ctx is not None:
+        ctx.call_on_close(lines.close)
+    return lines
+
+
+def _open_shard_lines(param_type, value, shard, param, ctx):
+    if value == "-" or not exists(value) or param_type.decompress:
+        param_type.fail("Only uncompressed local files can be sharded, got %s" % value, param, ctx)
+    index, count = shard
+    lines = iter_shard_lines(value, index, count, binary="b" in param_type.mode, encoding=param_type.encoding or "utf-8", errors=param_type.errors)
+    return _start_lines(param_type, lines, value, param, ctx)
+
+
+def _write_unnamed_file(chunks, spool_max_size=None, temp_dir=None):
+    """Write byte chunks to a file without a name on disk, and rewind it.
+
+    The file is an ``io.BytesIO`` while it holds at most spool_max_size bytes, and is moved to
+    an unnamed temporary file in temp_dir (``O_TMPFILE`` on Linux, see ``tempfile.TemporaryFile``)
+    once it grows larger, or from the start if spool_max_size is None. Unnamed files are removed
+    by the OS when closed, even if the process dies, so nothing is left behind without a context.
+    """
+    f = io.BytesIO() if spool_max_size is not None else tempfile.TemporaryFile(dir=temp_dir)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        if isinstance(f, io.BytesIO) and f.tell() + len(chunk) > spool_max_size:
+            spooled = f
+            f = tempfile.TemporaryFile(dir=temp_dir)
+            f.write(spooled.getbuffer())
+        f.write(chunk)
+    f.seek(0)
+    return f
+
+
+def _open_unnamed_file(param_type, f, ctx, encoding=None):
+    # Opens a binary file from _write_unnamed_file in the param type's mode
+    if "b" not in param_type.mode:
+        f = io.TextIOWrapper(f, encoding=encoding or param_type.encoding, errors=param_type.errors)
+    if ctx is not None:
+        ctx.call_on_close(f.close)
+    return f
+
+
+class _FileParamType(click.File):
+    # Base of the file param types, which have their own names (e.g. in conversion statistics)
+    # but are shown as FILENAME in help texts, like click.File
+
+    def get_metavar(self, param, *args, **kwargs):
+        return super().get_metavar(param, *args, **kwargs) or click.File.name.upper()
+
+
+def _strip_newlines(lines):
+    for line in lines:
+        yield line[:-1] if line.endswith("\n") else line
+
+
+class FileUrlIterStringParamType(_UrlPrefetchMixin, _FileParamType):
     """A Click parameter type that handles files, URLs, and direct strings as iterators.
 
     This versatile parameter type can handle multiple input sources:
@@ -225,6 +2774,52 @@ class FileUrlIterStringParamType(click.File):
     - Standard input (using '-')
     - Direct strings (converted to single-item iterators)
 
+    Args:
+        stream: If True, URL bodies are streamed and decoded line by line as the iterator is
+            consumed instead of being downloaded in full first. Defaults to False.
+        chunk_size: Number of bytes read from the socket at a time when streaming.
+            Defaults to DEFAULT_CHUNK_SIZE.
+        session: HTTP session used to fetch URLs. Defaults to the shared session returned
+            by ``get_session()``.
+        max_workers: Maximum number of URLs fetched concurrently when used with
+            ``PrefetchArgument`` or ``PrefetchOption``. Defaults to DEFAULT_MAX_WORKERS.
+        mmap: If True, local files are read through a memory map (see ``iter_mmap_lines``).
+            In binary mode lines are memoryview slices. Defaults to False.
+        decompress: If True, gzip, bz2, xz and Zstandard-compressed files, URL bodies and
+            stdin are detected from their magic bytes or extension and decompressed on the fly
+            (see ``open_decompressed``). Takes precedence over mmap. Defaults to False.
+        shard: Read only one byte-range shard of local files (see ``iter_shard_lines``), given
+            as an (index, count) tuple or as the name of another parameter holding one, such
+            as a ``ShardParamType`` option. Defaults to None.
+        read_ahead: Number of batches of DEFAULT_READ_AHEAD_BATCH_SIZE lines read ahead in a
+            background thread (see ``ReadAheadIterator``), or 0 to read lines on demand.
+            Defaults to 0.
+        checkpoint: Path of a ``Checkpoint`` file. If set, the returned iterator saves how far
+            it has been consumed (the byte offset for local files, the number of lines for
+            other inputs), and later runs with the same input resume from there. Can't be used
+            with sort. Defaults to None.
+        checkpoint_every: Number of lines consumed between saves of the checkpoint. Defaults
+            to DEFAULT_CHECKPOINT_EVERY.
+        checkpoint_reset: If True, or the name of another parameter whose value is True (such
+            as a ``--reset`` flag), ignore the saved position and start over. Defaults to False.
+        follow: If True, local files are followed like ``tail -F``: after their current end,
+            lines are yielded as they are appended, across truncation and rotation (see
+            ``iter_follow_lines``). The iterator then never ends on its own. Takes precedence
+            over decompress and mmap. Can't be used with read_ahead. Defaults to False.
+        poll_interval: With follow, maximum number of seconds between checks for new lines.
+            Defaults to DEFAULT_POLL_INTERVAL.
+        unique: Drop lines already seen, comparing them without their line endings,
+            in a ``DigestSet`` ("exact"), a ``BloomFilter`` ("bloom", which may drop a few new
+            lines) or a ``DiskSet`` ("disk"). unique_capacity, unique_error_rate and
+            unique_temp_dir are passed on as their capacity, error_rate and directory. Defaults
+            to None.
+        sort: If True, lines are sorted with ``iter_sorted_lines``, an external merge sort
+            for inputs larger than memory. sort_key, sort_reverse, sort_unique, sort_chunk_size and
+            sort_temp_dir are passed on as its key, reverse, unique, chunk_size and temp_dir, and
+            chunks are sorted by sort_workers workers (0 to sort in the calling thread) of
+            sort_executor: "process" (which requires a picklable sort_key), "thread" or a
+            ``concurrent.futures.Executor``. The returned iterator is still lazy. Defaults to False.
+
     Example:
         >>> @click.command()
         >>> @click.argument('input', type=FileUrlIterStringParamType('r'))
@@ -238,6 +2833,88 @@ class FileUrlIterStringParamType(click.File):
         >>> # - (stdin)
     """
 
+    name = "file-url-iter-string"
+
+    _yields_lines = True
+
+    def __init__(self, *args, **kwargs):
+        self.stream = kwargs.get("stream", False)
+        self.chunk_size = kwargs.get("chunk_size", DEFAULT_CHUNK_SIZE)
+        self.session = kwargs.get("session")
+        self.max_workers = kwargs.get("max_workers", DEFAULT_MAX_WORKERS)
+        self.mmap = kwargs.get("mmap", False)
+        self.decompress = kwargs.get("decompress", False)
+        self.shard = kwargs.get("shard")
+        self.read_ahead = kwargs.get("read_ahead", 0)
+        self.checkpoint = kwargs.get("checkpoint")
+        self.checkpoint_every = kwargs.get("checkpoint_every", DEFAULT_CHECKPOINT_EVERY)
+        self.checkpoint_reset = kwargs.get("checkpoint_reset", False)
+        self.follow = kwargs.get("follow", False)
+        self.poll_interval = kwargs.get("poll_interval", DEFAULT_POLL_INTERVAL)
+        _pop_unique_options(self, kwargs)
+        _pop_sort_options(self, kwargs)
+        if self.sort and self.checkpoint is not None:
+            # Sorting consumes the whole input before the first line is returned
+            raise ValueError("checkpoint can't be used with sort")
+        if self.follow and self.read_ahead:
+            # A read-ahead thread would stay blocked waiting for new lines, with nothing to gain
+            raise ValueError("read_ahead can't be used with follow")
+
+        for option in (
+            "stream",
+            "chunk_size",
+            "session",
+            "max_workers",
+            "mmap",
+            "decompress",
+            "shard",
+            "read_ahead",
+            "checkpoint",
+            "checkpoint_every",
+            "checkpoint_reset",
+            "follow",
+            "poll_interval",
+        ):
+            if option in kwargs:
+                del kwargs[option]
+
+        super().__init__(*args, **kwargs)
+
+    def _is_fetchable(self, value):
+        return "r" in self.mode and not exists(value) and is_url(value)
+
+    def _fetch(self, value, param, ctx):
+        """Fetch a URL and return an iterator over the lines of its body."""
+        session = self.session if self.session is not None else get_session()
+        try:
+            r = session.get(value, stream=self.stream or self.decompress)
+            _record_response(r)
+            if not r.ok:
+                r.close()
+                self.fail("Url %s does not return 200 OK" % value, param, ctx)
+        except Exception as e:
+            self.fail("Error while fetching %s: %s" % (value, e), param, ctx)
+
+        if self.decompress:
+            # Let urllib3 undo any Content-Encoding, then detect compression of the body itself.
+            # Decompressors may read again after EOF, so the body must not close itself then.
+            r.raw.decode_content = True
+            r.raw.auto_close = False
+            lines = iter_decompressed_lines(r.raw, value)
+            return _start_lines(self, _strip_newlines(lines), value, param, ctx)
+
+        if self.stream:
+            lines = iter_response_lines(r, chunk_size=self.chunk_size)
+            # Make sure the connection is released even if the iterator is not exhausted
+            if ctx is not None:
+                ctx.call_on_close(functools.partial(_close_lines, lines))
+            return lines
+
+        # Convert bytes to string and split into lines
+        content = r.content.decode('utf-8') if isinstance(r.content, bytes) else r.content
+        return iter(content.splitlines())
+
+    @_instrumented
     def convert(self, value, param, ctx):
         """Convert the input value to an appropriate iterator.
 
@@ -255,31 +2932,41 @@ class FileUrlIterStringParamType(click.File):
         if "r" not in self.mode:
             self.fail("stream cannot be opened in non-read mode", param, ctx)
 
+        if self.checkpoint is not None:
+            lines = _open_checkpointed_lines(self, value, param, ctx, functools.partial(self._open_lines, value, param, ctx))
+        else:
+            lines = _read_ahead(self, self._open_lines(value, param, ctx), ctx)
+        return _unique(self, _sort(self, lines, ctx), ctx)
+
+    def _open_lines(self, value, param, ctx):
+        shard = _resolve_shard(self, param, ctx)
+        if shard is not None:
+            return _open_shard_lines(self, value, shard, param, ctx)
+
         if exists(value):
             # value is a valid filename
+            if self.follow:
+                return _open_follow_lines(self, value, param, ctx)
+            if self.decompress:
+                return _open_decompressed_lines(self, value, param, ctx)
+            if self.mmap:
+                return _open_mmap_lines(self, value, param, ctx)
             f = super().convert(value, param, ctx)
             return iter(f)
-        elif validators.url(value):
+        elif is_url(value):
             # value is a url
-            try:
-                r = requests.get(value)
-                if not r.ok:
-                    self.fail("Url %s does not return 200 OK" % value, param, ctx)
-            except Exception as e:
-                self.fail("Error while fetching %s: %s" % (value, e), param, ctx)
-
-            # Convert bytes to string and split into lines
-            content = r.content.decode('utf-8') if isinstance(r.content, bytes) else r.content
-            return iter(content.splitlines())
+            return self._fetch_url(value, param, ctx)
         elif value == "-":
             # value is stdin
+            if self.decompress:
+                return _open_decompressed_lines(self, value, param, ctx)
             return click.get_text_stream("stdin")
         else:
             # value is just a string
             return iter([value])
 
 
-class FileIterStringParamType(click.File):
+class FileIterStringParamType(_FileParamType):
     """A Click parameter type for files and strings with optional type conversion.
 
     Similar to FileUrlIterStringParamType but adds type conversion capability and
@@ -287,6 +2974,53 @@ class FileIterStringParamType(click.File):
 
     Args:
         type: Optional function to convert each element of the iterator
+        batch_type: Optional function to convert a list of elements at a time. Mutually
+            exclusive with type.
+        batch_size: Number of elements converted at a time by batch_type, and default size of
+            the batches returned by the iterator's ``batches()`` method.
+        as_array: If True, the input is parsed with NumPy into an array of type, which must be
+            int, float or a NumPy dtype, instead of being converted line by line. Requires the
+            numpy extra. Defaults to False.
+        array_chunk_size: With as_array, return an iterator over arrays of this many elements
+            instead of a single array. Defaults to None.
+        mmap: If True, local files are read through a memory map (see ``iter_mmap_lines``).
+            In binary mode lines are memoryview slices. Defaults to False.
+        decompress: If True, gzip, bz2, xz and Zstandard-compressed files and stdin are
+            detected from their magic bytes or extension and decompressed on the fly
+            (see ``open_decompressed``). Takes precedence over mmap. Defaults to False.
+        shard: Read only one byte-range shard of local files (see ``iter_shard_lines``), given
+            as an (index, count) tuple or as the name of another parameter holding one, such
+            as a ``ShardParamType`` option. Defaults to None.
+        read_ahead: Number of batches of DEFAULT_READ_AHEAD_BATCH_SIZE lines read ahead in a
+            background thread (see ``ReadAheadIterator``), or 0 to read lines on demand.
+            Defaults to 0.
+        workers: Number of workers converting chunks of batch_size elements in parallel with
+            type or batch_type, in the order of the input, or 0 to convert in the calling
+            thread. At most twice as many chunks are converted ahead of the consumer. Defaults to 0.
+        executor: "process" to convert in a pool of worker processes, which requires
+            picklable type or batch_type (e.g. ``json.loads``, not a lambda), "thread" for a
+            thread pool, or a ``concurrent.futures.Executor`` to use instead. A pool is shut
+            down when the command finishes, a given executor isn't. Defaults to "process".
+        from_line: Number of the first line to read, starting at 1, as an int or as the name of
+            another parameter holding one, such as a ``--from-line`` option. Local files are
+            read from there through a ``LineIndex``, without reading the lines before; other
+            inputs skip them. Defaults to None.
+        to_line: Number of the last line to read (included), like from_line. Defaults to None.
+        line_index: Path of the sidecar ``LineIndex`` file used with from_line and to_line,
+            True for the file's path followed by ".idx", or False to keep it in memory only.
+            Defaults to True.
+        unique: Drop lines already seen before converting them, comparing them without their line endings,
+            in a ``DigestSet`` ("exact"), a ``BloomFilter`` ("bloom", which may drop a few new
+            lines) or a ``DiskSet`` ("disk"). unique_capacity, unique_error_rate and
+            unique_temp_dir are passed on as their capacity, error_rate and directory. Defaults
+            to None.
+        sort: If True, lines are sorted before being converted, with ``iter_sorted_lines``, an
+            external merge sort for inputs larger than memory. sort_key, sort_reverse, sort_unique,
+            sort_chunk_size and sort_temp_dir are passed on as its key, reverse, unique, chunk_size
+            and temp_dir, and chunks are sorted by sort_workers workers (0 to sort in the calling
+            thread) of sort_executor: "process" (which requires a picklable sort_key), "thread" or
+            a ``concurrent.futures.Executor``. The returned iterator is still lazy. Defaults to
+            False.
 
     Example:
         >>> @click.command()
@@ -296,14 +3030,106 @@ class FileIterStringParamType(click.File):
         >>> # Valid inputs:
         >>> # numbers.txt (containing numbers)
         >>> # "42"
+        >>> @click.command()
+        >>> @click.argument('nums', type=FileIterStringParamType('r', batch_type=lambda lines: numpy.asarray(lines, dtype=float)))
+        >>> def cmd(nums):
+        ...     print(sum(batch.sum() for batch in nums.batches()))
+        >>> @click.command()
+        >>> @click.argument('nums', type=FileIterStringParamType('r', type=float, as_array=True))
+        >>> def cmd(nums):
+        ...     print(nums.mean())
+        >>> @click.command()
+        >>> @click.option('--from-line', type=int, is_eager=True)
+        >>> @click.argument('records', type=FileIterStringParamType('r', from_line='from_line'))
+        >>> def cmd(from_line, records):
+        ...     for record in records:
+        ...         process(record)
     """
 
+    name = "file-iter-string"
+
+    _yields_lines = True
+
     def __init__(self, *args, **kwargs):
         self.type = kwargs.get("type")
-        if "type" in kwargs:
-            del kwargs["type"]
+        self.batch_type = kwargs.get("batch_type")
+        self.batch_size = kwargs.get("batch_size")
+        self.as_array = kwargs.get("as_array", False)
+        self.array_chunk_size = kwargs.get("array_chunk_size")
+        self.mmap = kwargs.get("mmap", False)
+        self.decompress = kwargs.get("decompress", False)
+        self.shard = kwargs.get("shard")
+        self.read_ahead = kwargs.get("read_ahead", 0)
+        self.workers = kwargs.get("workers", 0)
+        self.executor = kwargs.get("executor", "process")
+        self.from_line = kwargs.get("from_line")
+        self.to_line = kwargs.get("to_line")
+        self.line_index = kwargs.get("line_index", True)
+        _pop_unique_options(self, kwargs)
+        _pop_sort_options(self, kwargs)
+
+        for option in (
+            "type",
+            "batch_type",
+            "batch_size",
+            "as_array",
+            "array_chunk_size",
+            "mmap",
+            "decompress",
+            "shard",
+            "read_ahead",
+            "workers",
+            "executor",
+            "from_line",
+            "to_line",
+            "line_index",
+        ):
+            if option in kwargs:
+                del kwargs[option]
+
         super().__init__(*args, **kwargs)
 
+    def _get_executor(self, ctx):
+        """Return the executor converting elements in parallel, or None."""
+        return _create_executor(self.executor, self.workers, ctx)
+
+    def _convert_to_arrays(self, value, param, ctx):
+        """Parse the input source into a NumPy array, or an iterator of array chunks."""
+        try:
+            import numpy
+        except ImportError:
+            self.fail("NumPy is required to read %s as an array, install click-tools[numpy]" % value, param, ctx)
+
+        try:
+            dtype = numpy.dtype(self.type or float)
+        except TypeError:
+            self.fail("Type %r can't be read as an array, use int, float or a NumPy dtype" % self.type, param, ctx)
+
+        if exists(value):
+            # value is a valid filename
+            stream = open(value, "rb")
+            if ctx is not None:
+                ctx.call_on_close(stream.close)
+        elif value == "-":
+            # value is stdin
+            stream = click.get_binary_stream("stdin")
+        else:
+            # value is just a string
+            stream = io.BytesIO(value.encode("utf-8"))
+
+        arrays = iter_arrays(stream, dtype, chunk_size=self.array_chunk_size)
+        try:
+            # Parse the first chunk right away, so early errors are reported as bad parameters
+            first = next(arrays, None)
+        except (ValueError, OverflowError) as e:
+            self.fail("Error while converting %s: %s" % (value, e), param, ctx)
+        if not self.array_chunk_size:
+            if stream is not click.get_binary_stream("stdin"):
+                stream.close()
+            return first
+        return itertools.chain(iter([first] if first is not None else []), arrays)
+
+    @_instrumented
     def convert(self, value, param, ctx):
         """Convert the input value to an iterator with optional type conversion.
 
@@ -321,28 +3147,78 @@ class FileIterStringParamType(click.File):
         if "r" not in self.mode:
             self.fail("stream cannot be opened in non-read mode", param, ctx)
 
+        if self.as_array:
+            return self._convert_to_arrays(value, param, ctx)
+
         output_iterator = None
-        if exists(value):
+        line_range = _resolve_line_range(self, ctx)
+        shard = _resolve_shard(self, param, ctx)
+        if shard is not None:
+            output_iterator = _open_shard_lines(self, value, shard, param, ctx)
+        elif exists(value):
             # value is a valid filename
-            f = super().convert(value, param, ctx)
-            output_iterator = iter(f)
+            if self.decompress:
+                output_iterator = _open_decompressed_lines(self, value, param, ctx)
+            elif line_range is not None:
+                output_iterator = _open_indexed_lines(self, value, line_range, param, ctx)
+                line_range = None
+            elif self.mmap:
+                output_iterator = _open_mmap_lines(self, value, param, ctx)
+            else:
+                f = super().convert(value, param, ctx)
+                output_iterator = iter(f)
         elif value == "-":
             # value is stdin
-            output_iterator = click.get_text_stream("stdin")
+            if self.decompress:
+                output_iterator = _open_decompressed_lines(self, value, param, ctx)
+            else:
+                output_iterator = click.get_text_stream("stdin")
         else:
             # value is just a string
             output_iterator = iter([value])
+        if line_range is not None:
+            output_iterator = itertools.islice(output_iterator, *line_range)
+        output_iterator = _unique(self, _sort(self, _read_ahead(self, output_iterator, ctx), ctx), ctx)
+        if not (self.type or self.batch_type or self.batch_size):
+            return output_iterator
         try:
-            return TypeConvertingIterator(output_iterator, self.type) if self.type else output_iterator
+            return TypeConvertingIterator(
+                output_iterator,
+                self.type,
+                batch_conversion_function=self.batch_type,
+                batch_size=self.batch_size or DEFAULT_BATCH_SIZE,
+                executor=self._get_executor(ctx),
+                max_in_flight=2 * self.workers if self.workers else None,
+            )
         except Exception as e:
             self.fail("Error while converting iterator: %s" % e, param, ctx)
 
 
-class FileOrUrlParamType(click.File):
+class FileOrUrlParamType(_UrlPrefetchMixin, _FileParamType):
     """A Click parameter type that handles both local files and URLs.
 
     This parameter type extends Click's File type to also handle URLs by downloading
-    their content to a temporary file.
+    their content to a temporary file. The response body is streamed to disk in blocks of
+    ``chunk_size`` bytes, so memory usage stays bounded regardless of the download size.
+
+    Args:
+        chunk_size: Number of bytes read from the socket and written to the temporary file
+            at a time. Defaults to DEFAULT_CHUNK_SIZE.
+        session: HTTP session used to fetch URLs. Defaults to the shared session returned
+            by ``get_session()``.
+        max_workers: Maximum number of URLs downloaded concurrently when used with
+            ``PrefetchArgument`` or ``PrefetchOption``. Defaults to DEFAULT_MAX_WORKERS.
+        cache_dir: If set, downloaded bodies are kept in this directory and revalidated on
+            later runs instead of being downloaded again (see ``HttpCache``). Defaults to None.
+        cache_ttl: Seconds after which a cached entry is evicted. Defaults to None.
+        cache_max_size: Maximum total size, in bytes, of the cache. Defaults to None.
+        temp_dir: Directory of the temporary files, e.g. "/dev/shm" to keep downloads in
+            memory-backed storage. Defaults to the system's temporary directory.
+        unnamed: If True, URLs are downloaded to an unnamed temporary file (``O_TMPFILE`` on
+            Linux), which can't leak even without a Click context, for callers that don't
+            need the file's path. Defaults to False.
+        spool_max_size: If set, download bodies of at most this many bytes are kept in memory,
+            and larger ones moved to an unnamed temporary file. Implies unnamed. Defaults to None.
 
     Example:
         >>> @click.command()
@@ -354,6 +3230,121 @@ class FileOrUrlParamType(click.File):
         >>> # http://example.com/data
     """
 
+    name = "file-or-url"
+
+    def __init__(self, *args, **kwargs):
+        self.chunk_size = kwargs.get("chunk_size", DEFAULT_CHUNK_SIZE)
+        self.session = kwargs.get("session")
+        self.max_workers = kwargs.get("max_workers", DEFAULT_MAX_WORKERS)
+        cache_dir = kwargs.get("cache_dir")
+        self.cache = HttpCache(cache_dir, ttl=kwargs.get("cache_ttl"), max_size=kwargs.get("cache_max_size")) if cache_dir else None
+        self.temp_dir = kwargs.get("temp_dir")
+        self.unnamed = kwargs.get("unnamed", False)
+        self.spool_max_size = kwargs.get("spool_max_size")
+
+        for option in (
+            "chunk_size",
+            "session",
+            "max_workers",
+            "cache_dir",
+            "cache_ttl",
+            "cache_max_size",
+            "temp_dir",
+            "unnamed",
+            "spool_max_size",
+        ):
+            if option in kwargs:
+                del kwargs[option]
+
+        super().__init__(*args, **kwargs)
+
+    def _is_fetchable(self, value):
+        return "r" in self.mode and is_url(value)
+
+    def _fetch(self, value, param, ctx):
+        """Download a URL to a temporary file (or the cache, or memory) and return the file's path or object."""
+        if self.cache is not None:
+            return self._fetch_cached(value, param, ctx)
+
+        session = self.session if self.session is not None else get_session()
+        try:
+            r = session.get(value, stream=True)
+            _record_response(r)
+            if not r.ok:
+                r.close()
+                self.fail("Url %s does not return 200 OK" % value, param, ctx)
+        except Exception as e:
+            self.fail("Error while fetching %s: %s" % (value, e), param, ctx)
+
+        # Without a context nothing would remove a named temporary file
+        if self.unnamed or self.spool_max_size is not None or ctx is None:
+            try:
+                f = _write_unnamed_file(r.iter_content(chunk_size=self.chunk_size), self.spool_max_size, self.temp_dir)
+            except Exception as e:
+                self.fail("Error while fetching %s: %s" % (value, e), param, ctx)
+            finally:
+                r.close()
+            return _open_unnamed_file(self, f, ctx)
+
+        # Create a temporary file that will be automatically cleaned up
+        with tempfile.NamedTemporaryFile(mode="wb+", delete=False, dir=self.temp_dir) as tmpfile:
+            # Register cleanup with Click's context before downloading, so partial
+            # downloads are removed as well
+            if ctx is not None:
+                def cleanup():
+                    try:
+                        import os
+                        os.unlink(tmpfile.name)
+                    except OSError:
+                        pass
+                ctx.call_on_close(cleanup)
+
+            try:
+                for chunk in r.iter_content(chunk_size=self.chunk_size):
+                    tmpfile.write(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+            except Exception as e:
+                self.fail("Error while fetching %s: %s" % (value, e), param, ctx)
+            finally:
+                r.close()
+            tmpfile.flush()
+            return tmpfile.name
+
+    def _fetch_cached(self, value, param, ctx, revalidate=True):
+        """Fetch a URL through the cache and return a file object opened on the cached body."""
+        entry = self.cache.lookup(value) if revalidate else None
+        headers = self.cache.conditional_headers(entry) if entry is not None else {}
+
+        session = self.session if self.session is not None else get_session()
+        try:
+            r = session.get(value, stream=True, headers=headers)
+            _record_response(r, cache_hit=r.status_code == 304 and entry is not None)
+            if not r.ok:
+                r.close()
+                self.fail("Url %s does not return 200 OK" % value, param, ctx)
+        except Exception as e:
+            self.fail("Error while fetching %s: %s" % (value, e), param, ctx)
+
+        try:
+            if r.status_code == 304 and entry is not None:
+                r.close()
+                path = self.cache.revalidated(value)
+            else:
+                try:
+                    path = self.cache.store(value, r, chunk_size=self.chunk_size)
+                finally:
+                    r.close()
+        except Exception as e:
+            self.fail("Error while fetching %s: %s" % (value, e), param, ctx)
+
+        if path is None:
+            # The entry was evicted by another process in the meantime
+            return self._fetch_cached(value, param, ctx, revalidate=False)
+
+        # Open the body while holding the lock, so it can't be evicted in between
+        with self.cache.lock(shared=True):
+            return super().convert(path, param, ctx)
+
+    @_instrumented
     def convert(self, value, param, ctx):
         """Convert the input value to a file object.
 
@@ -371,45 +3362,32 @@ class FileOrUrlParamType(click.File):
         Raises:
             click.BadParameter: If URL fetch fails or file can't be opened
         """
-        if validators.url(value):
+        if is_url(value):
             # value is a url
             if "r" not in self.mode:
                 self.fail("Url %s cannot be opened in non-read mode" % value, param, ctx)
 
-            try:
-                r = requests.get(value)
-                if not r.ok:
-                    self.fail("Url %s does not return 200 OK" % value, param, ctx)
-            except Exception as e:
-                self.fail("Error while fetching %s: %s" % (value, e), param, ctx)
-
-            # Create a temporary file that will be automatically cleaned up
-            with tempfile.NamedTemporaryFile(mode="wb+", delete=False) as tmpfile:
-                if isinstance(r.content, str):
-                    tmpfile.write(r.content.encode('utf-8'))
-                else:
-                    tmpfile.write(r.content)
-                tmpfile.flush()
-                value = tmpfile.name
-
-                # Register cleanup with Click's context
-                if ctx is not None:
-                    def cleanup():
-                        try:
-                            import os
-                            os.unlink(tmpfile.name)
-                        except OSError:
-                            pass
-                    ctx.call_on_close(cleanup)
+            value = self._fetch_url(value, param, ctx)
 
         return super().convert(value, param, ctx)
 
 
-class StringOrFileParamType(click.File):
+class StringOrFileParamType(_FileParamType):
     """A Click parameter type that handles both direct strings and file paths.
 
     This parameter type allows flexibility in input, treating the value as a file path
-    if it exists, otherwise treating it as a direct string by writing it to a temporary file.
+    if it exists, otherwise treating it as a direct string. In read modes, direct strings are
+    returned as an in-memory file object (``io.StringIO``, or ``io.BytesIO`` in binary mode);
+    otherwise, or with ``tempfile=True``, they are written to a temporary file.
+
+    Args:
+        tempfile: If True, direct strings are always written to a temporary file, for callers
+            that need a real path (``.name``). Defaults to False.
+        temp_dir: Directory of the temporary files, e.g. "/dev/shm". Defaults to the system's
+            temporary directory.
+        spool_max_size: If set, direct strings larger than this many bytes are written to an
+            unnamed temporary file (``O_TMPFILE`` on Linux) instead of being kept in memory.
+            Defaults to None.
 
     Example:
         >>> @click.command()
@@ -421,11 +3399,25 @@ class StringOrFileParamType(click.File):
         >>> # "direct content"
     """
 
+    name = "string-or-file"
+
+    def __init__(self, *args, **kwargs):
+        self.tempfile = kwargs.get("tempfile", False)
+        self.temp_dir = kwargs.get("temp_dir")
+        self.spool_max_size = kwargs.get("spool_max_size")
+
+        for option in ("tempfile", "temp_dir", "spool_max_size"):
+            if option in kwargs:
+                del kwargs[option]
+
+        super().__init__(*args, **kwargs)
+
+    @_instrumented
     def convert(self, value, param, ctx):
         """Convert the input value to a file object.
 
-        If the value is not a valid file path, creates a temporary file containing
-        the value as its content.
+        If the value is not a valid file path, returns an in-memory file object, or creates a
+        temporary file, containing the value as its content.
 
         Args:
             value: The command-line value to convert
@@ -435,9 +3427,25 @@ class StringOrFileParamType(click.File):
         Returns:
             A file object
         """
+        if value != "-" and not exists(value) and "r" in self.mode and not self.tempfile:
+            # value is just a string, serve it from memory
+            if self.spool_max_size is not None:
+                content = value.encode(self.encoding or "utf-8")
+                if len(content) > self.spool_max_size:
+                    f = _write_unnamed_file([content], temp_dir=self.temp_dir)
+                    return _open_unnamed_file(self, f, ctx, encoding=self.encoding or "utf-8")
+            if "b" in self.mode:
+                return io.BytesIO(value.encode(self.encoding or "utf-8"))
+            return io.StringIO(value)
+
+        if value != "-" and not exists(value) and "r" in self.mode and ctx is None:
+            # Without a context nothing would remove a named temporary file
+            f = _write_unnamed_file([value.encode(self.encoding or "utf-8")], temp_dir=self.temp_dir)
+            return _open_unnamed_file(self, f, ctx, encoding=self.encoding or "utf-8")
+
         if value != "-" and not exists(value):
             # Create a temporary file that will be automatically cleaned up
-            with tempfile.NamedTemporaryFile(mode="w+", delete=False) as tmpfile:
+            with tempfile.NamedTemporaryFile(mode="w+", delete=False, dir=self.temp_dir) as tmpfile:
                 tmpfile.write(value)
                 tmpfile.flush()
                 value = tmpfile.name
@@ -455,7 +3463,7 @@ class StringOrFileParamType(click.File):
         return super().convert(value, param, ctx)
 
 
-class UrlOrListFromFileStdinParamType(click.File):
+class UrlOrListFromFileStdinParamType(_FileParamType):
     """A Click parameter type that handles URLs or lists from files/stdin.
 
     This parameter type provides three input methods:
@@ -463,6 +3471,16 @@ class UrlOrListFromFileStdinParamType(click.File):
     2. A file containing URLs (one per line)
     3. Standard input containing URLs (one per line)
 
+    Args:
+        checkpoint: Path of a ``Checkpoint`` file. If set, an iterator over the URLs is
+            returned, which saves how far it has been consumed (the byte offset for local
+            files, the number of lines for other inputs), and later runs with the same input
+            resume from there. Defaults to None.
+        checkpoint_every: Number of lines consumed between saves of the checkpoint. Defaults
+            to DEFAULT_CHECKPOINT_EVERY.
+        checkpoint_reset: If True, or the name of another parameter whose value is True (such
+            as a ``--reset`` flag), ignore the saved position and start over. Defaults to False.
+
     Example:
         >>> @click.command()
         >>> @click.argument('urls', type=UrlOrListFromFileStdinParamType('r'))
@@ -475,6 +3493,20 @@ class UrlOrListFromFileStdinParamType(click.File):
         >>> # - (URLs from stdin)
     """
 
+    name = "url-or-list-from-file-stdin"
+
+    def __init__(self, *args, **kwargs):
+        self.checkpoint = kwargs.get("checkpoint")
+        self.checkpoint_every = kwargs.get("checkpoint_every", DEFAULT_CHECKPOINT_EVERY)
+        self.checkpoint_reset = kwargs.get("checkpoint_reset", False)
+
+        for option in ("checkpoint", "checkpoint_every", "checkpoint_reset"):
+            if option in kwargs:
+                del kwargs[option]
+
+        super().__init__(*args, **kwargs)
+
+    @_instrumented
     def convert(self, value, param, ctx):
         """Convert the input value to a list of URLs or a file object.
 
@@ -484,9 +3516,15 @@ class UrlOrListFromFileStdinParamType(click.File):
             ctx: The Click context
 
         Returns:
-            Either a single-item list containing a URL or a file object
+            Either a single-item list containing a URL or a file object, or an iterator over
+            the URLs with checkpoint
         """
-        if validators.url(value):
+        if self.checkpoint is not None:
+            return _open_checkpointed_lines(self, value, param, ctx, functools.partial(self._open, value, param, ctx))
+        return self._open(value, param, ctx)
+
+    def _open(self, value, param, ctx):
+        if is_url(value):
             # value is a url
             return [value]
 
@@ -0,0 +1,127 @@
+import json
+
+import pytest
+import click
+from click.testing import CliRunner
+
+from click_tools.cli import Checkpoint, CheckpointIterator, FileUrlIterStringParamType, UrlOrListFromFileStdinParamType
+
+
+@pytest.fixture
+def checkpoint_path(tmp_path):
+    return str(tmp_path / 'job.checkpoint')
+
+
+@pytest.fixture
+def urls_file(tmp_path):
+    f = tmp_path / 'urls.txt'
+    f.write_text(''.join('http://example.com/%d\n' % i for i in range(10)))
+    return f
+
+
+def make_command(param_type, stop_at=None):
+    @click.command()
+    @click.option('--reset', is_flag=True, is_eager=True)
+    @click.argument('urls', type=param_type)
+    def cmd(reset, urls):
+        for url in urls:
+            if url.strip() == stop_at:
+                raise RuntimeError('preempted')
+            click.echo(url.strip())
+
+    return cmd
+
+
+def test_checkpoint_save_get_reset(checkpoint_path):
+    """Test saving and resetting positions per source."""
+    checkpoint = Checkpoint(checkpoint_path)
+    assert checkpoint.get('a') is None
+    checkpoint.save('a', {'lines': 3})
+    checkpoint.save('b', {'lines': 5, 'offset': 42})
+    assert checkpoint.get('a') == {'lines': 3}
+    assert Checkpoint(checkpoint_path).get('b') == {'lines': 5, 'offset': 42}
+    checkpoint.reset('a')
+    assert checkpoint.get('a') is None
+    checkpoint.reset()
+    assert checkpoint.get('b') is None
+
+
+def test_checkpoint_iterator_counts_consumed_elements(checkpoint_path):
+    """Test that an element only counts once the next one is requested."""
+    checkpoint = Checkpoint(checkpoint_path)
+    iterator = CheckpointIterator(iter('abcde'), checkpoint, 'src', every=2)
+    assert next(iterator) == 'a'
+    assert next(iterator) == 'b'
+    assert next(iterator) == 'c'
+    assert checkpoint.get('src') == {'lines': 2}
+    iterator.close()
+    assert checkpoint.get('src') == {'lines': 2}
+    assert list(iterator) == ['d', 'e']
+    assert checkpoint.get('src') == {'lines': 5}
+
+
+@pytest.mark.parametrize('param_type_class', [FileUrlIterStringParamType, UrlOrListFromFileStdinParamType])
+def test_checkpoint_resumes_file(checkpoint_path, urls_file, param_type_class):
+    """Test resuming a file from its byte offset after a crash."""
+    param_type = param_type_class('r', checkpoint=checkpoint_path, checkpoint_every=1)
+    runner = CliRunner()
+
+    result = runner.invoke(make_command(param_type, stop_at='http://example.com/4'), [str(urls_file)])
+    assert isinstance(result.exception, RuntimeError)
+    assert result.output.split() == ['http://example.com/%d' % i for i in range(4)]
+    [position] = json.load(open(checkpoint_path))['sources'].values()
+    assert position == {'lines': 4, 'offset': len(''.join('http://example.com/%d\n' % i for i in range(4)))}
+
+    result = runner.invoke(make_command(param_type), [str(urls_file)])
+    assert result.exit_code == 0, result.output
+    assert result.output.split() == ['http://example.com/%d' % i for i in range(4, 10)]
+
+    # Completed sources yield nothing until reset
+    result = runner.invoke(make_command(param_type), [str(urls_file)])
+    assert result.output == ''
+
+
+def test_checkpoint_reset_flag(checkpoint_path, urls_file):
+    """Test starting over with a reset flag."""
+    param_type = FileUrlIterStringParamType('r', checkpoint=checkpoint_path, checkpoint_reset='reset')
+    runner = CliRunner()
+    runner.invoke(make_command(param_type), [str(urls_file)])
+
+    result = runner.invoke(make_command(param_type), [str(urls_file)])
+    assert result.output == ''
+    result = runner.invoke(make_command(param_type), ['--reset', str(urls_file)])
+    assert len(result.output.split()) == 10
+
+
+def test_checkpoint_resumes_stdin_by_line_count(checkpoint_path):
+    """Test resuming a stream by skipping the lines consumed before."""
+    param_type = UrlOrListFromFileStdinParamType('r', checkpoint=checkpoint_path, checkpoint_every=1)
+    runner = CliRunner()
+    stdin = 'a\nb\nc\nd\n'
+
+    result = runner.invoke(make_command(param_type, stop_at='c'), ['-'], input=stdin)
+    assert result.output.split() == ['a', 'b']
+    assert Checkpoint(checkpoint_path).get('-') == {'lines': 2}
+
+    result = runner.invoke(make_command(param_type), ['-'], input=stdin)
+    assert result.output.split() == ['c', 'd']
+
+
+def test_checkpoint_with_read_ahead(checkpoint_path, urls_file):
+    """Test that read-ahead lines are not counted before they're consumed."""
+    param_type = FileUrlIterStringParamType('r', checkpoint=checkpoint_path, checkpoint_every=1, read_ahead=4)
+    runner = CliRunner()
+    runner.invoke(make_command(param_type, stop_at='http://example.com/2'), [str(urls_file)])
+    result = runner.invoke(make_command(param_type), [str(urls_file)])
+    assert result.output.split()[0] == 'http://example.com/2'
+
+
+def test_checkpoint_restarts_replaced_file(checkpoint_path, urls_file):
+    """Test that a checkpoint past the end of a replaced file is ignored."""
+    param_type = FileUrlIterStringParamType('r', checkpoint=checkpoint_path)
+    runner = CliRunner()
+    runner.invoke(make_command(param_type), [str(urls_file)])
+
+    urls_file.write_text('http://example.com/new\n')
+    result = runner.invoke(make_command(param_type), [str(urls_file)])
+    assert result.output == 'http://example.com/new\n'
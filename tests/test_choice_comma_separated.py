@@ -78,4 +78,46 @@ def test_choice_comma_separated_whitespace():
     """Test ChoiceCommaSeparated with whitespace in input."""
     param_type = ChoiceCommaSeparated(['apple', 'banana'])
     result = param_type.convert(' apple , banana ', None, None)
-    assert result == ['apple', 'banana'] 
\ No newline at end of file
+    assert result == ['apple', 'banana'] 
+
+
+def test_choice_comma_separated_canonical_spelling():
+    """Test that case-insensitive matches return the canonical choice spelling."""
+    param_type = ChoiceCommaSeparated(['us-East-1', 'EU-west-1'])
+    result = param_type.convert('US-EAST-1,eu-west-1', None, None)
+    assert result == ['us-East-1', 'EU-west-1']
+
+
+def test_choice_comma_separated_choices_reassigned():
+    """Test that reassigning choices invalidates the lookup index."""
+    param_type = ChoiceCommaSeparated(['apple', 'banana'])
+    assert param_type.convert('apple', None, None) == ['apple']
+
+    param_type.choices = ['grape']
+    assert param_type.convert('grape', None, None) == ['grape']
+    with pytest.raises(click.BadParameter):
+        param_type.convert('apple', None, None)
+
+
+def test_choice_comma_separated_choices_copied():
+    """Test that choices are copied, so changing the list passed in requires reassigning it."""
+    choices = ['apple', 'banana']
+    param_type = ChoiceCommaSeparated(choices)
+    choices[0] = 'cherry'
+    assert param_type.convert('apple', None, None) == ['apple']
+    with pytest.raises(click.BadParameter):
+        param_type.convert('cherry', None, None)
+
+    param_type.choices = choices
+    assert param_type.convert('cherry', None, None) == ['cherry']
+    with pytest.raises(click.BadParameter):
+        param_type.convert('apple', None, None)
+    assert param_type.convert('*', None, None) == ['cherry', 'banana']
+
+
+def test_choice_comma_separated_many_choices():
+    """Test ChoiceCommaSeparated with a large number of choices."""
+    choices = ['host-%05d' % i for i in range(20000)]
+    param_type = ChoiceCommaSeparated(choices)
+    values = ','.join(choices[::100])
+    assert param_type.convert(values, None, None) == choices[::100]
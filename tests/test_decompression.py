@@ -0,0 +1,136 @@
+import bz2
+import gzip
+import io
+import lzma
+import sys
+from unittest.mock import patch
+
+import pytest
+import click
+
+from click_tools.cli import FileIterStringParamType, FileUrlIterStringParamType, detect_compression, iter_decompressed_lines
+
+CONTENT = b'line1\nline2\r\nline3\n'
+
+COMPRESSORS = {
+    'gzip': (gzip.compress, '.gz'),
+    'bz2': (bz2.compress, '.bz2'),
+    'xz': (lzma.compress, '.xz'),
+}
+
+
+@pytest.fixture(params=sorted(COMPRESSORS))
+def compressed_file(request, tmp_path):
+    compress, extension = COMPRESSORS[request.param]
+    f = tmp_path / ('data.txt' + extension)
+    f.write_bytes(compress(CONTENT))
+    return f
+
+
+def test_detect_compression_magic_bytes():
+    """Test detecting compression formats from magic bytes."""
+    assert detect_compression(gzip.compress(b'x')[:6]) == 'gzip'
+    assert detect_compression(bz2.compress(b'x')[:6]) == 'bz2'
+    assert detect_compression(lzma.compress(b'x')[:6]) == 'xz'
+    assert detect_compression(b'\x28\xb5\x2f\xfd\x00\x00') == 'zstd'
+    assert detect_compression(b'plain ', 'data.gz') is None
+    assert detect_compression(b'BZh is', 'data.txt') is None
+
+
+def test_detect_compression_extension():
+    """Test that the extension is used when the header is too short to tell."""
+    assert detect_compression(b'', 'http://example.com/data.txt.zst?token=1') == 'zstd'
+    assert detect_compression(b'', 'data.txt') is None
+
+
+def test_iter_decompressed_lines(compressed_file):
+    """Test reading lines from a compressed file."""
+    with open(compressed_file, 'rb') as f:
+        assert list(iter_decompressed_lines(f, str(compressed_file), close_stream=False)) == ['line1\n', 'line2\n', 'line3\n']
+        assert not f.closed
+
+
+def test_iter_decompressed_lines_plain_binary():
+    """Test that uncompressed streams are passed through."""
+    stream = io.BytesIO(CONTENT)
+    assert list(iter_decompressed_lines(stream, binary=True)) == [b'line1\n', b'line2\r\n', b'line3\n']
+    assert stream.closed
+
+
+def test_iter_decompressed_lines_zstd():
+    """Test reading lines from a multi-frame Zstandard stream."""
+    zstandard = pytest.importorskip('zstandard')
+    compressor = zstandard.ZstdCompressor()
+    stream = io.BytesIO(compressor.compress(b'line1\n') + compressor.compress(b'line2\n'))
+    assert list(iter_decompressed_lines(stream)) == ['line1\n', 'line2\n']
+
+
+def test_iter_decompressed_lines_zstd_missing():
+    """Test that a missing zstandard package is reported."""
+    stream = io.BytesIO(b'\x28\xb5\x2f\xfd\x00\x00\x00\x00')
+    with patch.dict(sys.modules, {'zstandard': None}):
+        with pytest.raises(ImportError, match='click-tools\\[zstd\\]'):
+            list(iter_decompressed_lines(stream))
+
+
+def test_file_url_iter_string_decompress_file(cli_runner, compressed_file):
+    """Test FileUrlIterStringParamType decompressing a local file."""
+    @click.command()
+    @click.argument('input', type=FileUrlIterStringParamType('r', decompress=True))
+    def cmd(input):
+        click.echo('|'.join(line.rstrip('\n') for line in input))
+
+    result = cli_runner.invoke(cmd, [str(compressed_file)])
+    assert result.exit_code == 0
+    assert result.output.strip() == 'line1|line2|line3'
+
+
+def test_file_url_iter_string_decompress_url(cli_runner, mock_responses):
+    """Test FileUrlIterStringParamType decompressing a URL body."""
+    url = 'http://example.com/data.txt.gz'
+    mock_responses.add(mock_responses.GET, url, body=gzip.compress(CONTENT))
+
+    @click.command()
+    @click.argument('input', type=FileUrlIterStringParamType('r', decompress=True))
+    def cmd(input):
+        click.echo('|'.join(input))
+
+    result = cli_runner.invoke(cmd, [url])
+    assert result.exit_code == 0
+    assert result.output.strip() == 'line1|line2|line3'
+
+
+def test_file_iter_string_decompress_stdin(cli_runner):
+    """Test FileIterStringParamType decompressing stdin with type conversion."""
+    @click.command()
+    @click.argument('numbers', type=FileIterStringParamType('r', type=int, decompress=True))
+    def cmd(numbers):
+        click.echo(sum(numbers))
+
+    result = cli_runner.invoke(cmd, ['-'], input=gzip.compress(b'1\n2\n3\n'))
+    assert result.exit_code == 0
+    assert result.output.strip() == '6'
+
+
+def test_file_iter_string_decompress_plain_file(cli_runner, tmp_path):
+    """Test that decompress=True still reads uncompressed files."""
+    f = tmp_path / 'numbers.txt'
+    f.write_text('1\n2\n')
+
+    @click.command()
+    @click.argument('numbers', type=FileIterStringParamType('r', type=int, decompress=True))
+    def cmd(numbers):
+        click.echo(sum(numbers))
+
+    result = cli_runner.invoke(cmd, [str(f)])
+    assert result.exit_code == 0
+    assert result.output.strip() == '3'
+
+
+def test_file_iter_string_decompress_corrupt(tmp_path):
+    """Test that corrupt compressed input is reported as a bad parameter."""
+    f = tmp_path / 'data.gz'
+    f.write_bytes(b'\x1f\x8b' + b'garbage' * 10)
+    with pytest.raises(click.BadParameter) as exc_info:
+        FileIterStringParamType('r', decompress=True).convert(str(f), None, None)
+    assert 'Error while reading' in str(exc_info.value)
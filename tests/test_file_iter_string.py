@@ -95,4 +95,63 @@ def test_file_iter_string_invalid_conversion(cli_runner):
 def test_file_iter_string_invalid_mode(cli_runner):
     """Test FileIterStringParamType with invalid mode."""
     with pytest.raises(click.BadParameter):
-        FileIterStringParamType('w').convert('test.txt', None, None) 
\ No newline at end of file
+        FileIterStringParamType('w').convert('test.txt', None, None) 
+
+
+def test_file_iter_string_batch_type(cli_runner, temp_file):
+    """Test FileIterStringParamType with a batch conversion function."""
+    temp_file.write_text('1\n2\n3\n4\n5')
+
+    @click.command()
+    @click.argument('numbers', type=FileIterStringParamType('r', batch_type=lambda lines: [int(x) for x in lines], batch_size=2))
+    def cmd(numbers):
+        for batch in numbers.batches():
+            click.echo(sum(batch))
+
+    result = cli_runner.invoke(cmd, [str(temp_file)])
+    assert result.exit_code == 0
+    assert result.output.split() == ['3', '7', '5']
+
+
+def test_file_iter_string_batch_size(cli_runner, temp_file):
+    """Test FileIterStringParamType with a batch size and per-element conversion."""
+    temp_file.write_text('1\n2\n3')
+
+    @click.command()
+    @click.argument('numbers', type=FileIterStringParamType('r', type=int, batch_size=2))
+    def cmd(numbers):
+        for batch in numbers.batches():
+            click.echo(batch)
+
+    result = cli_runner.invoke(cmd, [str(temp_file)])
+    assert result.exit_code == 0
+    assert result.output.splitlines() == ['[1, 2]', '[3]']
+
+
+@pytest.mark.parametrize('executor', ['process', 'thread'])
+def test_file_iter_string_workers(cli_runner, temp_file, executor):
+    """Test converting lines in parallel, in the order of the input."""
+    temp_file.write_text('\n'.join(map(str, range(100))))
+
+    @click.command()
+    @click.argument('numbers', type=FileIterStringParamType('r', type=int, batch_size=8, workers=2, executor=executor))
+    def cmd(numbers):
+        click.echo(list(numbers) == list(range(100)))
+
+    result = cli_runner.invoke(cmd, [str(temp_file)])
+    assert result.exit_code == 0, result.output
+    assert result.output == 'True\n'
+
+
+def test_file_iter_string_workers_error_line_number(cli_runner, temp_file):
+    """Test that a conversion error in the first chunk is reported with its line number."""
+    temp_file.write_text('1\n2\nthree\n')
+
+    @click.command()
+    @click.argument('numbers', type=FileIterStringParamType('r', type=int, workers=2))
+    def cmd(numbers):
+        pass
+
+    result = cli_runner.invoke(cmd, [str(temp_file)])
+    assert result.exit_code != 0
+    assert 'line 3:' in result.output
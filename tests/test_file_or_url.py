@@ -1,6 +1,7 @@
 import pytest
 import click
 import responses
+import requests
 import os
 from click.testing import CliRunner
 from click_tools.cli import FileOrUrlParamType
@@ -215,4 +216,96 @@ def test_file_or_url_nonexistent_file(cli_runner, cli_command):
     """Test FileOrUrlParamType with nonexistent file."""
     result = cli_runner.invoke(cli_command, ['nonexistent.txt'])
     assert result.exit_code != 0
-    assert 'no such file or directory' in result.output.lower() 
\ No newline at end of file
+    assert 'no such file or directory' in result.output.lower() 
+
+
+def test_file_or_url_streams_in_chunks(mock_responses):
+    """Test that FileOrUrlParamType writes the response body to disk in chunks."""
+    url = 'http://example.com/large'
+    content = b'0123456789' * 100
+    mock_responses.add(
+        mock_responses.GET,
+        url,
+        body=content
+    )
+
+    param_type = FileOrUrlParamType('rb', chunk_size=64)
+    iter_content = requests.models.Response.iter_content
+    with patch('requests.models.Response.iter_content', autospec=True, side_effect=iter_content) as mock_iter:
+        f = param_type.convert(url, None, None)
+    try:
+        assert f.read() == content
+        mock_iter.assert_called_once_with(ANY, chunk_size=64)
+    finally:
+        f.close()
+
+
+def test_file_or_url_cleanup_on_context_close(mock_responses):
+    """Test that the downloaded temporary file is removed when the context closes."""
+    url = 'http://example.com/test'
+    mock_responses.add(
+        mock_responses.GET,
+        url,
+        body='url content'
+    )
+
+    ctx = click.Context(click.Command('cmd'))
+    with ctx:
+        f = FileOrUrlParamType('r').convert(url, None, ctx)
+        assert f.read() == 'url content'
+        assert os.path.exists(f.name)
+    assert not os.path.exists(f.name)
+
+
+def test_file_or_url_unnamed(mock_responses):
+    """Test downloading to an unnamed temporary file, without any named file left behind."""
+    url = 'http://example.com/test'
+    mock_responses.add(mock_responses.GET, url, body='line1\nline2\n')
+
+    with patch('tempfile.NamedTemporaryFile') as mock_named_temp_file:
+        f = FileOrUrlParamType('r', unnamed=True).convert(url, None, None)
+    mock_named_temp_file.assert_not_called()
+    assert f.read() == 'line1\nline2\n'
+    assert not isinstance(f.buffer, BytesIO)
+    f.close()
+
+
+def test_file_or_url_spool_max_size(mock_responses):
+    """Test that small bodies stay in memory and larger ones go to an unnamed file."""
+    url = 'http://example.com/test'
+    mock_responses.add(mock_responses.GET, url, body=b'small')
+    mock_responses.add(mock_responses.GET, url, body=b'x' * 100)
+
+    param_type = FileOrUrlParamType('rb', spool_max_size=10, chunk_size=8)
+    small = param_type.convert(url, None, None)
+    assert isinstance(small, BytesIO)
+    assert small.read() == b'small'
+
+    large = param_type.convert(url, None, None)
+    assert not isinstance(large, BytesIO)
+    assert large.read() == b'x' * 100
+    large.close()
+
+
+def test_file_or_url_temp_dir(mock_responses, tmp_path):
+    """Test downloading to a temporary file in a configured directory."""
+    url = 'http://example.com/test'
+    mock_responses.add(mock_responses.GET, url, body='content')
+
+    ctx = click.Context(click.Command('cmd'))
+    with ctx:
+        f = FileOrUrlParamType('r', temp_dir=str(tmp_path)).convert(url, None, ctx)
+        assert os.path.dirname(f.name) == str(tmp_path)
+        assert f.read() == 'content'
+    assert os.listdir(tmp_path) == []
+
+
+def test_file_or_url_without_context_leaves_no_file(mock_responses, tmp_path):
+    """Test that downloads converted without a context don't leave named files behind."""
+    url = 'http://example.com/data'
+    mock_responses.add(mock_responses.GET, url, body=b'content')
+
+    f = FileOrUrlParamType('r', temp_dir=str(tmp_path)).convert(url, None, None)
+    assert f.read() == 'content'
+    assert os.listdir(tmp_path) == []
+    f.close()
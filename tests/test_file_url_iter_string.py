@@ -2,7 +2,7 @@ import pytest
 import click
 import responses
 from click.testing import CliRunner
-from click_tools.cli import FileUrlIterStringParamType
+from click_tools.cli import FileUrlIterStringParamType, iter_response_lines
 
 
 @pytest.fixture
@@ -112,4 +112,86 @@ def test_file_url_iter_string_invalid_mode(cli_runner):
     param_type = FileUrlIterStringParamType('w')
     with pytest.raises(click.BadParameter) as exc_info:
         param_type.convert('http://example.com', None, None)
-    assert 'non-read mode' in str(exc_info.value) 
\ No newline at end of file
+    assert 'non-read mode' in str(exc_info.value) 
+
+
+@pytest.fixture
+def streaming_cli_command():
+    """Fixture that provides a Click command using FileUrlIterStringParamType in streaming mode."""
+    @click.command()
+    @click.argument('input', type=FileUrlIterStringParamType('r', stream=True, chunk_size=4))
+    def cmd(input):
+        click.echo('\n'.join(input))
+    return cmd
+
+
+class FakeStreamingResponse:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = False
+
+    def iter_content(self, chunk_size=1):
+        yield from self.chunks
+
+    def close(self):
+        self.closed = True
+
+
+def test_file_url_iter_string_stream_from_url(cli_runner, streaming_cli_command, mock_responses):
+    """Test FileUrlIterStringParamType streaming lines from a URL."""
+    url = 'http://example.com/data'
+    mock_responses.add(
+        mock_responses.GET,
+        url,
+        body=b'line1\r\nline2\nline3',
+        status=200
+    )
+
+    result = cli_runner.invoke(streaming_cli_command, [url])
+    assert result.exit_code == 0
+    assert result.output.strip() == 'line1\nline2\nline3'
+
+
+def test_file_url_iter_string_stream_url_error_404(cli_runner, streaming_cli_command, mock_responses):
+    """Test FileUrlIterStringParamType in streaming mode with URL that returns 404."""
+    url = 'http://example.com/error'
+    mock_responses.add(
+        mock_responses.GET,
+        url,
+        status=404
+    )
+
+    result = cli_runner.invoke(streaming_cli_command, [url])
+    assert result.exit_code != 0
+    assert 'not return 200' in result.output
+
+
+def test_iter_response_lines_chunk_boundaries():
+    """Test that lines, CRLF pairs and multibyte characters split across chunks are rebuilt."""
+    response = FakeStreamingResponse([b'ab', b'c\r', b'\nd\xc3', b'\xa9f\n', b'\n', b'last'])
+    assert list(iter_response_lines(response)) == ['abc', 'déf', '', 'last']
+    assert response.closed
+
+
+def test_iter_response_lines_matches_splitlines():
+    """Test that streamed lines match str.splitlines on the whole body."""
+    body = 'one\rtwo\r\nthree\n\nfour\x0bfive\n'
+    chunks = [body[i:i + 3].encode('utf-8') for i in range(0, len(body), 3)]
+    assert list(iter_response_lines(FakeStreamingResponse(chunks))) == body.splitlines()
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7])
+def test_iter_response_lines_long_line_across_chunks(chunk_size):
+    """Test a line spanning many chunks, next to CR, CRLF and empty lines at every boundary."""
+    body = ('x' * 50 + '\r\r\n\n\ré' + 'y' * 20 + '\r').encode('utf-8')
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+    assert list(iter_response_lines(FakeStreamingResponse(chunks))) == body.decode('utf-8').splitlines()
+
+
+def test_iter_response_lines_closes_on_early_exit():
+    """Test that the response is closed when the iterator is closed before exhaustion."""
+    response = FakeStreamingResponse([b'a\nb\nc\n'])
+    lines = iter_response_lines(response)
+    assert next(lines) == 'a'
+    lines.close()
+    assert response.closed
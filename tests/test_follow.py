@@ -0,0 +1,108 @@
+import os
+import queue
+import threading
+import time
+
+import pytest
+import click
+
+from click_tools.cli import FileUrlIterStringParamType, _inotify_watch, iter_follow_lines
+
+
+class Follower:
+    """Consumes a followed file in a background thread."""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.received = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        for line in self.lines:
+            self.received.put(line)
+
+    def get(self, n, timeout=2):
+        return [self.received.get(timeout=timeout) for _ in range(n)]
+
+
+@pytest.fixture(params=[True, False], ids=['inotify', 'polling'])
+def inotify(request):
+    return request.param
+
+
+def append(path, data):
+    with open(path, 'a') as f:
+        f.write(data)
+
+
+def test_follow_appended_lines(tmp_path, inotify):
+    """Test that appended lines are yielded, and partial lines only once complete."""
+    path = tmp_path / 'app.log'
+    path.write_text('first\n')
+    follower = Follower(iter_follow_lines(str(path), poll_interval=0.05, inotify=inotify))
+    assert follower.get(1) == ['first\n']
+
+    append(path, 'sec')
+    time.sleep(0.15)
+    assert follower.received.empty()
+    append(path, 'ond\nthird\n')
+    assert follower.get(2) == ['second\n', 'third\n']
+
+
+def test_follow_truncation(tmp_path, inotify):
+    """Test that a truncated file is read again from its start."""
+    path = tmp_path / 'app.log'
+    path.write_text('old line one\nold line two\n')
+    follower = Follower(iter_follow_lines(str(path), poll_interval=0.05, inotify=inotify))
+    assert follower.get(2) == ['old line one\n', 'old line two\n']
+
+    path.write_text('new\n')
+    assert follower.get(1) == ['new\n']
+
+
+def test_follow_rotation(tmp_path, inotify):
+    """Test following the new file after a rotation, once the old one is read."""
+    path = tmp_path / 'app.log'
+    path.write_text('before\n')
+    follower = Follower(iter_follow_lines(str(path), poll_interval=0.05, inotify=inotify))
+    assert follower.get(1) == ['before\n']
+
+    os.rename(path, tmp_path / 'app.log.1')
+    append(tmp_path / 'app.log.1', 'late\n')
+    time.sleep(0.15)
+    path.write_text('after\n')
+    assert follower.get(2) == ['late\n', 'after\n']
+
+
+def test_follow_inotify_latency(tmp_path):
+    """Test that inotify wakes up before the poll interval."""
+    if _inotify_watch(str(tmp_path)) is None:
+        pytest.skip('inotify is not available')
+    path = tmp_path / 'app.log'
+    path.write_text('')
+    follower = Follower(iter_follow_lines(str(path), poll_interval=30))
+    time.sleep(0.1)
+    start = time.monotonic()
+    append(path, 'line\n')
+    assert follower.get(1) == ['line\n']
+    assert time.monotonic() - start < 5
+
+
+def test_file_url_iter_string_follow(tmp_path):
+    """Test following a file through the param type, closed with the context."""
+    path = tmp_path / 'app.log'
+    path.write_text('a\n')
+    ctx = click.Context(click.Command('cmd'))
+    with ctx:
+        lines = FileUrlIterStringParamType('r', follow=True, poll_interval=0.05).convert(str(path), None, ctx)
+        assert next(lines) == 'a\n'
+        append(path, 'b\n')
+        assert next(lines) == 'b\n'
+    with pytest.raises(StopIteration):
+        next(lines)
+
+
+def test_follow_with_read_ahead():
+    with pytest.raises(ValueError):
+        FileUrlIterStringParamType('r', follow=True, read_ahead=2)
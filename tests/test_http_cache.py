@@ -0,0 +1,116 @@
+import os
+import time
+
+import pytest
+import click
+
+from click_tools import FileOrUrlParamType, HttpCache
+
+URL = 'http://example.com/reference'
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return tmp_path / 'cache'
+
+
+def fetch(param_type, url=URL):
+    ctx = click.Context(click.Command('cmd'))
+    with ctx:
+        return param_type.convert(url, None, ctx).read()
+
+
+def test_http_cache_stores_and_revalidates(cache_dir, mock_responses):
+    """Test that cached entries are revalidated and served from disk on a 304."""
+    mock_responses.add(mock_responses.GET, URL, body='v1', headers={'ETag': '"abc"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'})
+    mock_responses.add(mock_responses.GET, URL, status=304)
+
+    param_type = FileOrUrlParamType('r', cache_dir=str(cache_dir))
+    assert fetch(param_type) == 'v1'
+    assert fetch(param_type) == 'v1'
+
+    revalidation = mock_responses.calls[1].request
+    assert revalidation.headers['If-None-Match'] == '"abc"'
+    assert revalidation.headers['If-Modified-Since'] == 'Mon, 01 Jan 2024 00:00:00 GMT'
+
+
+def test_http_cache_replaces_modified_body(cache_dir, mock_responses):
+    """Test that a 200 response to a revalidation replaces the cached body."""
+    mock_responses.add(mock_responses.GET, URL, body='v1', headers={'ETag': '"v1"'})
+    mock_responses.add(mock_responses.GET, URL, body='v2', headers={'ETag': '"v2"'})
+    mock_responses.add(mock_responses.GET, URL, status=304)
+
+    param_type = FileOrUrlParamType('r', cache_dir=str(cache_dir))
+    assert fetch(param_type) == 'v1'
+    assert fetch(param_type) == 'v2'
+    assert fetch(param_type) == 'v2'
+    assert mock_responses.calls[2].request.headers['If-None-Match'] == '"v2"'
+
+
+def test_http_cache_keeps_body_after_context_close(cache_dir, mock_responses):
+    """Test that cached bodies are not removed when the Click context closes."""
+    mock_responses.add(mock_responses.GET, URL, body='v1')
+
+    fetch(FileOrUrlParamType('r', cache_dir=str(cache_dir)))
+    assert len([name for name in os.listdir(cache_dir) if name.endswith('.body')]) == 1
+
+
+def test_http_cache_ttl(cache_dir, mock_responses):
+    """Test that entries older than the TTL are downloaded again without revalidation."""
+    mock_responses.add(mock_responses.GET, URL, body='v1', headers={'ETag': '"v1"'})
+    mock_responses.add(mock_responses.GET, URL, body='v1', headers={'ETag': '"v1"'})
+
+    param_type = FileOrUrlParamType('r', cache_dir=str(cache_dir), cache_ttl=60)
+    fetch(param_type)
+    cache = param_type.cache
+    assert cache.lookup(URL) is not None
+
+    real_time = time.time
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(time, 'time', lambda: real_time() + 120)
+        assert cache.lookup(URL) is None
+        assert fetch(param_type) == 'v1'
+    assert 'If-None-Match' not in mock_responses.calls[1].request.headers
+
+
+def test_http_cache_size_eviction(cache_dir, mock_responses):
+    """Test that least recently used entries are evicted to stay under max_size."""
+    for name in ('a', 'b', 'c'):
+        mock_responses.add(mock_responses.GET, 'http://example.com/%s' % name, body=name * 10)
+
+    param_type = FileOrUrlParamType('r', cache_dir=str(cache_dir), cache_max_size=25)
+    for name in ('a', 'b', 'c'):
+        fetch(param_type, 'http://example.com/%s' % name)
+        time.sleep(0.01)
+
+    cache = param_type.cache
+    assert cache.lookup('http://example.com/a') is None
+    assert cache.lookup('http://example.com/b') is not None
+    assert cache.lookup('http://example.com/c') is not None
+
+
+def test_http_cache_keeps_entry_larger_than_max_size(cache_dir, mock_responses):
+    """Test that an entry bigger than max_size is still served right after being stored."""
+    mock_responses.add(mock_responses.GET, URL, body='x' * 100)
+    assert fetch(FileOrUrlParamType('r', cache_dir=str(cache_dir), cache_max_size=10)) == 'x' * 100
+
+
+def test_http_cache_error_status(cache_dir, mock_responses):
+    """Test that error responses are reported and not cached."""
+    mock_responses.add(mock_responses.GET, URL, status=500)
+
+    param_type = FileOrUrlParamType('r', cache_dir=str(cache_dir))
+    with pytest.raises(click.BadParameter) as exc_info:
+        fetch(param_type)
+    assert 'not return 200' in str(exc_info.value)
+    assert param_type.cache.lookup(URL) is None
+
+
+def test_http_cache_shared_between_instances(cache_dir, mock_responses):
+    """Test that separate HttpCache instances (e.g. processes) share the same directory."""
+    mock_responses.add(mock_responses.GET, URL, body='v1', headers={'ETag': '"v1"'})
+    fetch(FileOrUrlParamType('r', cache_dir=str(cache_dir)))
+
+    entry = HttpCache(str(cache_dir)).lookup(URL)
+    assert entry['etag'] == '"v1"'
+    assert entry['size'] == 2
@@ -0,0 +1,71 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+
+def imported_modules(code):
+    """Run code in a fresh interpreter with -X importtime and return the imported module names."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=Path(__file__).resolve().parent.parent,
+    )
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        name = line.rsplit('|', 1)[1].strip()
+        modules.add(name)
+    return modules
+
+
+@pytest.mark.parametrize('code', [
+    'import click_tools',
+    'from click_tools import ListCommaSeparated, ChoiceCommaSeparated',
+    'from click_tools import FileOrUrlParamType, FileUrlIterStringParamType',
+    'import click_tools.cli',
+])
+def test_import_does_not_load_network_stack(code):
+    """Test that importing click_tools doesn't import requests or validators."""
+    modules = imported_modules(code)
+    assert 'requests' not in modules
+    assert 'validators' not in modules
+
+
+def test_import_does_not_load_multiprocessing():
+    """Test that importing click_tools.cli doesn't import concurrent.futures and multiprocessing."""
+    modules = imported_modules('import click_tools.cli')
+    assert 'concurrent.futures' not in modules
+    assert 'multiprocessing' not in modules
+
+
+def test_import_package_does_not_load_cli():
+    """Test that importing the package alone doesn't import click_tools.cli."""
+    modules = imported_modules('import click_tools')
+    assert 'click_tools.cli' not in modules
+
+
+def test_converting_local_file_does_not_load_network_stack(tmp_path):
+    """Test that converting a local file doesn't import requests or validators."""
+    f = tmp_path / 'test.txt'
+    f.write_text('content')
+    modules = imported_modules(
+        'from click_tools import FileOrUrlParamType; FileOrUrlParamType("r").convert(%r, None, None).close()' % str(f)
+    )
+    assert 'requests' not in modules
+    assert 'validators' not in modules
+
+
+def test_lazy_attribute_access():
+    """Test that lazily resolved attributes are the objects defined in click_tools.cli."""
+    import click_tools
+    import click_tools.cli
+
+    assert click_tools.ListCommaSeparated is click_tools.cli.ListCommaSeparated
+    assert set(click_tools.__all__) <= set(dir(click_tools))
+    with pytest.raises(AttributeError):
+        click_tools.DoesNotExist
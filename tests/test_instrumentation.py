@@ -0,0 +1,182 @@
+import click
+from click.testing import CliRunner
+
+from click_tools import (
+    FileOrUrlParamType,
+    FileUrlIterStringParamType,
+    ListCommaSeparated,
+    PrefetchArgument,
+    enable_instrumentation,
+    format_conversion_summary,
+    get_conversion_stats,
+    instrumentation_option,
+)
+
+URL = 'http://example.com/data'
+
+
+def test_instrumentation_disabled_by_default(tmp_path):
+    """Test that nothing is recorded or wrapped unless instrumentation is enabled."""
+    f = tmp_path / 'lines.txt'
+    f.write_text('a\n')
+    ctx = click.Context(click.Command('cmd'))
+    with ctx:
+        lines = FileUrlIterStringParamType('r').convert(str(f), None, ctx)
+        assert type(lines).__name__ != '_InstrumentedIterator'
+        assert get_conversion_stats(ctx) == []
+
+
+def test_instrumentation_counts_lines_and_bytes(tmp_path):
+    """Test recording the lines and bytes yielded by an iterator."""
+    f = tmp_path / 'lines.txt'
+    f.write_text('ab\nçd\n')
+    param = click.Argument(['source'])
+    ctx = click.Context(click.Command('cmd'))
+    with ctx:
+        enable_instrumentation(ctx)
+        assert list(FileUrlIterStringParamType('r').convert(str(f), param, ctx)) == ['ab\n', 'çd\n']
+
+    [stats] = get_conversion_stats(ctx)
+    assert stats.param == 'source'
+    assert stats.value == str(f)
+    assert stats.type == 'file-url-iter-string'
+    assert stats.lines == 2
+    assert stats.bytes_read == 7
+    assert stats.convert_seconds > 0
+    assert stats.read_seconds > 0
+    assert stats.status is None
+
+
+def test_instrumentation_records_lists_and_errors():
+    """Test recording list results and conversion errors."""
+    ctx = click.Context(click.Command('cmd'))
+    with ctx:
+        enable_instrumentation(ctx)
+        ListCommaSeparated().convert('a,b,c', None, ctx)
+        try:
+            FileUrlIterStringParamType('w').convert('out.txt', None, ctx)
+        except click.BadParameter:
+            pass
+
+    ok, failed = get_conversion_stats(ctx)
+    assert ok.lines == 3
+    assert ok.error is None
+    assert 'non-read mode' in failed.error
+
+
+def test_instrumentation_records_http_status(mock_responses):
+    """Test recording the HTTP status of fetched URLs."""
+    mock_responses.add(mock_responses.GET, URL, body='line1\nline2')
+    ctx = click.Context(click.Command('cmd'))
+    with ctx:
+        enable_instrumentation(ctx)
+        list(FileUrlIterStringParamType('r').convert(URL, None, ctx))
+
+    [stats] = get_conversion_stats(ctx)
+    assert stats.status == 200
+    assert stats.retries == 0
+    assert stats.lines == 2
+
+
+def test_instrumentation_records_cache_hits(tmp_path, mock_responses):
+    """Test recording whether cached bodies were reused."""
+    mock_responses.add(mock_responses.GET, URL, body='v1', headers={'ETag': '"v1"'})
+    mock_responses.add(mock_responses.GET, URL, status=304)
+    param_type = FileOrUrlParamType('r', cache_dir=str(tmp_path / 'cache'))
+
+    results = []
+    for _ in range(2):
+        ctx = click.Context(click.Command('cmd'))
+        with ctx:
+            enable_instrumentation(ctx)
+            param_type.convert(URL, None, ctx).read()
+        results.append(get_conversion_stats(ctx)[0])
+
+    assert [stats.cache_hit for stats in results] == [False, True]
+    assert [stats.status for stats in results] == [200, 304]
+    assert results[1].bytes_read == 2
+
+
+def test_instrumentation_callback(tmp_path):
+    """Test that the callback receives every record when the context closes."""
+    received = []
+    ctx = click.Context(click.Command('cmd'))
+    with ctx:
+        enable_instrumentation(ctx, callback=received.append)
+        ListCommaSeparated().convert('a', None, ctx)
+        assert received == []
+    assert [stats.lines for stats in received] == [1]
+
+
+def test_instrumentation_option_prints_summary(tmp_path):
+    """Test that the --stats flag prints a summary table."""
+    f = tmp_path / 'lines.txt'
+    f.write_text('a\nb\n')
+
+    @click.command()
+    @instrumentation_option()
+    @click.argument('source', type=FileUrlIterStringParamType('r'))
+    def cmd(source):
+        for _ in source:
+            pass
+
+    result = CliRunner().invoke(cmd, [str(f), '--stats'])
+    assert result.exit_code == 0, result.output
+    header, row = result.stderr.splitlines()
+    assert header.split()[:3] == ['PARAM', 'VALUE', 'TYPE']
+    assert row.split()[0] == 'source'
+
+    result = CliRunner().invoke(cmd, [str(f)])
+    assert result.output == ''
+
+
+def test_instrumentation_records_repeated_values(tmp_path):
+    """Test that each conversion of a repeated value gets its own row."""
+    f = tmp_path / 'lines.txt'
+    f.write_text('a\nb\n')
+
+    @click.command()
+    @instrumentation_option()
+    @click.argument('sources', nargs=-1, type=FileUrlIterStringParamType('r'))
+    def cmd(sources):
+        for source in sources:
+            for _ in source:
+                pass
+
+    result = CliRunner().invoke(cmd, ['--stats', str(f), str(f)])
+    assert result.exit_code == 0, result.output
+    header, *rows = result.stderr.splitlines()
+    assert len(rows) == 2
+    for row in rows:
+        columns = row.split()
+        assert columns[2] == 'file-url-iter-string'
+        assert columns[5] == '2'
+
+
+def test_instrumentation_records_prefetched_urls(mock_responses):
+    """Test that prefetched URLs are recorded once per value, in argument order."""
+    other_url = URL + '/other'
+    mock_responses.add(mock_responses.GET, URL, body='a\nb')
+    mock_responses.add(mock_responses.GET, other_url, body='c', status=200)
+    received = []
+
+    @click.command()
+    @click.argument('sources', nargs=-1, type=FileOrUrlParamType('r'), cls=PrefetchArgument)
+    def prefetching_cmd(sources):
+        pass
+
+    ctx = click.Context(prefetching_cmd)
+    with ctx:
+        enable_instrumentation(ctx, callback=received.append)
+        prefetching_cmd.parse_args(ctx, [URL, other_url, URL])
+
+    assert [(stats.value, stats.status) for stats in received] == [(URL, 200), (other_url, 200), (URL, 200)]
+    assert all(stats.convert_seconds > 0 for stats in received)
+
+
+def test_format_conversion_summary_truncates_values():
+    """Test that long values are truncated in the summary table."""
+    from click_tools import ConversionStats
+
+    table = format_conversion_summary([ConversionStats('source', 'x' * 100, 'text')])
+    assert 'x' * 37 + '...' in table
@@ -0,0 +1,128 @@
+import os
+
+import pytest
+import click
+from click.testing import CliRunner
+
+from click_tools.cli import FileIterStringParamType, LineIndex
+
+
+@pytest.fixture
+def lines_file(tmp_path):
+    f = tmp_path / 'lines.txt'
+    f.write_text(''.join('line %d\n' % i for i in range(1000)))
+    return f
+
+
+def test_line_index_iter_lines(lines_file):
+    """Test reading line ranges at any position."""
+    index = LineIndex(str(lines_file), stride=7)
+    assert list(index.iter_lines(500, 503)) == ['line 500\n', 'line 501\n', 'line 502\n']
+    assert list(index.iter_lines(998)) == ['line 998\n', 'line 999\n']
+    assert list(index.iter_lines(1000)) == []
+    assert all(index.read_line(n) == 'line %d\n' % n for n in range(0, 1000, 13))
+
+
+def test_line_index_len_and_sample(lines_file):
+    """Test counting lines and sampling them reproducibly."""
+    index = LineIndex(str(lines_file), stride=10)
+    assert len(index) == 1000
+    sample = index.sample(5, seed=3)
+    assert sample == index.sample(5, seed=3)
+    assert len(set(sample)) == 5
+    numbers = [int(line.split()[1]) for line in sample]
+    assert numbers == sorted(numbers)
+
+
+def test_line_index_last_line_without_newline(tmp_path):
+    """Test indexing a file whose last line has no newline, and CRLF endings."""
+    f = tmp_path / 'crlf.txt'
+    f.write_bytes(b'a\r\nb\r\nc')
+    index = LineIndex(str(f), stride=1)
+    assert len(index) == 3
+    assert index.read_line(2) == 'c'
+    assert index.read_line(0) == 'a\n'
+    assert index.read_line(1, binary=True) == b'b\r\n'
+    with pytest.raises(IndexError):
+        index.read_line(3)
+
+
+def test_line_index_sidecar_is_reused(lines_file):
+    """Test that a partial index is saved and extended by later runs."""
+    index = LineIndex(str(lines_file), stride=5)
+    list(index.iter_lines(10, 11))
+    assert os.path.exists(str(lines_file) + '.idx')
+
+    reloaded = LineIndex(str(lines_file), stride=5)
+    assert reloaded._next_line >= 10
+    assert reloaded.read_line(999) == 'line 999\n'
+    assert LineIndex(str(lines_file), stride=5)._complete
+
+
+def test_line_index_detects_stale_index(lines_file):
+    """Test that the index is rebuilt when the file changes."""
+    index = LineIndex(str(lines_file), stride=5)
+    assert len(index) == 1000
+
+    lines_file.write_text('new\n' * 10)
+    stat = os.stat(lines_file)
+    os.utime(lines_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    index = LineIndex(str(lines_file), stride=5)
+    assert len(index) == 10
+    assert index.read_line(9) == 'new\n'
+
+
+def test_line_index_in_memory(lines_file):
+    """Test an index that isn't saved to disk."""
+    index = LineIndex(str(lines_file), index_path=None)
+    assert index.read_line(700) == 'line 700\n'
+    assert not os.path.exists(str(lines_file) + '.idx')
+
+
+def test_line_index_empty_file(tmp_path):
+    """Test indexing an empty file."""
+    f = tmp_path / 'empty.txt'
+    f.write_bytes(b'')
+    index = LineIndex(str(f))
+    assert len(index) == 0
+    assert list(index.iter_lines()) == []
+
+
+def test_file_iter_string_from_line_option(lines_file):
+    """Test resuming from a line given by another option."""
+    @click.command()
+    @click.option('--from-line', type=int, is_eager=True)
+    @click.option('--to-line', type=int, is_eager=True)
+    @click.argument('numbers', type=FileIterStringParamType('r', type=lambda line: int(line.split()[1]), from_line='from_line', to_line='to_line'))
+    def cmd(from_line, to_line, numbers):
+        click.echo(list(numbers))
+
+    runner = CliRunner()
+    result = runner.invoke(cmd, ['--from-line', '998', str(lines_file)])
+    assert result.exit_code == 0, result.output
+    assert result.output == '[997, 998, 999]\n'
+    assert os.path.exists(str(lines_file) + '.idx')
+
+    result = runner.invoke(cmd, ['--from-line', '3', '--to-line', '4', str(lines_file)])
+    assert result.output == '[2, 3]\n'
+
+
+def test_file_iter_string_line_range_without_index(tmp_path):
+    """Test line ranges on stdin and in-memory indexes."""
+    param_type = FileIterStringParamType('r', from_line=2, to_line=3)
+    runner = CliRunner()
+
+    @click.command()
+    @click.argument('lines', type=param_type)
+    def cmd(lines):
+        click.echo(''.join(lines), nl=False)
+
+    result = runner.invoke(cmd, ['-'], input='a\nb\nc\nd\n')
+    assert result.output == 'b\nc\n'
+
+    f = tmp_path / 'lines.txt'
+    f.write_text('a\nb\nc\nd\n')
+    param_type.line_index = False
+    result = runner.invoke(cmd, [str(f)])
+    assert result.output == 'b\nc\n'
+    assert os.listdir(tmp_path) == ['lines.txt']
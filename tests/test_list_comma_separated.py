@@ -61,4 +61,24 @@ def test_list_comma_separated_list_input():
     """Test ListCommaSeparated with list input."""
     param_type = ListCommaSeparated()
     result = param_type.convert(['a', 'b', 'c'], None, None)
-    assert set(result) == {'a', 'b', 'c'} 
\ No newline at end of file
+    assert set(result) == {'a', 'b', 'c'} 
+
+
+def test_list_comma_separated_duplicates_keep_order():
+    """Test that deduplication keeps the first occurrence of each value in order."""
+    param_type = ListCommaSeparated()
+    result = param_type.convert('c, a, b, a, c, d', None, None)
+    assert result == ['c', 'a', 'b', 'd']
+
+
+def test_list_comma_separated_unique_option():
+    """Test disabling deduplication in the constructor."""
+    param_type = ListCommaSeparated(unique=False)
+    assert param_type.convert('b,a,b', None, None) == ['b', 'a', 'b']
+
+
+def test_list_comma_separated_as_frozenset():
+    """Test returning a frozenset for membership tests."""
+    param_type = ListCommaSeparated(as_frozenset=True)
+    assert param_type.convert('a, b, a', None, None) == frozenset({'a', 'b'})
+    assert param_type.convert('', None, None) == frozenset()
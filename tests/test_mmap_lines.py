@@ -0,0 +1,92 @@
+import os
+import threading
+
+import pytest
+import click
+
+from click_tools.cli import FileIterStringParamType, FileUrlIterStringParamType, iter_mmap_lines
+
+
+@pytest.fixture
+def lines_file(tmp_path):
+    f = tmp_path / 'lines.txt'
+    f.write_bytes('one\r\ntwo\nthrée\n\nlast'.encode('utf-8'))
+    return f
+
+
+def test_iter_mmap_lines_text(lines_file):
+    """Test reading decoded lines through a memory map."""
+    assert list(iter_mmap_lines(str(lines_file))) == ['one\n', 'two\n', 'thrée\n', '\n', 'last']
+
+
+def test_iter_mmap_lines_matches_text_file(lines_file):
+    """Test that mapped lines match iterating over the file in text mode."""
+    with open(lines_file, encoding='utf-8') as f:
+        assert list(iter_mmap_lines(str(lines_file))) == list(f)
+
+
+def test_iter_mmap_lines_binary(lines_file):
+    """Test reading memoryview slices through a memory map."""
+    lines = list(iter_mmap_lines(str(lines_file), binary=True))
+    assert all(isinstance(line, memoryview) for line in lines)
+    assert [line.tobytes() for line in lines] == [b'one\r\n', b'two\n', 'thrée\n'.encode('utf-8'), b'\n', b'last']
+
+
+def test_iter_mmap_lines_empty_file(tmp_path):
+    """Test reading an empty file, which can't be mapped."""
+    f = tmp_path / 'empty.txt'
+    f.write_bytes(b'')
+    assert list(iter_mmap_lines(str(f))) == []
+
+
+@pytest.mark.skipif(not hasattr(os, 'mkfifo'), reason='requires named pipes')
+def test_iter_mmap_lines_pipe_fallback(tmp_path):
+    """Test that pipes are read with buffered reads instead of a memory map."""
+    fifo = tmp_path / 'fifo'
+    os.mkfifo(fifo)
+
+    def write():
+        with open(fifo, 'wb') as f:
+            f.write(b'a\nb\n')
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        assert list(iter_mmap_lines(str(fifo))) == ['a\n', 'b\n']
+    finally:
+        writer.join()
+
+
+def test_file_url_iter_string_mmap(cli_runner, lines_file):
+    """Test FileUrlIterStringParamType reading a local file through a memory map."""
+    @click.command()
+    @click.argument('input', type=FileUrlIterStringParamType('r', mmap=True))
+    def cmd(input):
+        click.echo('|'.join(line.rstrip('\n') for line in input))
+
+    result = cli_runner.invoke(cmd, [str(lines_file)])
+    assert result.exit_code == 0
+    assert result.output.strip() == 'one|two|thrée||last'
+
+
+def test_file_iter_string_mmap_with_conversion(cli_runner, tmp_path):
+    """Test FileIterStringParamType reading a memory-mapped file with type conversion."""
+    f = tmp_path / 'numbers.txt'
+    f.write_text('1\n2\n3\n')
+
+    @click.command()
+    @click.argument('numbers', type=FileIterStringParamType('rb', type=int, mmap=True))
+    def cmd(numbers):
+        click.echo(sum(numbers))
+
+    result = cli_runner.invoke(cmd, [str(f)])
+    assert result.exit_code == 0
+    assert result.output.strip() == '6'
+
+
+def test_file_iter_string_mmap_decode_error(tmp_path):
+    """Test that decoding errors are reported as bad parameters."""
+    f = tmp_path / 'latin1.txt'
+    f.write_bytes(b'caf\xe9\n')
+    with pytest.raises(click.BadParameter):
+        FileIterStringParamType('r', mmap=True).convert(str(f), None, None)
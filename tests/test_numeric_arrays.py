@@ -0,0 +1,135 @@
+import io
+import sys
+from unittest.mock import patch
+
+import pytest
+import click
+
+from click_tools.cli import FileIterStringParamType, iter_arrays
+
+numpy = pytest.importorskip('numpy')
+
+
+@pytest.fixture
+def numbers_file(tmp_path):
+    f = tmp_path / 'numbers.txt'
+    f.write_bytes(b''.join(b'%d\n' % i for i in range(1, 11)))
+    return f
+
+
+def test_iter_arrays_single_array():
+    """Test parsing a stream into a single array across block boundaries."""
+    stream = io.BytesIO(b'1\n22\n333\r\n4444\n')
+    arrays = list(iter_arrays(stream, int, block_size=3))
+    assert len(arrays) == 1
+    assert arrays[0].dtype == numpy.int64
+    assert arrays[0].tolist() == [1, 22, 333, 4444]
+
+
+def test_iter_arrays_chunks():
+    """Test parsing a stream into fixed-size array chunks."""
+    stream = io.BytesIO(b'1.5\n2\n3\n4\n5')
+    arrays = list(iter_arrays(stream, numpy.float32, chunk_size=2, block_size=4))
+    assert [a.tolist() for a in arrays] == [[1.5, 2.0], [3.0, 4.0], [5.0]]
+    assert all(a.dtype == numpy.float32 for a in arrays)
+
+
+def test_iter_arrays_empty():
+    """Test parsing an empty stream."""
+    assert list(iter_arrays(io.BytesIO(b''), int, chunk_size=2)) == []
+    assert list(iter_arrays(io.BytesIO(b''), int))[0].tolist() == []
+
+
+def test_iter_arrays_error_line_number():
+    """Test that parse errors report the offending line number."""
+    stream = io.BytesIO(b'1\n2\n3\nfour\n5\n')
+    with pytest.raises(ValueError, match="line 4: could not convert 'four'"):
+        list(iter_arrays(stream, int, chunk_size=2, block_size=2))
+
+
+def test_file_iter_string_as_array(cli_runner, numbers_file):
+    """Test FileIterStringParamType returning a single array."""
+    @click.command()
+    @click.argument('numbers', type=FileIterStringParamType('r', type=int, as_array=True))
+    def cmd(numbers):
+        click.echo('%s %s %d' % (type(numbers).__name__, numbers.dtype, numbers.sum()))
+
+    result = cli_runner.invoke(cmd, [str(numbers_file)])
+    assert result.exit_code == 0
+    assert result.output.strip() == 'ndarray int64 55'
+
+
+def test_file_iter_string_array_chunks(cli_runner, numbers_file):
+    """Test FileIterStringParamType returning an iterator of array chunks."""
+    @click.command()
+    @click.argument('numbers', type=FileIterStringParamType('r', type=float, as_array=True, array_chunk_size=4))
+    def cmd(numbers):
+        for chunk in numbers:
+            click.echo(chunk.tolist())
+
+    result = cli_runner.invoke(cmd, [str(numbers_file)])
+    assert result.exit_code == 0
+    assert result.output.splitlines() == ['[1.0, 2.0, 3.0, 4.0]', '[5.0, 6.0, 7.0, 8.0]', '[9.0, 10.0]']
+
+
+def test_file_iter_string_as_array_stdin_and_string(cli_runner):
+    """Test FileIterStringParamType array mode with stdin and direct strings."""
+    @click.command()
+    @click.argument('numbers', type=FileIterStringParamType('r', type=int, as_array=True))
+    def cmd(numbers):
+        click.echo(numbers.tolist())
+
+    result = cli_runner.invoke(cmd, ['-'], input='1\n2\n3\n')
+    assert result.exit_code == 0
+    assert result.output.strip() == '[1, 2, 3]'
+
+    result = cli_runner.invoke(cmd, ['42'])
+    assert result.exit_code == 0
+    assert result.output.strip() == '[42]'
+
+
+def test_file_iter_string_as_array_parse_error(cli_runner, tmp_path):
+    """Test that array parse errors are reported with their line number."""
+    f = tmp_path / 'numbers.txt'
+    f.write_text('1\n2\noops\n')
+
+    @click.command()
+    @click.argument('numbers', type=FileIterStringParamType('r', type=int, as_array=True))
+    def cmd(numbers):
+        pass
+
+    result = cli_runner.invoke(cmd, [str(f)])
+    assert result.exit_code != 0
+    assert 'line 3' in result.output
+
+
+def test_file_iter_string_as_array_overflow(cli_runner, tmp_path):
+    """Test that values out of the range of an integer dtype are reported with their line number."""
+    f = tmp_path / 'numbers.txt'
+    f.write_text('1\n2\n300\n')
+
+    @click.command()
+    @click.argument('numbers', type=FileIterStringParamType('r', type=numpy.int8, as_array=True))
+    def cmd(numbers):
+        pass
+
+    result = cli_runner.invoke(cmd, [str(f)])
+    assert result.exit_code == 2
+    assert "line 3: could not convert '300' to int8" in result.output
+
+
+def test_file_iter_string_as_array_invalid_type():
+    """Test that array mode rejects types that aren't NumPy dtypes."""
+    param_type = FileIterStringParamType('r', type=lambda x: x, as_array=True)
+    with pytest.raises(click.BadParameter) as exc_info:
+        param_type.convert('1', None, None)
+    assert 'NumPy dtype' in str(exc_info.value)
+
+
+def test_file_iter_string_as_array_without_numpy():
+    """Test that array mode reports a missing NumPy installation."""
+    param_type = FileIterStringParamType('r', type=int, as_array=True)
+    with patch.dict(sys.modules, {'numpy': None}):
+        with pytest.raises(click.BadParameter) as exc_info:
+            param_type.convert('1', None, None)
+    assert 'click-tools[numpy]' in str(exc_info.value)
@@ -0,0 +1,132 @@
+import threading
+
+import click
+
+from click_tools import FileOrUrlParamType, FileUrlIterStringParamType, PrefetchArgument, PrefetchOption
+
+
+class FakeResponse:
+    def __init__(self, content, status=200):
+        self.content = content
+        self.ok = status == 200
+
+    def iter_content(self, chunk_size=1):
+        yield self.content
+
+    def close(self):
+        pass
+
+
+class BarrierSession:
+    """A fake session whose requests only complete once `parties` of them are in flight."""
+
+    def __init__(self, parties, statuses=None, timeout=5):
+        self.barrier = threading.Barrier(parties, timeout=timeout)
+        self.statuses = statuses or {}
+
+    def get(self, url, stream=False):
+        self.barrier.wait()
+        return FakeResponse(url.encode('utf-8'), self.statuses.get(url, 200))
+
+
+URLS = ['http://example.com/a', 'http://example.com/b', 'http://example.com/c']
+
+
+def test_prefetch_argument_fetches_concurrently(cli_runner):
+    """Test that PrefetchArgument fetches all URL values at once and keeps argument order."""
+    @click.command()
+    @click.argument('inputs', nargs=-1, cls=PrefetchArgument, type=FileOrUrlParamType('r', session=BarrierSession(3)))
+    def cmd(inputs):
+        click.echo(','.join(f.read() for f in inputs))
+
+    result = cli_runner.invoke(cmd, URLS)
+    assert result.exit_code == 0, result.output
+    assert result.output.strip() == ','.join(URLS)
+
+
+def test_prefetch_option_fetches_concurrently(cli_runner):
+    """Test that PrefetchOption fetches all values of a multiple option at once."""
+    @click.command()
+    @click.option('--input', multiple=True, cls=PrefetchOption, type=FileUrlIterStringParamType('r', session=BarrierSession(3)))
+    def cmd(input):
+        click.echo(','.join(next(lines) for lines in input))
+
+    result = cli_runner.invoke(cmd, ['--input', URLS[0], '--input', URLS[1], '--input', URLS[2]])
+    assert result.exit_code == 0, result.output
+    assert result.output.strip() == ','.join(URLS)
+
+
+def test_prefetch_bounded_workers(cli_runner):
+    """Test that max_workers bounds the number of concurrent fetches."""
+    @click.command()
+    @click.argument('inputs', nargs=-1, cls=PrefetchArgument, type=FileOrUrlParamType('r', session=BarrierSession(3, timeout=0.5), max_workers=2))
+    def cmd(inputs):
+        click.echo(','.join(f.read() for f in inputs))
+
+    result = cli_runner.invoke(cmd, URLS)
+    assert result.exit_code != 0
+    assert 'Error while fetching' in result.output
+
+
+def test_prefetch_error_reports_url(cli_runner):
+    """Test that a failed prefetch is reported through self.fail with the original URL."""
+    session = BarrierSession(3, statuses={URLS[1]: 404})
+
+    @click.command()
+    @click.argument('inputs', nargs=-1, cls=PrefetchArgument, type=FileOrUrlParamType('r', session=session))
+    def cmd(inputs):
+        click.echo(','.join(f.read() for f in inputs))
+
+    result = cli_runner.invoke(cmd, URLS)
+    assert result.exit_code != 0
+    assert 'Url %s does not return 200 OK' % URLS[1] in result.output
+
+
+def test_prefetch_mixed_values(cli_runner, mock_responses, tmp_path):
+    """Test prefetching with repeated URLs, local files and plain strings."""
+    f = tmp_path / 'test.txt'
+    f.write_text('file')
+    url = 'http://example.com/data'
+    mock_responses.add(mock_responses.GET, url, body=b'first')
+    mock_responses.add(mock_responses.GET, url, body=b'second')
+
+    @click.command()
+    @click.argument('inputs', nargs=-1, cls=PrefetchArgument, type=FileUrlIterStringParamType('r'))
+    def cmd(inputs):
+        click.echo(','.join(''.join(lines).strip() for lines in inputs))
+
+    result = cli_runner.invoke(cmd, [url, str(f), 'plain', url])
+    assert result.exit_code == 0, result.output
+    assert sorted(result.output.strip().split(',')) == sorted(['first', 'file', 'plain', 'second'])
+    assert result.output.strip().split(',')[1:3] == ['file', 'plain']
+
+
+def test_prefetch_without_prefetch_parameter(mock_responses):
+    """Test that param types still fetch on demand when used with plain parameters."""
+    url = 'http://example.com/data'
+    mock_responses.add(mock_responses.GET, url, body=b'hello')
+    param_type = FileUrlIterStringParamType('r')
+    assert list(param_type.convert(url, None, None)) == ['hello']
+
+
+def test_prefetch_failed_conversion_not_reused(cli_runner, mock_responses, tmp_path):
+    """Test that the downloads left over by a failed conversion are removed and not reused by the next invocation."""
+    bad, good = 'http://example.com/bad', 'http://example.com/good'
+    mock_responses.add(mock_responses.GET, bad, status=404)
+    mock_responses.add(mock_responses.GET, good, body=b'good')
+
+    @click.command()
+    @click.argument('inputs', nargs=-1, cls=PrefetchArgument, type=FileOrUrlParamType('r', temp_dir=str(tmp_path)))
+    def cmd(inputs):
+        click.echo(','.join(f.read() for f in inputs))
+
+    result = cli_runner.invoke(cmd, [bad, good])
+    assert result.exit_code != 0
+    assert 'Url %s does not return 200 OK' % bad in result.output
+    assert list(tmp_path.iterdir()) == []
+
+    calls = len(mock_responses.calls)
+    result = cli_runner.invoke(cmd, [good, good])
+    assert result.exit_code == 0, result.output
+    assert result.output.strip() == 'good,good'
+    assert len(mock_responses.calls) == calls + 2
@@ -0,0 +1,180 @@
+import functools
+import threading
+
+import pytest
+import click
+from click.testing import CliRunner
+
+from click_tools.cli import (
+    FileIterStringParamType,
+    FileUrlIterStringParamType,
+    ReadAheadIterator,
+    StringsListOrStdinParamType,
+    _close_lines,
+)
+
+
+def test_read_ahead_iterator_preserves_order():
+    """Test that elements come out in order across batch boundaries."""
+    lines = ReadAheadIterator(iter(range(10000)), batch_size=7, max_batches=2)
+    assert list(lines) == list(range(10000))
+
+
+def test_read_ahead_iterator_empty():
+    """Test reading ahead from an empty iterator."""
+    assert list(ReadAheadIterator(iter([]))) == []
+
+
+def test_read_ahead_iterator_next():
+    """Test calling next() directly on the iterator."""
+    lines = ReadAheadIterator(iter(['a', 'b']))
+    assert next(lines) == 'a'
+    assert next(lines) == 'b'
+    with pytest.raises(StopIteration):
+        next(lines)
+    assert iter(lines) is lines
+
+
+def test_read_ahead_iterator_reads_in_background():
+    """Test that the source is consumed before the consumer asks for elements."""
+    read = threading.Event()
+
+    def source():
+        yield 'first'
+        read.set()
+        yield 'second'
+
+    lines = ReadAheadIterator(source(), batch_size=1)
+    assert read.wait(1)
+    assert list(lines) == ['first', 'second']
+
+
+def test_read_ahead_iterator_bounded():
+    """Test that the background thread stops reading when the queue is full."""
+    consumed = []
+
+    def source():
+        for i in range(1000):
+            consumed.append(i)
+            yield i
+
+    lines = ReadAheadIterator(source(), batch_size=10, max_batches=2)
+    lines._thread.join(0.3)
+    # Two queued batches plus the one waiting to be put
+    assert len(consumed) <= 30
+    lines.close()
+    assert not lines._thread.is_alive()
+
+
+def test_read_ahead_iterator_reraises_errors():
+    """Test that an error in the source is raised to the consumer after earlier elements."""
+
+    def source():
+        yield 'ok'
+        raise ValueError('broken source')
+
+    lines = ReadAheadIterator(source(), batch_size=1)
+    assert next(lines) == 'ok'
+    with pytest.raises(ValueError, match='broken source'):
+        next(lines)
+
+
+def test_read_ahead_iterator_close_stops_thread():
+    """Test that closing stops a thread producing an endless source."""
+    lines = ReadAheadIterator(iter(int, 1), batch_size=10, max_batches=1)
+    assert next(lines) == 0
+    lines.close()
+    assert not lines._thread.is_alive()
+
+
+def test_read_ahead_iterator_partial_batch():
+    """Test that elements of a slow source don't wait for a full batch."""
+    release = threading.Event()
+
+    def source():
+        yield 'first'
+        release.wait(5)
+        yield 'second'
+
+    lines = ReadAheadIterator(source(), batch_size=1024)
+    assert next(lines) == 'first'
+    release.set()
+    assert list(lines) == ['second']
+
+
+def test_read_ahead_iterator_close_blocked_source():
+    """Test that a source still being read when the context closes is closed by the thread."""
+    release = threading.Event()
+
+    def source():
+        yield 'first'
+        release.wait(5)
+        yield 'second'
+
+    generator = source()
+    with click.Context(click.Command('cmd')) as ctx:
+        ctx.call_on_close(functools.partial(_close_lines, generator))
+        lines = ReadAheadIterator(generator, batch_size=10)
+        ctx.call_on_close(functools.partial(lines.close, timeout=0.1))
+        assert next(lines) == 'first'
+    release.set()
+    lines._thread.join(1)
+    assert generator.gi_frame is None
+
+
+def test_file_url_iter_string_read_ahead(tmp_path):
+    """Test reading ahead lines from a local file."""
+    f = tmp_path / 'lines.txt'
+    f.write_text('a\nb\nc\n')
+
+    @click.command()
+    @click.argument('lines', type=FileUrlIterStringParamType(read_ahead=2))
+    def cmd(lines):
+        assert isinstance(lines, ReadAheadIterator)
+        click.echo(''.join(lines), nl=False)
+
+    result = CliRunner().invoke(cmd, [str(f)])
+    assert result.exit_code == 0, result.output
+    assert result.output == 'a\nb\nc\n'
+
+
+def test_file_url_iter_string_no_read_ahead_by_default(tmp_path):
+    """Test that lines are read on demand unless read_ahead is set."""
+    f = tmp_path / 'lines.txt'
+    f.write_text('a\n')
+    lines = FileUrlIterStringParamType().convert(str(f), None, None)
+    assert not isinstance(lines, ReadAheadIterator)
+
+
+def test_file_iter_string_read_ahead_with_type(tmp_path):
+    """Test that read-ahead lines are still converted."""
+    f = tmp_path / 'nums.txt'
+    f.write_text('1\n2\n3\n')
+
+    @click.command()
+    @click.argument('nums', type=FileIterStringParamType(type=int, read_ahead=1))
+    def cmd(nums):
+        click.echo(sum(nums))
+
+    result = CliRunner().invoke(cmd, [str(f)])
+    assert result.exit_code == 0, result.output
+    assert result.output == '6\n'
+
+
+def test_strings_list_or_stdin_read_ahead():
+    """Test reading ahead from stdin, while direct strings stay lists."""
+
+    @click.command()
+    @click.argument('lines', type=StringsListOrStdinParamType(read_ahead=4))
+    def cmd(lines):
+        click.echo(type(lines).__name__)
+        for line in lines:
+            click.echo(line.strip())
+
+    runner = CliRunner()
+    result = runner.invoke(cmd, ['-'], input='x\ny\n')
+    assert result.exit_code == 0, result.output
+    assert result.output == 'ReadAheadIterator\nx\ny\n'
+
+    result = runner.invoke(cmd, ['direct'])
+    assert result.output == 'list\ndirect\n'
@@ -0,0 +1,72 @@
+import pytest
+import click
+import requests
+from unittest.mock import Mock
+
+from click_tools import FileOrUrlParamType, FileUrlIterStringParamType, configure_session, get_session, set_session
+
+
+@pytest.fixture(autouse=True)
+def reset_session():
+    """Fixture that restores the default shared session after each test."""
+    yield
+    configure_session()
+
+
+def test_get_session_is_shared():
+    """Test that get_session returns the same session on every call."""
+    session = get_session()
+    assert isinstance(session, requests.Session)
+    assert get_session() is session
+
+
+def test_configure_session_pool_settings():
+    """Test that configure_session sets up the connection pools of the shared session."""
+    previous = get_session()
+    configure_session(pool_connections=4, pool_maxsize=32, pool_block=True, max_retries=3)
+    session = get_session()
+    assert session is not previous
+
+    adapter = session.get_adapter('https://example.com')
+    assert adapter._pool_connections == 4
+    assert adapter._pool_maxsize == 32
+    assert adapter._pool_block is True
+    assert adapter.max_retries.total == 3
+
+
+def test_configure_session_without_keep_alive():
+    """Test that disabling keep-alive closes connections after every request."""
+    configure_session(keep_alive=False)
+    assert get_session().headers['Connection'] == 'close'
+
+
+def test_param_types_use_shared_session(mock_responses):
+    """Test that URL param types fetch through the shared session."""
+    url = 'http://example.com/data'
+    mock_responses.add(mock_responses.GET, url, body=b'line1\nline2')
+    mock_responses.add(mock_responses.GET, url, body=b'line1\nline2')
+
+    session = requests.Session()
+    session.get = Mock(wraps=session.get)
+    set_session(session)
+
+    assert list(FileUrlIterStringParamType('r').convert(url, None, None)) == ['line1', 'line2']
+    ctx = click.Context(click.Command('cmd'))
+    with ctx:
+        assert FileOrUrlParamType('r').convert(url, None, ctx).read() == 'line1\nline2'
+    assert session.get.call_count == 2
+
+
+def test_param_type_session_injection(mock_responses):
+    """Test that a session passed to a param type takes precedence over the shared one."""
+    url = 'http://example.com/data'
+    mock_responses.add(mock_responses.GET, url, body=b'hello')
+
+    session = requests.Session()
+    session.get = Mock(wraps=session.get)
+    shared = get_session()
+    shared.get = Mock(wraps=shared.get)
+
+    assert list(FileUrlIterStringParamType('r', session=session).convert(url, None, None)) == ['hello']
+    session.get.assert_called_once_with(url, stream=False)
+    shared.get.assert_not_called()
@@ -0,0 +1,92 @@
+import pytest
+import click
+
+from click_tools import FileIterStringParamType, FileUrlIterStringParamType, ShardParamType
+from click_tools.cli import iter_shard_lines
+
+
+@pytest.fixture
+def lines_file(tmp_path):
+    f = tmp_path / 'lines.txt'
+    f.write_bytes(b''.join(b'%s\n' % (b'x' * (i % 7)) + b'%d\r\n' % i for i in range(100)) + b'last')
+    return f
+
+
+@pytest.mark.parametrize('count', [1, 2, 3, 7, 16, 1000])
+def test_iter_shard_lines_no_gaps_or_overlap(lines_file, count):
+    """Test that the shards of a file together contain every line exactly once."""
+    with open(lines_file, 'rb') as f:
+        expected = f.readlines()
+    shards = [list(iter_shard_lines(str(lines_file), index, count, binary=True)) for index in range(count)]
+    assert [line for shard in shards for line in shard] == expected
+
+
+def test_iter_shard_lines_text(lines_file):
+    """Test that text shards are decoded with universal newlines."""
+    lines = [line for index in range(3) for line in iter_shard_lines(str(lines_file), index, 3)]
+    with open(lines_file) as f:
+        assert lines == f.readlines()
+
+
+def test_iter_shard_lines_empty_file(tmp_path):
+    """Test sharding an empty file."""
+    f = tmp_path / 'empty.txt'
+    f.write_bytes(b'')
+    assert list(iter_shard_lines(str(f), 0, 2)) == []
+    assert list(iter_shard_lines(str(f), 1, 2)) == []
+
+
+def test_iter_shard_lines_invalid_index(lines_file):
+    """Test that out of range shard indexes are rejected."""
+    with pytest.raises(ValueError):
+        list(iter_shard_lines(str(lines_file), 2, 2))
+
+
+def test_shard_param_type():
+    """Test parsing shard specifications."""
+    param_type = ShardParamType()
+    assert param_type.convert('2/8', None, None) == (2, 8)
+    for value in ('8/8', '-1/2', 'a/b', '1'):
+        with pytest.raises(click.BadParameter):
+            param_type.convert(value, None, None)
+
+
+def test_file_iter_string_shard_option(cli_runner, tmp_path):
+    """Test FileIterStringParamType sharding with type conversion and a --shard option."""
+    f = tmp_path / 'numbers.txt'
+    f.write_text(''.join('%d\n' % i for i in range(1, 101)))
+
+    @click.command()
+    @click.option('--shard', type=ShardParamType(), is_eager=True)
+    @click.argument('numbers', type=FileIterStringParamType('r', type=int, shard='shard'))
+    def cmd(shard, numbers):
+        click.echo(sum(numbers))
+
+    totals = []
+    for index in range(3):
+        result = cli_runner.invoke(cmd, [str(f), '--shard', '%d/3' % index])
+        assert result.exit_code == 0, result.output
+        totals.append(int(result.output))
+    assert sum(totals) == 5050
+    assert all(total > 0 for total in totals)
+
+    result = cli_runner.invoke(cmd, [str(f)])
+    assert result.exit_code == 0
+    assert result.output.strip() == '5050'
+
+
+def test_file_url_iter_string_shard(tmp_path):
+    """Test FileUrlIterStringParamType with a fixed shard."""
+    f = tmp_path / 'lines.txt'
+    f.write_text('a\nb\nc\nd\n')
+    first = list(FileUrlIterStringParamType('r', shard=(0, 2)).convert(str(f), None, None))
+    second = list(FileUrlIterStringParamType('r', shard=(1, 2)).convert(str(f), None, None))
+    assert first == ['a\n', 'b\n']
+    assert second == ['c\n', 'd\n']
+
+
+def test_shard_requires_local_file():
+    """Test that sharding non-file inputs is reported as a bad parameter."""
+    with pytest.raises(click.BadParameter) as exc_info:
+        FileIterStringParamType('r', shard=(0, 2)).convert('-', None, None)
+    assert 'can be sharded' in str(exc_info.value)
@@ -0,0 +1,118 @@
+import random
+
+import pytest
+import click
+from click.testing import CliRunner
+
+import click_tools.cli
+from click_tools.cli import (
+    FileIterStringParamType,
+    FileUrlIterStringParamType,
+    StringsListOrStdinParamType,
+    iter_sorted_lines,
+)
+
+
+@pytest.fixture
+def shuffled_lines():
+    lines = ['%05d\n' % i for i in range(1000)]
+    random.Random(0).shuffle(lines)
+    return lines
+
+
+def test_in_memory_sort(tmp_path):
+    """Test inputs smaller than a chunk are sorted without spill files."""
+    assert list(iter_sorted_lines(['b\n', 'c', 'a\n'], temp_dir=str(tmp_path))) == ['a\n', 'b\n', 'c']
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_external_sort(tmp_path, shuffled_lines):
+    """Test sorting through spill files, which are removed once exhausted."""
+    sorted_lines = iter_sorted_lines(shuffled_lines, chunk_size=100, temp_dir=str(tmp_path))
+    first = next(sorted_lines)
+    spill_directories = list(tmp_path.iterdir())
+    assert [first] + list(sorted_lines) == sorted(shuffled_lines)
+    assert len(spill_directories) == 1
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_external_sort_closed_early(tmp_path, shuffled_lines):
+    sorted_lines = iter_sorted_lines(shuffled_lines, chunk_size=100, temp_dir=str(tmp_path))
+    assert next(sorted_lines) == '00000\n'
+    sorted_lines.close()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_multi_pass_merge(monkeypatch, shuffled_lines):
+    monkeypatch.setattr(click_tools.cli, 'DEFAULT_SORT_MERGE_FAN_IN', 3)
+    assert list(iter_sorted_lines(shuffled_lines, chunk_size=50)) == sorted(shuffled_lines)
+
+
+def test_key_reverse_stable():
+    lines = ['b1', 'a1', 'b2', 'a2', 'c1']
+    first_letter = lambda line: line[0]  # noqa: E731
+    assert list(iter_sorted_lines(lines, key=first_letter, chunk_size=2)) == ['a1', 'a2', 'b1', 'b2', 'c1']
+    assert list(iter_sorted_lines(lines, key=first_letter, reverse=True, chunk_size=2)) == ['c1', 'b1', 'b2', 'a1', 'a2']
+
+
+def test_unique():
+    """Test duplicates are dropped across chunks, ignoring line endings or by key."""
+    lines = ['b\n', 'a\n', 'b\n', 'a', 'c\n', 'b']
+    assert list(iter_sorted_lines(lines, unique=True, chunk_size=2)) == ['a\n', 'b\n', 'c\n']
+    assert list(iter_sorted_lines(['a1', 'b1', 'a2'], key=lambda line: line[0], unique=True)) == ['a1', 'b1']
+
+
+def test_unique_sorts_without_line_endings():
+    """Test that lines equal but for their endings are sorted next to each other."""
+    assert list(iter_sorted_lines(['a', 'a\t\n', 'a\n'], unique=True)) == ['a', 'a\t\n']
+    assert list(iter_sorted_lines([b'a\n', b'a\t\n', b'a'], unique=True, chunk_size=1)) == [b'a\n', b'a\t\n']
+
+
+def test_binary_and_memoryview_lines():
+    lines = [b'b\n', b'\xff\n', b'a\n']
+    assert list(iter_sorted_lines(lines, chunk_size=2)) == [b'a\n', b'b\n', b'\xff\n']
+    assert list(iter_sorted_lines(map(memoryview, lines), chunk_size=2)) == [b'a\n', b'b\n', b'\xff\n']
+
+
+def test_surrogates_round_trip():
+    lines = ['\udcff\n', 'a\n', 'b\n']
+    assert list(iter_sorted_lines(lines, chunk_size=1)) == sorted(lines)
+
+
+@pytest.mark.parametrize('sort_executor', ['thread', 'process'])
+def test_parallel_chunk_sorting(shuffled_lines, sort_executor):
+    param_type = FileUrlIterStringParamType('r', sort=True, sort_chunk_size=100, sort_workers=2, sort_executor=sort_executor, sort_key=str.strip)
+    with click.Context(click.Command('cmd')) as ctx:
+        assert list(click_tools.cli._sort(param_type, iter(shuffled_lines), ctx)) == sorted(shuffled_lines)
+
+
+def test_file_url_iter_string_sort(tmp_path, shuffled_lines):
+    f = tmp_path / 'lines.txt'
+    f.write_text(''.join(shuffled_lines + shuffled_lines[:10]))
+    param_type = FileUrlIterStringParamType('r', sort=True, sort_unique=True, sort_chunk_size=64, sort_temp_dir=str(tmp_path))
+    with click.Context(click.Command('cmd')) as ctx:
+        assert list(param_type.convert(str(f), None, ctx)) == sorted(shuffled_lines)
+    assert list(tmp_path.iterdir()) == [f]
+
+
+def test_file_iter_string_sort_before_conversion(tmp_path):
+    f = tmp_path / 'numbers.txt'
+    f.write_text('10\n9\n100\n')
+    param_type = FileIterStringParamType('r', type=int, sort=True, sort_key=int)
+    with click.Context(click.Command('cmd')) as ctx:
+        assert list(param_type.convert(str(f), None, ctx)) == [9, 10, 100]
+
+
+def test_strings_list_or_stdin_sort():
+    @click.command()
+    @click.argument('values', type=StringsListOrStdinParamType(sort=True, sort_reverse=True))
+    def cmd(values):
+        for value in values:
+            click.echo(value.strip())
+
+    assert CliRunner().invoke(cmd, ['-'], input='x\nz\ny\n').output == 'z\ny\nx\n'
+
+
+def test_sort_with_checkpoint():
+    with pytest.raises(ValueError):
+        FileUrlIterStringParamType('r', sort=True, checkpoint='job.checkpoint')
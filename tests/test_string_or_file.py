@@ -112,8 +112,13 @@ class MockTemporaryFile:
         return None
 
 
-def test_string_or_file_cleanup_after_string(cli_runner, cli_command):
+def test_string_or_file_cleanup_after_string(cli_runner):
     """Test that temporary file is cleaned up after string input."""
+    @click.command()
+    @click.argument('input', type=StringOrFileParamType('r', tempfile=True))
+    def cli_command(input):
+        click.echo(input.read())
+
     content = "test content"
     mock_temp_file = MockTemporaryFile(content)
 
@@ -158,4 +163,68 @@ def test_string_or_file_empty_string(cli_runner, cli_command):
     """Test StringOrFileParamType with empty string."""
     result = cli_runner.invoke(cli_command, [''])
     assert result.exit_code == 0
-    assert result.output.strip() == "" 
\ No newline at end of file
+    assert result.output.strip() == "" 
+
+
+def test_string_or_file_string_in_memory(cli_runner, cli_command):
+    """Test that direct strings are served from memory without a temporary file."""
+    with patch('tempfile.NamedTemporaryFile') as mock_named_temp_file:
+        result = cli_runner.invoke(cli_command, ["test content"])
+    assert result.exit_code == 0
+    assert result.output.strip() == "test content"
+    mock_named_temp_file.assert_not_called()
+
+
+def test_string_or_file_string_in_memory_api():
+    """Test that in-memory strings support the usual file reading API."""
+    f = StringOrFileParamType('r').convert("line1\nline2\n", None, None)
+    assert f.readline() == "line1\n"
+    assert list(f) == ["line2\n"]
+
+    f = StringOrFileParamType('rb').convert("héllo", None, None)
+    assert f.read() == "héllo".encode('utf-8')
+
+
+def test_string_or_file_tempfile_path(cli_runner):
+    """Test that tempfile=True gives a file object backed by a real path."""
+    @click.command()
+    @click.argument('input', type=StringOrFileParamType('r', tempfile=True))
+    def cmd(input):
+        click.echo(os.path.exists(input.name))
+        click.echo(input.read())
+
+    result = cli_runner.invoke(cmd, ["test content"])
+    assert result.exit_code == 0
+    assert result.output.split() == ['True', 'test', 'content']
+
+
+def test_string_or_file_spool_max_size():
+    """Test that direct strings larger than spool_max_size go to an unnamed temporary file."""
+    param_type = StringOrFileParamType('r', spool_max_size=4)
+    assert isinstance(param_type.convert('abc', None, None), StringIO)
+
+    f = param_type.convert('héllo world', None, None)
+    assert not isinstance(f, StringIO)
+    assert f.read() == 'héllo world'
+    f.close()
+
+
+def test_string_or_file_temp_dir(cli_runner, tmp_path):
+    """Test writing direct strings to temporary files in a configured directory."""
+    @click.command()
+    @click.argument('input', type=StringOrFileParamType('r', tempfile=True, temp_dir=str(tmp_path)))
+    def cmd(input):
+        click.echo(os.path.dirname(input.name) == str(tmp_path))
+
+    result = cli_runner.invoke(cmd, ['content'])
+    assert result.exit_code == 0, result.output
+    assert result.output == 'True\n'
+    assert os.listdir(tmp_path) == []
+
+
+def test_string_or_file_tempfile_without_context_leaves_no_file(tmp_path):
+    """Test that tempfile=True without a context doesn't leave a named file behind."""
+    f = StringOrFileParamType('r', tempfile=True, temp_dir=str(tmp_path)).convert('content', None, None)
+    assert f.read() == 'content'
+    assert os.listdir(tmp_path) == []
+    f.close()
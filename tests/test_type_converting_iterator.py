@@ -1,3 +1,8 @@
+import gc
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 
 from click_tools import TypeConvertingIterator
@@ -32,4 +37,163 @@ def test_type_converting_iterator_repr():
     """Test the string representation of TypeConvertingIterator."""
     iterator = TypeConvertingIterator(['1', '2'], int)
     assert 'TypeConvertingIterator' in repr(iterator)
-    assert str(int) in repr(iterator) 
\ No newline at end of file
+    assert str(int) in repr(iterator) 
+
+
+def test_type_converting_iterator_converts_each_element_once():
+    """Test that the first element is not converted twice by the convertibility check."""
+    calls = []
+
+    def convert(value):
+        calls.append(value)
+        return int(value)
+
+    iterator = TypeConvertingIterator(iter(['1', '2', '3']), convert)
+    assert list(iterator) == [1, 2, 3]
+    assert calls == ['1', '2', '3']
+
+
+def test_type_converting_iterator_mixed_next_and_iteration():
+    """Test that next() and for loops consume the same underlying iterator."""
+    iterator = TypeConvertingIterator(iter(['1', '2', '3', '4']), int)
+    assert next(iterator) == 1
+    assert [value for value in iterator] == [2, 3, 4]
+    with pytest.raises(StopIteration):
+        next(iterator)
+
+
+def test_type_converting_iterator_iter_returns_self():
+    """Test that TypeConvertingIterator follows the iterator protocol."""
+    iterator = TypeConvertingIterator(['1', '2'], int)
+    assert iter(iterator) is iterator
+
+
+def test_type_converting_iterator_releases_first_element():
+    """Test that the first element is not kept alive once it has been consumed."""
+    class Item:
+        pass
+
+    def items():
+        yield Item()
+        yield Item()
+
+    iterator = TypeConvertingIterator(items(), None)
+    ref = weakref.ref(next(iterator))
+    next(iterator)
+    gc.collect()
+    assert ref() is None
+
+
+def test_type_converting_iterator_batches():
+    """Test consuming a TypeConvertingIterator in batches."""
+    iterator = TypeConvertingIterator(iter(['1', '2', '3', '4', '5']), int)
+    assert list(iterator.batches(2)) == [[1, 2], [3, 4], [5]]
+
+
+def test_type_converting_iterator_batch_conversion():
+    """Test TypeConvertingIterator with a batch conversion function."""
+    calls = []
+
+    def convert(batch):
+        calls.append(list(batch))
+        return tuple(int(x) for x in batch)
+
+    iterator = TypeConvertingIterator(iter(['1', '2', '3', '4', '5']), batch_conversion_function=convert, batch_size=2)
+    assert calls == [['1', '2']]
+    assert list(iterator) == [1, 2, 3, 4, 5]
+    assert calls == [['1', '2'], ['3', '4'], ['5']]
+
+
+def test_type_converting_iterator_batch_conversion_batches():
+    """Test that batches() returns the values of the batch conversion function as is."""
+    iterator = TypeConvertingIterator(iter(['1', '2', '3']), batch_conversion_function=lambda batch: tuple(map(int, batch)), batch_size=2)
+    assert list(iterator.batches()) == [(1, 2), (3,)]
+
+
+def test_type_converting_iterator_batches_after_next():
+    """Test that batches() doesn't skip elements of a partially consumed batch."""
+    iterator = TypeConvertingIterator(iter(['1', '2', '3', '4', '5']), batch_conversion_function=lambda batch: tuple(map(int, batch)), batch_size=2)
+    assert next(iterator) == 1
+    assert list(iterator.batches()) == [[2, 3], [4, 5]]
+
+
+def test_type_converting_iterator_batch_conversion_invalid():
+    """Test that a failing batch conversion is raised when converting the first batch."""
+    with pytest.raises(ValueError):
+        TypeConvertingIterator(['1', 'not a number'], batch_conversion_function=lambda batch: [int(x) for x in batch])
+
+
+def test_type_converting_iterator_exclusive_conversions():
+    """Test that conversion_function and batch_conversion_function can't be combined."""
+    with pytest.raises(ValueError):
+        TypeConvertingIterator(['1'], int, batch_conversion_function=list)
+
+
+def test_type_converting_iterator_executor_preserves_order():
+    """Test that parallel conversion keeps the order of the source."""
+    with ThreadPoolExecutor(4) as executor:
+        iterator = TypeConvertingIterator(iter(map(str, range(1000))), int, batch_size=7, executor=executor)
+        assert list(iterator) == list(range(1000))
+
+
+def test_type_converting_iterator_executor_batch_conversion():
+    """Test parallel batch conversion."""
+    with ThreadPoolExecutor(2) as executor:
+        iterator = TypeConvertingIterator(
+            iter(['1', '2', '3', '4', '5']), batch_conversion_function=lambda batch: tuple(map(int, batch)), batch_size=2, executor=executor
+        )
+        assert list(iterator.batches()) == [(1, 2), (3, 4), (5,)]
+
+
+def test_type_converting_iterator_executor_bounded():
+    """Test that at most max_in_flight chunks are read ahead of the consumer."""
+    read = []
+
+    def source():
+        for i in range(100):
+            read.append(i)
+            yield str(i)
+
+    with ThreadPoolExecutor(2) as executor:
+        iterator = TypeConvertingIterator(source(), int, batch_size=10, executor=executor, max_in_flight=3)
+        assert len(read) == 30
+        assert next(iterator) == 0
+        assert len(read) == 30
+        assert list(iterator) == list(range(1, 100))
+
+
+def test_type_converting_iterator_executor_error_line_number():
+    """Test that the first failing element is reported with its line number."""
+    lines = ['1', '2', '3', 'four', '5', 'six']
+    with ThreadPoolExecutor(2) as executor:
+        iterator = TypeConvertingIterator(iter(lines), int, batch_size=2, executor=executor)
+        assert next(iterator) == 1
+        with pytest.raises(ValueError, match='^line 4: '):
+            list(iterator)
+
+
+def test_type_converting_iterator_executor_first_chunk_error():
+    """Test that an error in the first chunk is raised right away."""
+    with ThreadPoolExecutor(2) as executor:
+        with pytest.raises(ValueError, match='^line 2: '):
+            TypeConvertingIterator(iter(['1', 'x']), int, executor=executor)
+
+
+def test_type_converting_iterator_executor_empty():
+    """Test parallel conversion of an empty iterator."""
+    with ThreadPoolExecutor(2) as executor:
+        with pytest.raises(StopIteration):
+            TypeConvertingIterator(iter([]), int, executor=executor)
+
+
+def test_type_converting_iterator_executor_runs_in_workers():
+    """Test that conversions run in the executor's threads."""
+    threads = set()
+
+    def convert(value):
+        threads.add(threading.current_thread())
+        return int(value)
+
+    with ThreadPoolExecutor(2) as executor:
+        assert list(TypeConvertingIterator(iter(['1', '2']), convert, executor=executor)) == [1, 2]
+    assert threading.main_thread() not in threads
@@ -0,0 +1,91 @@
+import pytest
+import click
+from click.testing import CliRunner
+
+from click_tools.cli import (
+    BloomFilter,
+    DigestSet,
+    DiskSet,
+    FileIterStringParamType,
+    FileUrlIterStringParamType,
+    StringsListOrStdinParamType,
+)
+
+
+@pytest.fixture
+def duplicates_file(tmp_path):
+    f = tmp_path / 'duplicates.txt'
+    f.write_text('a\nb\na\nc\nb\nd\na')
+    return f
+
+
+def test_digest_set_grows():
+    """Test the digest set stays exact when it grows past its initial capacity."""
+    seen = DigestSet(capacity=4)
+    assert all(seen.add('line %d\n' % i) for i in range(1000))
+    assert not any(seen.add('line %d' % i) for i in range(1000))
+    assert len(seen) == 1000
+    assert 'line 5' in seen
+    assert 'line 1000' not in seen
+
+
+def test_bloom_filter_error_rate():
+    """Test the Bloom filter never drops a seen line and keeps close to its error rate."""
+    seen = BloomFilter(capacity=10000, error_rate=0.01)
+    assert all(seen.add('seen %d' % i) for i in range(100))
+    for i in range(100, 10000):
+        seen.add('seen %d' % i)
+    assert not any(seen.add('seen %d' % i) for i in range(10000))
+    false_positives = sum('new %d' % i in seen for i in range(10000))
+    assert false_positives < 200
+
+
+def test_bloom_filter_invalid_error_rate():
+    with pytest.raises(ValueError):
+        BloomFilter(error_rate=0)
+
+
+def test_disk_set(tmp_path):
+    """Test the disk set in a given directory, and that its database is removed."""
+    seen = DiskSet(str(tmp_path))
+    assert seen.add(b'a\n')
+    assert not seen.add('a')
+    assert seen.add('b')
+    assert len(seen) == 2
+    seen.close()
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize('unique', ['exact', 'bloom', 'disk'])
+def test_file_url_iter_string_unique(duplicates_file, unique):
+    param_type = FileUrlIterStringParamType('r', unique=unique)
+    with click.Context(click.Command('cmd')) as ctx:
+        lines = [line.strip() for line in param_type.convert(str(duplicates_file), None, ctx)]
+    assert lines == ['a', 'b', 'c', 'd']
+
+
+def test_file_iter_string_unique_before_conversion(tmp_path):
+    """Test duplicate lines are dropped before being converted."""
+    f = tmp_path / 'numbers.txt'
+    f.write_text('1\n2\n1\n3\n2\n')
+    param_type = FileIterStringParamType('r', type=int, unique='exact')
+    with click.Context(click.Command('cmd')) as ctx:
+        assert list(param_type.convert(str(f), None, ctx)) == [1, 2, 3]
+
+
+def test_strings_list_or_stdin_unique():
+    @click.command()
+    @click.argument('values', type=StringsListOrStdinParamType(unique='exact'))
+    def cmd(values):
+        for value in values:
+            click.echo(value.strip())
+
+    result = CliRunner().invoke(cmd, ['-'], input='x\ny\nx\n')
+    assert result.output == 'x\ny\n'
+    # Single values are not affected
+    assert CliRunner().invoke(cmd, ['x']).output == 'x\n'
+
+
+def test_invalid_unique_mode():
+    with pytest.raises(ValueError):
+        FileUrlIterStringParamType('r', unique='sorted')